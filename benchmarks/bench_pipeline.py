@@ -0,0 +1,276 @@
+"""
+End-to-end sweep benchmark against local fake services (no network access needed).
+
+Starts the fake GitHub / LLM / Slack server from `fake_services.py`, writes a
+throw-away config.yaml and database into a temporary directory, subscribes
+`--repos` repositories and measures:
+
+  - cold sweeps (`run_once`, plus delivery of queued notifications), each
+    starting from the same empty fetch state,
+  - one warm sweep right after, where every conditional probe answers 304,
+  - `process_subscription` called sequentially for a few repositories,
+
+reporting wall time, throughput, per-stage latency percentiles and the number
+of requests each fake service received.
+
+Usage:
+    python benchmarks/bench_pipeline.py --repos 200 --workers 16 --github-latency-ms 50
+    python benchmarks/bench_pipeline.py --summarizer ai --llm-batching --json results.json
+    python benchmarks/bench_pipeline.py --summarizer ai --noisy --no-compaction   # vs. without --no-compaction
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_services import FakeServices, FakeServiceSettings  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repos", type=int, default=50)
+    parser.add_argument("--commits", type=int, default=40, help="Commits per repository")
+    parser.add_argument("--issues", type=int, default=30, help="Issues and pull requests per repository")
+    parser.add_argument("--releases", type=int, default=2, help="Releases per repository")
+    parser.add_argument("--page-size", type=int, default=100, help="Largest page the fake GitHub API serves")
+    parser.add_argument("--github-latency-ms", type=float, default=20.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--slack-latency-ms", type=float, default=30.0)
+    parser.add_argument("--workers", type=int, default=8, help="concurrency.max_workers")
+    parser.add_argument("--stage", action="append", default=[], metavar="NAME=LIMIT",
+                        help="Per-stage limit, e.g. --stage fetch=16 (repeatable)")
+    parser.add_argument("--summarizer", choices=("simple", "ai"), default="simple")
+    parser.add_argument("--llm-batching", action="store_true", help="Enable llm.batching (ai summarizer only)")
+    parser.add_argument("--no-compaction", action="store_true", help="Disable llm.compaction (ai summarizer only)")
+    parser.add_argument("--compaction-budget", type=int, default=2000, help="llm.compaction.token_budget")
+    parser.add_argument("--noisy", action="store_true",
+                        help="Mix bot commits, a revert pair and duplicate messages into the fake commits")
+    parser.add_argument("--no-streaming", action="store_true", help="Disable fetch.streaming")
+    parser.add_argument("--no-outbox", action="store_true", help="Send notifications synchronously")
+    parser.add_argument("--digest", action="store_true", help="Enable notification digests")
+    parser.add_argument("--rounds", type=int, default=3, help="Cold sweeps to run")
+    parser.add_argument("--single", type=int, default=5, help="Repositories timed with process_subscription")
+    parser.add_argument("--json", metavar="PATH", help="Also write the results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's own output")
+    return parser.parse_args()
+
+
+def write_config(directory: Path, services: FakeServices, args) -> Path:
+    stages = {"fetch": args.workers, "summarize": args.workers, "notify": args.workers}
+    for item in args.stage:
+        name, _, limit = item.partition("=")
+        stages[name] = int(limit)
+    bench_config = {
+        "github": {
+            "token": "bench-token",
+            "api_url": services.github_api_url,
+            "rate_limit": {"reserve": 0},
+            "conditional_requests": True,
+            "backend": "rest",
+        },
+        "llm": {
+            "api_key": "bench-key",
+            "model": "bench-model",
+            "base_url": services.llm_base_url,
+            "batching": {"enabled": args.llm_batching},
+            "cache": {"enabled": False},  # Every cold sweep must reach the LLM
+            "compaction": {"enabled": not args.no_compaction, "token_budget": args.compaction_budget},
+        },
+        "summarizer": {"type": args.summarizer},
+        "fetch": {"streaming": not args.no_streaming},
+        "concurrency": {"max_workers": args.workers, "stages": stages},
+        "database": {"path": str(directory / "sentinel.db")},
+        "notifications": {
+            "outbox": {"enabled": not args.no_outbox, "digest": {"enabled": args.digest, "window_seconds": 1}},
+            # No client-side pacing: the fake webhook's latency is what is being measured
+            "slack": {"enabled": True, "webhook_url": services.slack_webhook_url, "min_interval_seconds": 0},
+        },
+    }
+    path = directory / "config.yaml"
+    path.write_text(yaml.safe_dump(bench_config))
+    return path
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))]
+
+
+def stage_stats(results) -> dict[str, dict[str, float]]:
+    """p50/p95/max seconds per stage (and in total) over the repositories of a sweep."""
+    per_stage: dict[str, list[float]] = {}
+    for result in results:
+        per_stage.setdefault("total", []).append(result.total)
+        for name, secs in result.timings.items():
+            per_stage.setdefault(name, []).append(secs)
+    return {name: {"p50": percentile(v, 50), "p95": percentile(v, 95), "max": max(v)}
+            for name, v in per_stage.items()}
+
+
+def main():
+    args = parse_args()
+    settings = FakeServiceSettings(
+        repos=args.repos, commits_per_repo=args.commits, issues_per_repo=args.issues,
+        releases_per_repo=args.releases, max_per_page=args.page_size, github_latency_ms=args.github_latency_ms,
+        llm_latency_ms=args.llm_latency_ms, slack_latency_ms=args.slack_latency_ms, noisy_commits=args.noisy,
+    )
+    quiet = contextlib.nullcontext if args.verbose else (lambda: contextlib.redirect_stdout(io.StringIO()))
+
+    with FakeServices(settings) as services, tempfile.TemporaryDirectory(prefix="sentinel-bench-") as tmp:
+        workdir = Path(tmp)
+        write_config(workdir, services, args)
+        # config_loader reads ./config.yaml on import
+        os.chdir(workdir)
+
+        from github_sentinel.components.db_manager import get_db_session
+        from github_sentinel.components.metrics import metrics
+        from github_sentinel.core.engine import RepoResult, StageTimer
+        from github_sentinel.core.processor import process_subscription, run_once
+        from github_sentinel.components.registry import close_shared_components, shared_outbox
+        from github_sentinel.models.http_validator import HttpValidator
+        from github_sentinel.models.outbound_message import OutboundMessage
+        from github_sentinel.models.subscription import Subscription
+        from github_sentinel.models.summary_cache import SummaryCacheEntry
+
+        session = get_db_session()
+        session.add_all(Subscription(repo_url=url, schedule="daily") for url in services.repo_urls())
+        session.commit()
+        session.close()
+
+        def reset_fetch_state():
+            """Forgets validators, high-water marks and cached summaries so the next sweep is cold."""
+            session = get_db_session()
+            session.query(HttpValidator).delete()
+            session.query(SummaryCacheEntry).delete()
+            session.query(OutboundMessage).delete()
+            session.query(Subscription).update({
+                "last_checked_at": None, "last_commit_sha": None,
+                "last_release_id": None, "last_issue_updated_at": None,
+            })
+            session.commit()
+            session.close()
+
+        def prompt_tokens() -> dict:
+            """Prompt tokens the fake LLM reported, and the ones compaction saved, since the last reset."""
+            totals = {"prompt": 0, "saved": 0}
+            for counter in metrics.snapshot()["counters"]:
+                if counter["name"] == "sentinel_llm_tokens_total" and counter["labels"].get("kind") == "prompt":
+                    totals["prompt"] += int(counter["value"])
+                elif counter["name"] == "sentinel_llm_prompt_tokens_saved_total":
+                    totals["saved"] += int(counter["value"])
+            return totals
+
+        def sweep(label: str) -> dict:
+            services.stats.reset()
+            metrics.reset()
+            with quiet():
+                start = time.perf_counter()
+                report = run_once(max_workers=args.workers)
+                wall = time.perf_counter() - start
+                if not args.no_outbox:
+                    shared_outbox().flush()
+                delivered = time.perf_counter() - start
+            return {
+                "label": label,
+                "wall_seconds": wall,
+                "delivered_seconds": delivered,
+                "repos_per_second": len(report.results) / wall if wall else 0.0,
+                "failed": len(report.failed),
+                "stages": stage_stats(report.results),
+                "requests": services.stats.snapshot(),
+                "llm_tokens": prompt_tokens(),
+            }
+
+        sweeps = []
+        for i in range(args.rounds):
+            reset_fetch_state()
+            sweeps.append(sweep(f"cold #{i + 1}"))
+        sweeps.append(sweep("warm (304)"))
+
+        reset_fetch_state()
+        singles = []
+        session = get_db_session()
+        subscriptions = session.query(Subscription).order_by(Subscription.id).limit(args.single).all()
+        session.close()
+        for subscription in subscriptions:
+            result = RepoResult(subscription.repo_url)
+            start = time.perf_counter()
+            with quiet():
+                process_subscription(subscription, stage=StageTimer({}, result))
+            result.total = time.perf_counter() - start
+            singles.append(result)
+
+        # Deliver what is still queued and stop background threads before the database goes away
+        with quiet():
+            close_shared_components()
+
+    results = {
+        "settings": vars(settings),
+        "workers": args.workers,
+        "summarizer": args.summarizer,
+        "llm_batching": args.llm_batching,
+        "compaction": args.summarizer == "ai" and not args.no_compaction,
+        "streaming": not args.no_streaming,
+        "outbox": not args.no_outbox,
+        "sweeps": sweeps,
+        "process_subscription": stage_stats(singles),
+    }
+    print_results(results)
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+        print(f"\nResults written to {args.json}")
+
+
+def print_results(results: dict):
+    settings = results["settings"]
+    print(f"{settings['repos']} repos x ({settings['commits_per_repo']} commits, {settings['issues_per_repo']} issues, "
+          f"{settings['releases_per_repo']} releases); latency github={settings['github_latency_ms']}ms "
+          f"llm={settings['llm_latency_ms']}ms slack={settings['slack_latency_ms']}ms; "
+          f"workers={results['workers']} summarizer={results['summarizer']}"
+          f"{' (batched)' if results['llm_batching'] else ''} streaming={results['streaming']} "
+          f"outbox={results['outbox']}")
+
+    print(f"\n{'sweep':<12} {'wall':>8} {'delivered':>10} {'repos/s':>9} {'failed':>7}  stage p50/p95 (s)")
+    for sweep in results["sweeps"]:
+        stages = "  ".join(f"{name}={s['p50']:.3f}/{s['p95']:.3f}" for name, s in sweep["stages"].items())
+        print(f"{sweep['label']:<12} {sweep['wall_seconds']:7.2f}s {sweep['delivered_seconds']:9.2f}s "
+              f"{sweep['repos_per_second']:9.1f} {sweep['failed']:>7}  {stages}")
+
+    cold = [s["wall_seconds"] for s in results["sweeps"] if s["label"].startswith("cold")]
+    if len(cold) > 1:
+        print(f"cold sweeps: median {statistics.median(cold):.2f}s, stdev {statistics.stdev(cold):.2f}s")
+
+    print("\nrequests per sweep (cold #1 / warm):")
+    first, warm = results["sweeps"][0]["requests"], results["sweeps"][-1]["requests"]
+    for route in sorted(set(first) | set(warm)):
+        a, b = first.get(route, {}), warm.get(route, {})
+        print(f"  {route:<18} {a.get('requests', 0):>7} / {b.get('requests', 0):<7} "
+              f"(304s: {a.get('not_modified', 0)} / {b.get('not_modified', 0)})")
+
+    if results["summarizer"] == "ai":
+        tokens = results["sweeps"][0]["llm_tokens"]
+        print(f"\nLLM prompt tokens (cold #1): {tokens['prompt']:,}; compaction={results['compaction']} "
+              f"saved {tokens['saved']:,} ({tokens['saved'] / max(1, tokens['prompt'] + tokens['saved']):.0%})")
+
+    print("\nprocess_subscription (sequential):")
+    for name, s in results["process_subscription"].items():
+        print(f"  {name:<10} p50={s['p50']:.3f}s p95={s['p95']:.3f}s max={s['max']:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
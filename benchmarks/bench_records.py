@@ -0,0 +1,83 @@
+"""
+Micro-benchmark: memory and build time of fetched-item representations.
+
+Compares, for N synthetic commits and issues in GitHub REST JSON shape:
+  - dict:     the free-form dicts the pipeline used to build per item
+  - pygithub: PyGithub objects built from the same JSON (only if PyGithub is installed)
+  - record:   the slotted record types from github_sentinel.models.records
+
+Usage: python benchmarks/bench_records.py [N]
+"""
+
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from github_sentinel.models.records import CommitRecord, IssueRecord  # noqa: E402
+
+
+def make_payloads(n: int) -> tuple[list[dict], list[dict]]:
+    commits = [{
+        "sha": f"{i:040x}",
+        "html_url": f"https://github.com/o/r/commit/{i:040x}",
+        "commit": {"author": {"name": f"author{i % 50}", "date": "2024-01-01T00:00:00Z"},
+                   "message": f"fix: change number {i}\n\nLonger body text for commit {i}."},
+        "author": {"login": f"author{i % 50}"},
+    } for i in range(n)]
+    issues = [{
+        "id": 10_000 + i, "number": i, "title": f"Issue title {i}", "user": {"login": f"user{i % 50}"},
+        "state": "open" if i % 3 else "closed", "html_url": f"https://github.com/o/r/issues/{i}",
+        "created_at": "2024-01-01T00:00:00Z", "updated_at": "2024-01-02T00:00:00Z", "closed_at": None,
+    } for i in range(n)]
+    return commits, issues
+
+
+def build_dicts(commits, issues):
+    return ([{"sha": c["sha"], "author": c["commit"]["author"]["name"],
+              "message": c["commit"]["message"].split("\n")[0], "url": c["html_url"]} for c in commits],
+            [{"number": i["number"], "title": i["title"], "user": i["user"]["login"], "state": i["state"],
+              "url": i["html_url"], "created_at": i["created_at"], "updated_at": i["updated_at"],
+              "closed_at": i["closed_at"]} for i in issues])
+
+
+def build_records(commits, issues):
+    return [CommitRecord.from_json(c) for c in commits], [IssueRecord.from_json(i) for i in issues]
+
+
+def build_pygithub(commits, issues):
+    from github.Commit import Commit
+    from github.Issue import Issue
+    return ([Commit(None, {}, c, completed=True) for c in commits],
+            [Issue(None, {}, i, completed=True) for i in issues])
+
+
+def measure(name, builder, commits, issues):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = builder(commits, issues)
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = sum(len(part) for part in result)
+    print(f"{name:<10} {elapsed * 1000:9.1f} ms {size / 1024:10.1f} KiB {size / count:8.1f} B/item")
+    return result
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    commits, issues = make_payloads(n)
+    print(f"{n} commits + {n} issues")
+    print(f"{'path':<10} {'time':>12} {'memory':>14} {'per item':>10}")
+    measure("dict", build_dicts, commits, issues)
+    try:
+        measure("pygithub", build_pygithub, commits, issues)
+    except Exception as e:
+        print(f"pygithub   skipped ({type(e).__name__}: {e})")
+    measure("record", build_records, commits, issues)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+CLI startup benchmark.
+
+Runs `python -m github_sentinel <command>` in fresh processes (inside a
+temporary directory without a config.yaml, so no command may depend on one
+unless it really needs it) and reports the median wall time per command,
+which heavy dependencies each command imported, and whether it stayed within
+its startup budget. Exits non-zero if any budget is exceeded.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 10
+    python benchmarks/bench_startup.py --help-budget-ms 300 --list-budget-ms 500
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ("sqlalchemy", "requests", "openai", "httpx", "apscheduler", "github")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=10, help="Process starts per command")
+    parser.add_argument("--help-budget-ms", type=float, default=400.0)
+    parser.add_argument("--list-budget-ms", type=float, default=600.0)
+    return parser.parse_args()
+
+
+def run(command: list[str], cwd: str, env: dict, importtime: bool = False) -> subprocess.CompletedProcess:
+    flags = ["-X", "importtime"] if importtime else []
+    return subprocess.run([sys.executable, *flags, "-m", "github_sentinel", *command], cwd=cwd, env=env,
+                          capture_output=True, text=True)
+
+
+def imported_heavy_modules(stderr: str) -> list[str]:
+    """Top-level heavy packages named in `-X importtime` output."""
+    found = set()
+    for line in stderr.splitlines():
+        if line.startswith("import time:"):
+            name = line.rsplit("|", 1)[-1].strip().split(".")[0]
+            if name in HEAVY_MODULES:
+                found.add(name)
+    return sorted(found)
+
+
+def main():
+    args = parse_args()
+    env = {**os.environ, "PYTHONPATH": str(ROOT) + os.pathsep + os.environ.get("PYTHONPATH", "")}
+    commands = {"--help": (["--help"], args.help_budget_ms), "list-repos": (["list-repos"], args.list_budget_ms)}
+
+    over_budget = False
+    with tempfile.TemporaryDirectory(prefix="sentinel-startup-") as tmp:
+        baseline = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", "pass"], check=True)
+            baseline.append((time.perf_counter() - start) * 1000)
+        print(f"{'command':<12} {'median':>9} {'min':>9} {'budget':>9}  heavy imports")
+        print(f"{'(python)':<12} {statistics.median(baseline):7.0f}ms {min(baseline):7.0f}ms")
+
+        for name, (command, budget) in commands.items():
+            timings = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                result = run(command, tmp, env)
+                timings.append((time.perf_counter() - start) * 1000)
+                if result.returncode != 0:
+                    sys.exit(f"'{name}' failed:\n{result.stdout}{result.stderr}")
+            heavy = imported_heavy_modules(run(command, tmp, env, importtime=True).stderr)
+            median = statistics.median(timings)
+            status = "ok" if median <= budget else "OVER BUDGET"
+            over_budget |= median > budget
+            print(f"{name:<12} {median:7.0f}ms {min(timings):7.0f}ms {budget:7.0f}ms  "
+                  f"{', '.join(heavy) or '-'}  {status}")
+
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Subscription onboarding benchmark (no network access needed).
+
+Subscribes `--repos` repositories into a throw-away database three ways and
+reports the throughput of each:
+
+  - one `add_subscription` call per repository (what `add-repo` does per process),
+  - `import` of a text file listing all of them (one transaction),
+  - `subscribe-org` against the fake GitHub organization from `fake_services.py`
+    (paginated listing + one transaction).
+
+Usage:
+    python benchmarks/bench_subscriptions.py --repos 2000 --github-latency-ms 50
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_services import FakeServices, FakeServiceSettings  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repos", type=int, default=2000)
+    parser.add_argument("--github-latency-ms", type=float, default=20.0)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    settings = FakeServiceSettings(repos=args.repos, github_latency_ms=args.github_latency_ms)
+
+    with FakeServices(settings) as services, tempfile.TemporaryDirectory(prefix="sentinel-bench-") as tmp:
+        workdir = Path(tmp)
+        (workdir / "config.yaml").write_text(yaml.safe_dump({
+            "github": {"token": "bench-token", "api_url": services.github_api_url, "rate_limit": {"reserve": 0}},
+            "database": {"path": str(workdir / "sentinel.db")},
+        }))
+        # config_loader reads ./config.yaml on import
+        os.chdir(workdir)
+
+        from typer.testing import CliRunner
+        from github_sentinel.cli import app
+        from github_sentinel.components.db_manager import add_subscription, get_db_session
+        from github_sentinel.models.subscription import Subscription
+
+        def clear():
+            session = get_db_session()
+            session.query(Subscription).delete()
+            session.commit()
+            session.close()
+
+        urls = services.repo_urls()
+        results = {}
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for url in urls:
+                add_subscription(url, "daily")
+        results["add_subscription x N"] = (len(urls), time.perf_counter() - start)
+
+        clear()
+        list_path = workdir / "repos.txt"
+        list_path.write_text("\n".join(urls) + "\n")
+        runner = CliRunner()
+        start = time.perf_counter()
+        outcome = runner.invoke(app, ["import", str(list_path)])
+        results["import"] = (len(urls), time.perf_counter() - start)
+        assert outcome.exit_code == 0, outcome.output
+
+        clear()
+        start = time.perf_counter()
+        outcome = runner.invoke(app, ["subscribe-org", "bench-org", "--include-forks"])
+        results["subscribe-org"] = (len(urls), time.perf_counter() - start)
+        assert outcome.exit_code == 0, outcome.output
+        pages = services.stats.snapshot().get("github:repos", {}).get("requests", 0)
+
+    print(f"{args.repos} repositories, github latency {args.github_latency_ms}ms")
+    for name, (count, elapsed) in results.items():
+        print(f"  {name:<22} {elapsed:7.2f}s  {count / elapsed:9,.0f} repos/s")
+    print(f"  (subscribe-org listed the organization in {pages} pages)")
+
+
+if __name__ == "__main__":
+    main()
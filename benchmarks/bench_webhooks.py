@@ -0,0 +1,169 @@
+"""
+Webhook ingestion benchmark (no network access needed).
+
+Starts the fake GitHub / Slack server from `fake_services.py` and the webhook
+receiver on a free local port, subscribes `--repos` repositories of which
+`--webhook-share` have a webhook (announced with a `ping`), and then:
+
+  1. runs a catch-up sweep (every repository is polled once),
+  2. posts signed push/issues/pull_request/release deliveries to the receiver
+     (synthetic ones, or recorded payloads from `--payloads DIR`, with their
+     `repository` rewritten to the subscribed repos) plus one with a bad
+     signature, measuring deliveries per second,
+  3. runs a second sweep, where only repositories without webhooks should
+     reach the GitHub API.
+
+Recorded payloads are files named `<event>.json` or `<event>-<anything>.json`.
+
+Usage:
+    python benchmarks/bench_webhooks.py --repos 100 --webhook-share 0.8
+    python benchmarks/bench_webhooks.py --payloads recorded-deliveries/
+"""
+
+import argparse
+import contextlib
+import hashlib
+import hmac
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import requests
+import yaml
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_services import FakeServices, FakeServiceSettings  # noqa: E402
+
+SECRET = "bench-webhook-secret"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repos", type=int, default=50)
+    parser.add_argument("--webhook-share", type=float, default=0.8, help="Fraction of repositories with a webhook")
+    parser.add_argument("--deliveries", type=int, default=5, help="Synthetic deliveries per webhook repository")
+    parser.add_argument("--payloads", metavar="DIR", help="Replay recorded payloads instead of synthetic ones")
+    parser.add_argument("--github-latency-ms", type=float, default=20.0)
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's own output")
+    return parser.parse_args()
+
+
+def repository(full_name: str) -> dict:
+    return {"full_name": full_name, "default_branch": "main", "html_url": f"https://github.com/{full_name}"}
+
+
+def synthetic_delivery(full_name: str, n: int) -> tuple[str, dict]:
+    now = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+    user = {"login": f"user{n % 7}"}
+    kind = ("push", "issues", "pull_request", "release", "push")[n % 5]
+    if kind == "push":
+        sha = hashlib.sha1(f"{full_name}-{n}".encode()).hexdigest()
+        commit = {"id": sha, "message": f"feat: change {n}\n\nDetails.", "timestamp": now,
+                  "url": f"https://github.com/{full_name}/commit/{sha}", "author": {"name": f"Dev {n % 5}"}}
+        return kind, {"ref": "refs/heads/main", "after": sha, "commits": [commit], "head_commit": commit}
+    if kind in ("issues", "pull_request"):
+        item = {"id": 10_000 + n, "number": n, "title": f"{kind} #{n}", "user": user, "state": "open",
+                "html_url": f"https://github.com/{full_name}/issues/{n}", "created_at": now, "updated_at": now,
+                "closed_at": None}
+        return kind, {"action": "opened", ("issue" if kind == "issues" else "pull_request"): item}
+    release = {"id": 50_000 + n, "tag_name": f"v1.{n}.0", "name": f"v1.{n}.0", "author": user,
+               "html_url": f"https://github.com/{full_name}/releases/v1.{n}.0", "created_at": now,
+               "published_at": now, "draft": False}
+    return kind, {"action": "published", "release": release}
+
+
+def recorded_deliveries(directory: str) -> list[tuple[str, dict]]:
+    return [(path.stem.split("-", 1)[0], json.loads(path.read_text())) for path in sorted(Path(directory).glob("*.json"))]
+
+
+def post(url: str, event: str, payload: dict, secret: str = SECRET) -> int:
+    body = json.dumps(payload).encode()
+    signature = "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    response = requests.post(url, data=body, timeout=10, headers={
+        "Content-Type": "application/json", "X-GitHub-Event": event,
+        "X-GitHub-Delivery": str(uuid.uuid4()), "X-Hub-Signature-256": signature,
+    })
+    return response.status_code
+
+
+def main():
+    args = parse_args()
+    settings = FakeServiceSettings(repos=args.repos, github_latency_ms=args.github_latency_ms, slack_latency_ms=0)
+    quiet = contextlib.nullcontext if args.verbose else (lambda: contextlib.redirect_stdout(io.StringIO()))
+
+    with FakeServices(settings) as services, tempfile.TemporaryDirectory(prefix="sentinel-bench-") as tmp:
+        workdir = Path(tmp)
+        (workdir / "config.yaml").write_text(yaml.safe_dump({
+            "github": {"token": "bench-token", "api_url": services.github_api_url, "rate_limit": {"reserve": 0}},
+            "summarizer": {"type": "simple"},
+            "database": {"path": str(workdir / "sentinel.db")},
+            "webhooks": {"host": "127.0.0.1", "port": 0, "secret": SECRET},
+            "notifications": {"slack": {"enabled": True, "webhook_url": services.slack_webhook_url,
+                                        "min_interval_seconds": 0}},
+        }))
+        # config_loader reads ./config.yaml on first use
+        os.chdir(workdir)
+
+        from github_sentinel.components.db_manager import add_subscriptions, get_all_subscriptions
+        from github_sentinel.components.registry import close_shared_components, shared_outbox
+        from github_sentinel.components.webhooks import WebhookReceiver
+        from github_sentinel.core.webhook_mode import run_webhook_sweep
+
+        urls = services.repo_urls()
+        add_subscriptions([(url, "daily") for url in urls])
+        with quiet():
+            receiver = WebhookReceiver().start()
+        endpoint = f"http://127.0.0.1:{receiver.port}{receiver.path}"
+        webhook_repos = [url.removeprefix("https://github.com/") for url in urls[:int(len(urls) * args.webhook_share)]]
+        for full_name in webhook_repos:
+            post(endpoint, "ping", {"zen": "Keep it logically awesome.", "repository": repository(full_name)})
+
+        def sweep(label: str) -> dict:
+            services.stats.reset()
+            with quiet():
+                start = time.perf_counter()
+                report = run_webhook_sweep(get_all_subscriptions(), receiver.started_at)
+                shared_outbox().flush()
+                elapsed = time.perf_counter() - start
+            github = sum(s["requests"] for route, s in services.stats.snapshot().items() if route.startswith("github"))
+            return {"label": label, "seconds": elapsed, "failed": len(report.failed), "github_requests": github}
+
+        sweeps = [sweep("catch-up")]
+
+        recorded = recorded_deliveries(args.payloads) if args.payloads else None
+        deliveries = []
+        for i, full_name in enumerate(webhook_repos):
+            for n in range(args.deliveries if recorded is None else len(recorded)):
+                event, payload = synthetic_delivery(full_name, i * 1000 + n) if recorded is None else recorded[n]
+                deliveries.append((event, {**payload, "repository": repository(full_name)}))
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            statuses = list(pool.map(lambda delivery: post(endpoint, *delivery), deliveries))
+        ingest_seconds = time.perf_counter() - start
+        rejected = post(endpoint, "push", deliveries[0][1] if deliveries else {}, secret="wrong-secret")
+
+        sweeps.append(sweep("buffered"))
+        with quiet():
+            close_shared_components()
+            receiver.close()
+
+    print(f"{args.repos} repositories, {len(webhook_repos)} with webhooks")
+    print(f"ingest: {len(deliveries)} deliveries in {ingest_seconds:.2f}s "
+          f"({len(deliveries) / ingest_seconds if ingest_seconds else 0:,.0f}/s); "
+          f"statuses {sorted(set(statuses))}; bad signature -> {rejected}")
+    for s in sweeps:
+        print(f"{s['label']:<10} {s['seconds']:6.2f}s  github requests={s['github_requests']:<5} failed={s['failed']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,436 @@
+"""
+In-process fake of the external services a sweep talks to, for offline benchmarks.
+
+One threaded HTTP server emulates:
+  - the GitHub REST endpoints used by `GitHubClient` (commits, issues, releases
+    listings with `page`/`per_page` pagination, Link headers, ETag/304 and
+    X-RateLimit-* headers), plus the `bench-org` organization and its
+    repository listing,
+  - `POST /github/graphql` for the aliased repository queries
+    `GraphQLBatchClient` builds, paging the same listings by cursor,
+  - an OpenAI-compatible `POST /v1/chat/completions` endpoint (packed
+    multi-repo prompts are answered per `<<<REPO: ...>>>` marker),
+  - a Slack incoming webhook at `POST /slack/webhook`.
+
+Data is generated deterministically from the repo index, so two runs with the
+same settings see exactly the same listings.
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+REPO_OWNER = "bench-org"
+_REPO_PATH = re.compile(r"^/repos/([^/]+)/([^/]+)/(commits|issues|releases)$")
+_OWNER_PATH = re.compile(r"^/(?:users/([^/]+)|orgs/([^/]+)/repos)$")
+_BATCH_MARKER = re.compile(r"<<<REPO: (\S+?)>>>")
+_GRAPHQL_REPO = re.compile(r'(\w+): repository\(owner: "([^"]+)", name: "([^"]+)"\)')
+_GRAPHQL_CONNECTION = re.compile(r'(history|issues|pullRequests|releases)\(first: (\d+)(?:, after: "(\d+)")?')
+_GRAPHQL_SINCE = re.compile(r'since: "([^"]+)"')
+
+
+@dataclass
+class FakeServiceSettings:
+    repos: int = 50
+    commits_per_repo: int = 40
+    issues_per_repo: int = 30  # Every third one is a pull request
+    releases_per_repo: int = 2
+    noisy_commits: bool = False  # Mix in bot dependency bumps, a revert pair and duplicate messages
+    max_per_page: int = 100  # GitHub's own cap
+    github_latency_ms: float = 20.0
+    llm_latency_ms: float = 300.0
+    slack_latency_ms: float = 30.0
+    slack_rate_limited_posts: int = 0  # The first N webhook posts get 429 + Retry-After
+    slack_retry_after_seconds: int = 1
+
+
+def _digest(*parts) -> str:
+    """Stable across processes, unlike `hash()`."""
+    return hashlib.sha1("/".join(map(str, parts)).encode()).hexdigest()
+
+
+def _isoformat(value: datetime) -> str:
+    return value.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _parse_since(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+@dataclass
+class RouteStats:
+    requests: int = 0
+    not_modified: int = 0
+    bytes_sent: int = 0
+
+
+@dataclass
+class FakeServiceStats:
+    routes: dict[str, RouteStats] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, route: str, status: int, size: int):
+        with self.lock:
+            stats = self.routes.setdefault(route, RouteStats())
+            stats.requests += 1
+            stats.not_modified += status == 304
+            stats.bytes_sent += size
+
+    def snapshot(self) -> dict[str, dict]:
+        with self.lock:
+            return {route: vars(stats).copy() for route, stats in sorted(self.routes.items())}
+
+    def reset(self):
+        with self.lock:
+            self.routes.clear()
+
+
+class FakeServices:
+    """Starts the fake server on a free localhost port; use as a context manager."""
+
+    def __init__(self, settings: FakeServiceSettings | None = None):
+        self.settings = settings or FakeServiceSettings()
+        self.stats = FakeServiceStats()
+        # All timestamps are relative to this instant so the data always falls
+        # inside the client's default 24h window.
+        self.now = datetime.now(timezone.utc).replace(microsecond=0)
+        self._listings: dict[tuple[str, str], list[dict]] = {}
+        self._listings_lock = threading.Lock()
+        self._slack_posts = 0
+        self.slack_payloads: list[dict] = []
+        self._server: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    # --- URLs for the sentinel config ---
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def github_api_url(self) -> str:
+        return f"{self.base_url}/github"
+
+    @property
+    def llm_base_url(self) -> str:
+        return f"{self.base_url}/v1"
+
+    @property
+    def slack_webhook_url(self) -> str:
+        return f"{self.base_url}/slack/webhook"
+
+    def repo_urls(self) -> list[str]:
+        return [f"https://github.com/{REPO_OWNER}/repo-{i:05d}" for i in range(self.settings.repos)]
+
+    # --- Lifecycle ---
+
+    def start(self) -> "FakeServices":
+        services = self
+
+        class Handler(_Handler):
+            owner = services
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._server.request_queue_size = 256
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-services", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # --- Generated GitHub data (newest first, like the real API) ---
+
+    def listing(self, repo: str, kind: str) -> list[dict]:
+        key = (repo, kind)
+        with self._listings_lock:
+            if key not in self._listings:
+                self._listings[key] = getattr(self, f"_make_{kind}")(repo)
+            return self._listings[key]
+
+    def _make_commits(self, repo: str) -> list[dict]:
+        base = f"https://github.com/{REPO_OWNER}/{repo}"
+        commits = []
+        for i in range(self.settings.commits_per_repo):
+            sha = _digest(repo, "commit", i)
+            login = f"dev{i % 7}"
+            message = f"{('feat', 'fix', 'docs', 'chore')[i % 4]}: change {i} in {repo}\n\nDetails for change {i}."
+            if self.settings.noisy_commits:
+                if i % 3 == 2:
+                    login, message = "dependabot[bot]", f"chore(deps): bump package-{i} from 1.{i}.0 to 1.{i + 1}.0"
+                elif i == 0:
+                    message = f'Revert "{("feat", "fix", "docs", "chore")[1]}: change 1 in {repo}"'
+                elif i % 10 == 4:
+                    message = f"{('feat', 'fix', 'docs', 'chore')[(i + 3) % 4]}: change {i + 3} in {repo} (#{i})"
+            commits.append({
+                "sha": sha,
+                "html_url": f"{base}/commit/{sha}",
+                "commit": {
+                    "author": {"name": login, "date": _isoformat(self.now - timedelta(minutes=5 * i + 1))},
+                    "message": message,
+                },
+                "author": {"login": login},
+            })
+        return commits
+
+    def _make_issues(self, repo: str) -> list[dict]:
+        base = f"https://github.com/{REPO_OWNER}/{repo}"
+        issues = []
+        for i in range(self.settings.issues_per_repo):
+            number = self.settings.issues_per_repo - i
+            is_pr = number % 3 == 0
+            updated = self.now - timedelta(minutes=7 * i + 1)
+            issue = {
+                "id": int(_digest(repo, "issue", number)[:7], 16),
+                "number": number,
+                "title": f"{'Pull request' if is_pr else 'Issue'} {number} of {repo}",
+                "user": {"login": f"user{number % 11}"},
+                "state": "closed" if number % 4 == 0 else "open",
+                "html_url": f"{base}/{'pull' if is_pr else 'issues'}/{number}",
+                "created_at": _isoformat(updated - timedelta(hours=1)),
+                "updated_at": _isoformat(updated),
+                "closed_at": _isoformat(updated) if number % 4 == 0 else None,
+            }
+            if is_pr:
+                issue["pull_request"] = {"url": f"{base}/pulls/{number}"}
+            issues.append(issue)
+        return issues
+
+    def _make_releases(self, repo: str) -> list[dict]:
+        base = f"https://github.com/{REPO_OWNER}/{repo}"
+        releases = []
+        for i in range(self.settings.releases_per_repo):
+            version = f"v1.{self.settings.releases_per_repo - i}.0"
+            created = self.now - timedelta(hours=2 * i + 1)
+            releases.append({
+                "id": int(_digest(repo, "release", i)[:7], 16),
+                "tag_name": version,
+                "name": f"Release {version}",
+                "author": {"login": "release-bot"},
+                "html_url": f"{base}/releases/tag/{version}",
+                "created_at": _isoformat(created),
+                "published_at": _isoformat(created + timedelta(minutes=5)),
+                "draft": False,
+            })
+        return releases
+
+    # --- GraphQL ---
+
+    def graphql_repository(self, repo: str, connections: list[tuple[str, int, int]], since: datetime | None) -> dict:
+        """One aliased repository node; `connections` holds (name, first, offset) and cursors are offsets."""
+        base = f"https://github.com/{REPO_OWNER}/{repo}"
+        commits = [c for c in self.listing(repo, "commits")
+                   if since is None or _parse_since(c["commit"]["author"]["date"]) >= since]
+        issues = self.listing(repo, "issues")
+        nodes = {
+            "history": [{"oid": c["sha"], "messageHeadline": c["commit"]["message"].split("\n")[0], "url": c["html_url"],
+                         "committedDate": c["commit"]["author"]["date"], "author": {"name": c["commit"]["author"]["name"]}}
+                        for c in commits],
+            "issues": [i for i in issues if "pull_request" not in i
+                       and (since is None or _parse_since(i["updated_at"]) >= since)],
+            "pullRequests": [i for i in issues if "pull_request" in i],
+            "releases": [{"databaseId": r["id"], "tagName": r["tag_name"], "name": r["name"], "url": r["html_url"],
+                          "createdAt": r["created_at"], "publishedAt": r["published_at"], "isDraft": r["draft"],
+                          "author": {"login": r["author"]["login"]}} for r in self.listing(repo, "releases")],
+        }
+        for name in ("issues", "pullRequests"):
+            nodes[name] = [{"databaseId": i["id"], "number": i["number"], "title": i["title"],
+                            "state": i["state"].upper(), "url": i["html_url"], "createdAt": i["created_at"],
+                            "updatedAt": i["updated_at"], "closedAt": i["closed_at"], "author": {"login": i["user"]["login"]}}
+                           for i in nodes[name]]
+
+        node = {}
+        for name, first, offset in connections:
+            items = nodes[name]
+            page = items[offset:offset + first]
+            end = offset + len(page)
+            connection = {"totalCount": len(items), "nodes": page,
+                          "pageInfo": {"hasNextPage": end < len(items), "endCursor": str(end) if page else None}}
+            if name == "history":
+                node["defaultBranchRef"] = {"target": {"history": connection}}
+            else:
+                node[name] = connection
+        return node
+
+    # --- LLM ---
+
+    @staticmethod
+    def chat_reply(user_prompt: str) -> str:
+        repos = _BATCH_MARKER.findall(user_prompt)
+        lines = user_prompt.count("\n") + 1
+        if not repos:
+            return f"## 关键摘要\n\n本期共有约 {lines} 行活动记录。\n\n## 主要变更\n\n- 基准测试生成的摘要。"
+        return "\n\n".join(f"<<<REPO: {url}>>>\n## 关键摘要\n\n- 基准测试生成的摘要。" for url in repos)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    owner: FakeServices
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real services
+    disable_nagle_algorithm = True  # Headers and body are written separately; don't stall on delayed ACKs
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, route: str, status: int, body: bytes = b"", headers: dict | None = None,
+              content_type: str = "application/json"):
+        # Counted before replying, so a client never sees a response that is not in the stats yet
+        self.owner.stats.record(route, status, len(body))
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _get_owner(self, match: re.Match, query: dict):
+        """`GET /users/{owner}` and the paginated `GET /orgs/{owner}/repos` (every tenth repo is a fork)."""
+        user, org = match.groups()
+        if (user or org) != REPO_OWNER:
+            self._send("github:other", 404, b'{"message": "Not Found"}')
+            return
+        time.sleep(self.owner.settings.github_latency_ms / 1000)
+        if user:
+            self._send("github:owner", 200, json.dumps({"login": REPO_OWNER, "type": "Organization"}).encode())
+            return
+
+        repos = [{"full_name": url.removeprefix("https://github.com/"), "html_url": url,
+                  "fork": i % 10 == 9, "archived": False} for i, url in enumerate(self.owner.repo_urls())]
+        page = max(1, int(query.get("page", 1)))
+        per_page = min(self.owner.settings.max_per_page, max(1, int(query.get("per_page", 30))))
+        headers = {}
+        if page * per_page < len(repos):
+            next_query = urlencode({**query, "page": page + 1})
+            headers["Link"] = f'<{self.owner.github_api_url}{match.group(0)}?{next_query}>; rel="next"'
+        body = json.dumps(repos[(page - 1) * per_page:page * per_page]).encode()
+        self._send("github:repos", 200, body, headers)
+
+    def do_GET(self):
+        settings = self.owner.settings
+        url = urlparse(self.path)
+        owner_match = _OWNER_PATH.match(url.path.removeprefix("/github"))
+        if url.path.startswith("/github/") and owner_match:
+            self._get_owner(owner_match, {k: v[0] for k, v in parse_qs(url.query).items()})
+            return
+        match = _REPO_PATH.match(url.path.removeprefix("/github"))
+        if not url.path.startswith("/github/") or not match:
+            self._send("github:other", 404, b'{"message": "Not Found"}')
+            return
+        time.sleep(settings.github_latency_ms / 1000)
+
+        _, repo, kind = match.groups()
+        route = f"github:{kind}"
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        items = self.owner.listing(repo, kind)
+        since = _parse_since(query.get("since"))
+        if since is not None:
+            date_of = (lambda c: c["commit"]["author"]["date"]) if kind == "commits" else (lambda i: i["updated_at"])
+            items = [item for item in items if _parse_since(date_of(item)) >= since]
+
+        page = max(1, int(query.get("page", 1)))
+        per_page = min(settings.max_per_page, max(1, int(query.get("per_page", 30))))
+        last_page = max(1, -(-len(items) // per_page))
+        headers = {
+            "X-RateLimit-Limit": "5000",
+            "X-RateLimit-Remaining": "4999",
+            "X-RateLimit-Reset": str(int(time.time()) + 3600),
+        }
+
+        # The listing never changes while the server runs, so its ETag only depends on the request.
+        etag = f'W/"{_digest(repo, kind, url.query)[:16]}"'
+        headers["ETag"] = etag
+        if self.headers.get("If-None-Match") == etag:
+            self._send(route, 304, headers=headers)
+            return
+
+        def page_url(number):
+            return f"{self.owner.github_api_url}{match.group(0)}?{urlencode({**query, 'page': number})}"
+
+        links = []
+        if page < last_page:
+            links.append(f'<{page_url(page + 1)}>; rel="next"')
+            links.append(f'<{page_url(last_page)}>; rel="last"')
+        if links:
+            headers["Link"] = ", ".join(links)
+        body = json.dumps(items[(page - 1) * per_page:page * per_page]).encode()
+        self._send(route, 200, body, headers)
+
+    def _post_graphql(self):
+        query = self._read_json().get("query", "")
+        time.sleep(self.owner.settings.github_latency_ms / 1000)
+        matches = list(_GRAPHQL_REPO.finditer(query))
+        data = {}
+        for i, match in enumerate(matches):
+            alias, owner, repo = match.groups()
+            fragment = query[match.end():matches[i + 1].start() if i + 1 < len(matches) else len(query)]
+            if owner != REPO_OWNER:
+                data[alias] = None
+                continue
+            since = _GRAPHQL_SINCE.search(fragment)
+            connections = [(name, int(first), int(after or 0))
+                           for name, first, after in _GRAPHQL_CONNECTION.findall(fragment)]
+            data[alias] = self.owner.graphql_repository(repo, connections, _parse_since(since and since.group(1)))
+        reset_at = _isoformat(datetime.now(timezone.utc) + timedelta(hours=1))
+        data["rateLimit"] = {"cost": 1, "remaining": 4999, "resetAt": reset_at}
+        self._send("github:graphql", 200, json.dumps({"data": data}).encode())
+
+    def do_POST(self):
+        settings = self.owner.settings
+        path = urlparse(self.path).path
+        if path == "/github/graphql":
+            self._post_graphql()
+        elif path == "/slack/webhook":
+            payload = self._read_json()
+            time.sleep(settings.slack_latency_ms / 1000)
+            with self.owner._listings_lock:
+                self.owner._slack_posts += 1
+                rate_limited = self.owner._slack_posts <= settings.slack_rate_limited_posts
+                if not rate_limited:
+                    self.owner.slack_payloads.append(payload)
+            if rate_limited:
+                self._send("slack:webhook", 429, b"rate_limited", content_type="text/plain",
+                           headers={"Retry-After": str(settings.slack_retry_after_seconds)})
+            else:
+                self._send("slack:webhook", 200, b"ok", content_type="text/plain")
+        elif path == "/v1/chat/completions":
+            request = self._read_json()
+            time.sleep(settings.llm_latency_ms / 1000)
+            prompt = "\n".join(m.get("content", "") for m in request.get("messages", []) if m.get("role") == "user")
+            reply = FakeServices.chat_reply(prompt)
+            body = json.dumps({
+                "id": "chatcmpl-bench",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "bench-model"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": reply}}],
+                "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(reply) // 4,
+                          "total_tokens": (len(prompt) + len(reply)) // 4},
+            }).encode()
+            self._send("llm:chat", 200, body)
+        else:
+            self._send("other", 404, b'{"message": "Not Found"}')
@@ -1,43 +1,282 @@
+import sys
+import time
+from pathlib import Path
 import typer
 from typing_extensions import Annotated
-from github_sentinel.core.processor import run_once
-from github_sentinel.core.scheduler import start_scheduler
-from github_sentinel.components.db_manager import add_subscription, list_subscriptions, remove_subscription
+from github_sentinel.core.schedules import format_interval, parse_schedule
 
+# Commands import what they use when they run: `--help` or `list-repos` should not
+# pay for the HTTP, LLM and scheduler stacks (or need a config.yaml).
 app = typer.Typer()
 
 @app.command()
-def run(once: Annotated[bool, typer.Option("--once", help="Run the check a single time and exit.")] = False):
+def run(
+    once: Annotated[bool, typer.Option("--once", help="Run the check a single time and exit.")] = False,
+    workers: Annotated[int, typer.Option("--workers", help="Max repositories processed concurrently (overrides config).")] = 0,
+    no_summary_cache: Annotated[bool, typer.Option("--no-summary-cache", help="Regenerate AI summaries instead of reusing cached ones.")] = False,
+):
     """
     Starts GitHub Sentinel.
     By default, it runs in scheduler mode to perform periodic checks.
     """
+    from github_sentinel.components.registry import close_shared_components, shared_summarizer
+    if no_summary_cache:
+        summarizer = shared_summarizer()
+        if hasattr(summarizer, "bypass_cache"):
+            summarizer.bypass_cache = True
+
     if once:
+        from github_sentinel.core.processor import run_once
         print("Running a single check for all subscribed repositories...")
-        run_once()
+        try:
+            run_once(max_workers=workers or None)
+        finally:
+            close_shared_components()
         print("Single run finished.")
     else:
+        from github_sentinel.core.scheduler import start_scheduler
         print("Starting the scheduler for periodic checks...")
         start_scheduler()
 
 @app.command()
-def add_repo(repo_url: str, schedule: str = "daily"):
+def serve_webhooks(
+    host: Annotated[str | None, typer.Option(help="Interface to listen on (default: webhooks.host).")] = None,
+    port: Annotated[int, typer.Option(help="Port to listen on (default: webhooks.port).")] = 0,
+):
+    """
+    Receives GitHub push/issues/pull_request/release webhooks and runs the
+    scheduler; repositories with webhooks are reported from the received
+    events, the others (or after receiver downtime) are polled.
+    """
+    from github_sentinel.core.webhook_mode import serve_webhooks as serve
+    try:
+        serve(host=host, port=port or None)
+    except ValueError as e:
+        print(f"Error: {e}")
+        raise typer.Exit(code=1)
+
+@app.command()
+def worker(
+    processes: Annotated[int, typer.Option("--processes", "-n", help="Number of worker processes (overrides config).")] = 0,
+):
+    """
+    Runs queue workers that process the check jobs enqueued by the scheduler
+    (requires `queue.enabled: true`).
+    """
+    from github_sentinel.core.worker import run_workers
+    run_workers(processes=processes or None)
+
+@app.command()
+def queue_status():
+    """Shows how many queued jobs and outbound notifications are in each state."""
+    from github_sentinel.components.job_queue import JobQueue
+    from github_sentinel.components.notifiers.outbox import NotificationOutbox
+    stats = JobQueue().stats()
+    if not stats:
+        print("The job queue is empty.")
+    else:
+        for status in ("pending", "leased", "done", "dead"):
+            print(f"{status}: {stats.get(status, 0)}")
+
+    for channel, counts in NotificationOutbox.stats().items():
+        summary = ", ".join(f"{status}: {counts.get(status, 0)}" for status in ("pending", "sending", "sent", "dead"))
+        print(f"Notifications ({channel}): {summary}")
+
+@app.command()
+def stats(top: Annotated[int, typer.Option("--top", help="Number of slowest repositories to show.")] = 10):
+    """Summarizes the latest check of every repository: slowest stages and repositories, plus API, cache, LLM and notification counters."""
+    from github_sentinel.components.metrics import load_sweep_metrics, metrics_json_path, stage_summary
+    data = load_sweep_metrics()
+    if data is None:
+        print(f"No metrics found at {metrics_json_path()}. Run a sweep first (e.g. 'run --once').")
+        return
+
+    repos = data["repos"]
+    failed = [r for r in repos if r["error"]]
+    print(f"Last sweep finished at {data['finished_at']} in {data['wall_seconds']:.2f}s. "
+          f"{len(repos)} repositories recorded, {len(failed)} failed at their latest check.")
+
+    print("\nStage timings (p50 / p95 / max):")
+    for stage, s in stage_summary(repos).items():
+        print(f"- {stage}: {s['p50']:.2f}s / {s['p95']:.2f}s / {s['max']:.2f}s")
+
+    print("\nSlowest repositories:")
+    for r in sorted(repos, key=lambda r: r["total"], reverse=True)[:top]:
+        stages = ", ".join(f"{name}={secs:.2f}s" for name, secs in r["timings"].items())
+        status = "ok" if not r["error"] else f"FAILED ({r['error']})"
+        checked = f" (checked {r['checked_at']})" if r.get("checked_at") else ""
+        print(f"- {r['repo_url']}: {r['total']:.2f}s [{stages}] {status}{checked}")
+
+    if data["counters"]:
+        print("\nCounters (since the process started):")
+        for counter in data["counters"]:
+            labels = ", ".join(f"{k}={v}" for k, v in counter["labels"].items())
+            print(f"- {counter['name']}{f' ({labels})' if labels else ''}: {counter['value']:g}")
+
+@app.command()
+def report(
+    repo_url: Annotated[str | None, typer.Argument(help="Repository to report on (all subscriptions if omitted).")] = None,
+    days: Annotated[float, typer.Option("--days", help="Length of the report window, ending now.")] = 7,
+    send: Annotated[bool, typer.Option("--send", help="Send the reports to the notification channels instead of printing them.")] = False,
+):
+    """Builds reports from the locally stored activity, without calling the GitHub API."""
+    from datetime import datetime, timedelta, timezone
+    from github_sentinel.components.activity_store import load_activity
+    from github_sentinel.components.db_manager import canonical_repo_url, list_subscriptions
+    from github_sentinel.components.notifiers import dispatch_notification
+    from github_sentinel.components.registry import close_shared_components, shared_summarizer
+
+    try:
+        repo_urls = [canonical_repo_url(repo_url)] if repo_url else [sub.repo_url for sub in list_subscriptions()]
+    except ValueError as e:
+        print(f"Error: {e}")
+        raise typer.Exit(code=1)
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    summarizer = shared_summarizer()
+    try:
+        for url in repo_urls:
+            updates = load_activity(url, since)
+            if not any(updates.values()):
+                print(f"No stored activity for {url} in the last {days:g} day(s).")
+                continue
+            text = summarizer.summarize(repo_url=url, updates=updates)
+            if send:
+                dispatch_notification(text, repo_url=url)
+            else:
+                print(text)
+    finally:
+        close_shared_components()
+
+@app.command()
+def add_repo(repo_url: str, schedule: Annotated[str, typer.Option(
+        help="'hourly', 'daily', 'weekly', an interval like '6h', or 'cron: 0 9 * * *'.")] = "daily"):
     """Adds a new repository to the subscription list."""
+    try:
+        parse_schedule(schedule)
+    except ValueError as e:
+        print(f"Error: {e}")
+        raise typer.Exit(code=1)
+    from github_sentinel.components.db_manager import add_subscription, canonical_repo_url
+    try:
+        repo_url = canonical_repo_url(repo_url)
+    except ValueError as e:
+        print(f"Error: {e}")
+        raise typer.Exit(code=1)
     add_subscription(repo_url, schedule)
     print(f"Repository {repo_url} added with a '{schedule}' schedule.")
 
 @app.command()
 def remove_repo(repo_url: str):
     """Removes a repository from the subscription list."""
+    from github_sentinel.components.db_manager import canonical_repo_url, remove_subscription
+    try:
+        repo_url = canonical_repo_url(repo_url)
+    except ValueError as e:
+        print(f"Error: {e}")
+        raise typer.Exit(code=1)
     if remove_subscription(repo_url):
         print(f"Repository {repo_url} has been removed.")
     else:
         print(f"Repository {repo_url} not found in subscriptions.")
 
 
+def _print_throughput(action: str, count: int, elapsed: float, file=None):
+    rate = f" ({count / elapsed:,.0f} repos/s)" if elapsed > 0 and count else ""
+    print(f"{action} {count:,} repositories in {elapsed:.2f}s{rate}.", file=file)
+
+
+def _subscribe_all(entries: list[tuple[str, str]], dry_run: bool):
+    """Inserts `entries` in one transaction and reports what was added and how fast."""
+    if dry_run:
+        print(f"Dry run: {len(entries):,} repositories would be subscribed (existing ones are skipped).")
+        return
+    from github_sentinel.components.db_manager import add_subscriptions
+    start = time.perf_counter()
+    added, skipped = add_subscriptions(entries)
+    _print_throughput("Subscribed", len(added), time.perf_counter() - start)
+    if skipped:
+        print(f"{len(skipped):,} were already subscribed and left unchanged.")
+
+@app.command("import")
+def import_repos(
+    path: Annotated[str, typer.Argument(help="File of repositories to subscribe, or '-' to read standard input.")],
+    fmt: Annotated[str | None, typer.Option("--format", help="text, csv or yaml (default: from the file extension, else text).")] = None,
+    schedule: Annotated[str, typer.Option(help="Schedule for entries that do not name one.")] = "daily",
+    dry_run: Annotated[bool, typer.Option("--dry-run", help="Validate the input without subscribing anything.")] = False,
+):
+    """Subscribes many repositories at once from a text, CSV or YAML file."""
+    from github_sentinel.components.subscription_io import detect_format, parse_subscriptions
+    start = time.perf_counter()
+    try:
+        fmt = detect_format(None if path == "-" else path, fmt)
+        text = sys.stdin.read() if path == "-" else Path(path).read_text(encoding="utf-8")
+        entries = parse_subscriptions(text, fmt, default_schedule=schedule)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        raise typer.Exit(code=1)
+    _print_throughput("Parsed", len(entries), time.perf_counter() - start)
+    _subscribe_all(entries, dry_run)
+
+@app.command()
+def export(
+    output: Annotated[str | None, typer.Option("--output", "-o", help="File to write (default: standard output).")] = None,
+    fmt: Annotated[str | None, typer.Option("--format", help="text, csv or yaml (default: from the file extension, else yaml).")] = None,
+):
+    """Writes all subscriptions in a format `import` reads back."""
+    from github_sentinel.components.db_manager import list_subscriptions
+    from github_sentinel.components.subscription_io import detect_format, format_subscriptions
+    try:
+        fmt = detect_format(output, fmt) if output else detect_format(None, fmt or "yaml")
+    except ValueError as e:
+        print(f"Error: {e}")
+        raise typer.Exit(code=1)
+    start = time.perf_counter()
+    subscriptions = list_subscriptions()
+    text = format_subscriptions(subscriptions, fmt)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
+    # Keep standard output clean for piping
+    _print_throughput("Exported", len(subscriptions), time.perf_counter() - start, file=None if output else sys.stderr)
+
+@app.command()
+def subscribe_org(
+    org: Annotated[str, typer.Argument(help="GitHub organization (or user) whose repositories to subscribe.")],
+    schedule: Annotated[str, typer.Option(help="Schedule for the new subscriptions.")] = "daily",
+    include_forks: Annotated[bool, typer.Option("--include-forks", help="Also subscribe forked repositories.")] = False,
+    include_archived: Annotated[bool, typer.Option("--include-archived", help="Also subscribe archived repositories.")] = False,
+    dry_run: Annotated[bool, typer.Option("--dry-run", help="List what would be subscribed without changing anything.")] = False,
+):
+    """Subscribes every repository of an organization, enumerated through the paginated GitHub API."""
+    from github_sentinel.components.db_manager import canonical_repo_urls
+    from github_sentinel.components.registry import close_shared_components, shared_github_client
+    try:
+        parse_schedule(schedule)
+    except ValueError as e:
+        print(f"Error: {e}")
+        raise typer.Exit(code=1)
+    start = time.perf_counter()
+    try:
+        repo_urls = canonical_repo_urls(shared_github_client().list_owner_repos(
+            org, include_forks=include_forks, include_archived=include_archived))
+    except Exception as e:
+        print(f"Error: {e}")
+        raise typer.Exit(code=1)
+    finally:
+        close_shared_components()
+    _print_throughput(f"Listed {org}:", len(repo_urls), time.perf_counter() - start)
+    if dry_run:
+        for url in repo_urls:
+            print(f"- {url}")
+    _subscribe_all([(url, schedule) for url in repo_urls], dry_run)
+
+
 @app.command()
 def list_repos():
     """Lists all subscribed repositories."""
+    from github_sentinel.components.db_manager import list_subscriptions
     subscriptions = list_subscriptions()
     if not subscriptions:
         print("No repositories subscribed yet. Use 'add-repo' to add one.")
@@ -46,7 +285,107 @@ def list_repos():
     print("Subscribed Repositories:")
     for sub in subscriptions:
         last_checked = sub.last_checked_at.strftime('%Y-%m-%d %H:%M:%S UTC') if sub.last_checked_at else "Never"
-        print(f"- {sub.repo_url} (Schedule: {sub.schedule}, Last Checked: {last_checked})")
+        next_due = sub.next_due_at.strftime('%Y-%m-%d %H:%M:%S UTC') if sub.next_due_at else "Pending"
+        interval = format_interval(sub.poll_interval_seconds) if sub.poll_interval_seconds else sub.schedule
+        print(f"- {sub.repo_url} (Schedule: {sub.schedule}, Interval: {interval} [{sub.poll_reason or 'schedule'}], "
+              f"Last Checked: {last_checked}, Next Due: {next_due})")
+
+
+subscriber_app = typer.Typer(help="Manage subscribers: teams with their own channels, filters and summarizer.")
+app.add_typer(subscriber_app, name="subscriber")
+
+
+@subscriber_app.command("add")
+def subscriber_add(
+    name: str,
+    summarizer: Annotated[str | None, typer.Option(help="'simple' or 'ai' (default: the configured summarizer).")] = None,
+):
+    """Creates a subscriber."""
+    from github_sentinel.components.subscribers import add_subscriber
+    try:
+        created = add_subscriber(name, summarizer)
+    except ValueError as e:
+        print(f"Error: {e}")
+        raise typer.Exit(code=1)
+    print(f"Subscriber '{name}' created." if created else f"Subscriber '{name}' already exists.")
+
+
+@subscriber_app.command("remove")
+def subscriber_remove(name: str):
+    """Removes a subscriber with its channels; the repositories stay subscribed."""
+    from github_sentinel.components.subscribers import remove_subscriber
+    try:
+        remove_subscriber(name)
+    except ValueError as e:
+        print(f"Error: {e}")
+        raise typer.Exit(code=1)
+    print(f"Subscriber '{name}' removed.")
+
+
+@subscriber_app.command("add-channel")
+def subscriber_add_channel(
+    name: str,
+    channel_type: Annotated[str, typer.Argument(help="'slack' or 'discord'.")],
+    webhook_url: str,
+):
+    """Adds a Slack or Discord webhook the subscriber's reports are posted to."""
+    from github_sentinel.components.subscribers import add_channel
+    try:
+        key = add_channel(name, channel_type, webhook_url)
+    except ValueError as e:
+        print(f"Error: {e}")
+        raise typer.Exit(code=1)
+    print(f"Channel {key} added to '{name}'. Running services pick it up when restarted.")
+
+
+@subscriber_app.command("follow")
+def subscriber_follow(
+    name: str,
+    repo_urls: Annotated[list[str], typer.Argument(help="Repositories (owner/repo or URL).")],
+    schedule: Annotated[str, typer.Option(help="Schedule for repositories nobody subscribed yet.")] = "daily",
+    only: Annotated[list[str] | None, typer.Option(
+        "--only", help="Report only these activity types (commits, issues, pull_requests, releases).")] = None,
+    exclude_author: Annotated[list[str] | None, typer.Option(
+        "--exclude-author", help="Leave out activity by this author (e.g. a bot).")] = None,
+):
+    """Makes a subscriber follow repositories; each repository is still fetched and summarized once per check."""
+    from github_sentinel.components.subscribers import follow
+    try:
+        parse_schedule(schedule)
+        added = follow(name, repo_urls, schedule, filters={"types": only, "exclude_authors": exclude_author})
+    except ValueError as e:
+        print(f"Error: {e}")
+        raise typer.Exit(code=1)
+    print(f"'{name}' now follows {added} more repositories ({len(repo_urls) - added} updated or already followed).")
+
+
+@subscriber_app.command("unfollow")
+def subscriber_unfollow(name: str, repo_urls: list[str]):
+    """Stops a subscriber following repositories."""
+    from github_sentinel.components.subscribers import unfollow
+    try:
+        removed = unfollow(name, repo_urls)
+    except ValueError as e:
+        print(f"Error: {e}")
+        raise typer.Exit(code=1)
+    print(f"'{name}' unfollowed {removed} repositories.")
+
+
+@subscriber_app.command("list")
+def subscriber_list():
+    """Lists subscribers with their channels and followed repositories."""
+    from github_sentinel.components.subscribers import list_subscribers
+    subscribers = list_subscribers()
+    if not subscribers:
+        print("No subscribers yet. Use 'subscriber add' to create one.")
+        return
+    for subscriber in subscribers:
+        print(f"{subscriber['name']} (Summarizer: {subscriber['summarizer'] or 'default'}, "
+              f"Channels: {', '.join(subscriber['channels']) or 'none'})")
+        for url, filters in subscriber['repos'].items():
+            described = "; ".join(f"{key}={','.join(values)}" for key, values in filters.items())
+            print(f"  - {url}" + (f" [{described}]" if described else ""))
+
 
 if __name__ == "__main__":
     app()
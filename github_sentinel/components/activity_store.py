@@ -0,0 +1,116 @@
+"""
+Local store of fetched repository activity.
+
+Every fetch writes its commits, issues, pull requests and releases to the
+`activity_events` table with one bulk upsert per repository (deduplicated by
+GitHub id), so reports for any time window can later be rebuilt from local
+data without calling the GitHub API.
+"""
+
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.dialects.sqlite import insert
+from github_sentinel.components.config_loader import config
+from github_sentinel.components.db_manager import get_db_session
+from github_sentinel.models.activity_event import ActivityEvent
+from github_sentinel.models.records import CommitRecord, IssueRecord, ReleaseRecord
+
+ACTIVITY_TYPES = ("commits", "issues", "pull_requests", "releases")
+# Columns refreshed when an item is fetched again (issues change state, titles get edited, ...)
+_UPDATABLE = ("title", "author", "state", "url", "draft", "occurred_at", "closed_at")
+
+
+def activity_store_config() -> dict:
+    return config.get('activity_store', {}) or {}
+
+
+def store_enabled() -> bool:
+    return bool(activity_store_config().get('enabled', True))
+
+
+def _to_row(repo_url: str, kind: str, item) -> dict:
+    row = {"repo_url": repo_url, "type": kind, "number": None, "state": None, "tag_name": None,
+           "draft": False, "closed_at": None}
+    if kind == "commits":
+        row.update(github_id=item["sha"], title=item["message"], author=item["author"], url=item["url"],
+                   created_at=item.get("committed_at"), occurred_at=item.get("committed_at"))
+    elif kind == "releases":
+        row.update(github_id=str(item["id"]), title=item["name"], author=item["author"], url=item["url"],
+                   tag_name=item["tag_name"], draft=bool(item.get("draft")),
+                   created_at=item.get("created_at"), occurred_at=item.get("published_at"))
+    else:
+        row.update(github_id=str(item["id"]), number=item["number"], title=item["title"], author=item["user"],
+                   state=item["state"], url=item["url"], created_at=item.get("created_at"),
+                   occurred_at=item.get("updated_at"), closed_at=item.get("closed_at"))
+    return row
+
+
+def record_activity(repo_url: str, updates: dict) -> int:
+    """
+    Upserts the fetched items of one repository in a single statement.
+    Returns the number of items written.
+    """
+    rows = [_to_row(repo_url, kind, item) for kind in ACTIVITY_TYPES for item in updates.get(kind) or []]
+    if not rows:
+        return 0
+    now = datetime.now(timezone.utc)
+    for row in rows:
+        row["first_seen_at"] = now
+    statement = insert(ActivityEvent)
+    statement = statement.on_conflict_do_update(
+        index_elements=["repo_url", "type", "github_id"],
+        set_={column: statement.excluded[column] for column in _UPDATABLE},
+    )
+    session = get_db_session()
+    try:
+        session.execute(statement, rows)
+        session.commit()
+    finally:
+        session.close()
+    return len(rows)
+
+
+def _to_record(event: ActivityEvent):
+    if event.type == "commits":
+        return CommitRecord(sha=event.github_id, author=event.author or "", message=event.title,
+                            url=event.url or "", committed_at=event.occurred_at)
+    if event.type == "releases":
+        return ReleaseRecord(id=int(event.github_id), tag_name=event.tag_name or "", name=event.title,
+                             author=event.author or "", url=event.url or "", created_at=event.created_at,
+                             published_at=event.occurred_at, draft=event.draft)
+    return IssueRecord(id=int(event.github_id), number=event.number, title=event.title, user=event.author or "",
+                       state=event.state or "", url=event.url or "", created_at=event.created_at,
+                       updated_at=event.occurred_at, closed_at=event.closed_at,
+                       is_pull_request=event.type == "pull_requests")
+
+
+def load_activity(repo_url: str, since: datetime, until: datetime | None = None) -> dict:
+    """
+    Rebuilds an `updates` dict (the shape `fetch_updates` returns) from the
+    stored activity of `repo_url` in [since, until), newest first.
+    """
+    updates = {kind: [] for kind in ACTIVITY_TYPES}
+    session = get_db_session()
+    try:
+        for kind in ACTIVITY_TYPES:
+            # Served by the (repo_url, type, occurred_at) index
+            query = session.query(ActivityEvent).filter(
+                ActivityEvent.repo_url == repo_url, ActivityEvent.type == kind, ActivityEvent.occurred_at >= since)
+            if until is not None:
+                query = query.filter(ActivityEvent.occurred_at < until)
+            updates[kind] = [_to_record(event) for event in query.order_by(ActivityEvent.occurred_at.desc())]
+    finally:
+        session.close()
+    return updates
+
+
+def prune_activity(now: datetime | None = None) -> int:
+    """Deletes activity older than `activity_store.retention_days` (kept forever when unset)."""
+    retention_days = activity_store_config().get('retention_days')
+    if not retention_days:
+        return 0
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=float(retention_days))
+    session = get_db_session()
+    deleted = session.query(ActivityEvent).filter(ActivityEvent.occurred_at < cutoff).delete(synchronize_session=False)
+    session.commit()
+    session.close()
+    return deleted
@@ -0,0 +1,248 @@
+"""
+Compaction of fetched activity before it reaches the LLM.
+
+Raw activity is noisy: dependency bumps by bots, commits reverted within the
+same window, the same message committed several times. `Compactor` drops or
+collapses that noise, groups commits by conventional-commit type and scope
+(and the remaining commits by author), and keeps the most significant items
+that fit `llm.compaction.token_budget`, listing the rest only as counts.
+The result replaces the plain update list in the AI summarizer's prompt.
+"""
+
+import math
+import re
+from dataclasses import dataclass, field
+from github_sentinel.components.summarizer import estimate_tokens
+
+DEFAULT_TOKEN_BUDGET = 2000
+DEFAULT_MAX_MESSAGES_PER_GROUP = 5
+DEFAULT_BOT_AUTHORS = (
+    "dependabot", "renovate", "github-actions", "pre-commit-ci", "snyk-bot", "greenkeeper", "imgbot",
+    "allcontributors", "mergify",
+)
+
+CONVENTIONAL_COMMIT = re.compile(r"^(?P<type>[a-zA-Z]+)(?:\((?P<scope>[^)]*)\))?(?P<breaking>!)?:\s*(?P<subject>.+)$")
+REVERT_COMMIT = re.compile(r'^Revert "(?P<message>.+)"$')
+ISSUE_REFERENCE = re.compile(r"\s*\(#\d+\)|\s*\[(?:skip ci|ci skip)\]", re.IGNORECASE)
+
+# Significance of a commit group by conventional-commit type; other commits get OTHER_COMMIT_WEIGHT
+COMMIT_TYPE_WEIGHTS = {"feat": 8, "fix": 7, "perf": 6, "refactor": 4, "revert": 4, "build": 2, "docs": 2,
+                       "ci": 1, "test": 1, "chore": 1, "style": 1}
+OTHER_COMMIT_WEIGHT = 3
+BREAKING_WEIGHT = 10
+RELEASE_WEIGHT = 100
+PULL_REQUEST_WEIGHTS = {"closed": 5, "open": 4}
+ISSUE_WEIGHTS = {"open": 3, "closed": 2}
+OMITTED_RESERVE_TOKENS = 80  # Room kept for the closing "omitted" section
+
+SECTIONS = (
+    ("releases", "## 🚀 新版本发布"),
+    ("commits", "## ⚙️ 提交（按类型/范围或作者分组）"),
+    ("pull_requests", "## 📥 拉取请求 (Pull Requests) 动态"),
+    ("issues", "## 📝 议题 (Issues) 动态"),
+)
+NOUNS = {"releases": "版本发布", "commits": "提交", "pull_requests": "拉取请求", "issues": "议题"}
+
+
+def normalize_message(message: str) -> str:
+    """Commit messages that differ only in PR references, CI markers, case or spacing count as duplicates."""
+    return " ".join(ISSUE_REFERENCE.sub("", message).lower().split()).rstrip(".")
+
+
+@dataclass
+class CompactionResult:
+    text: str
+    tokens: int
+    dropped: dict[str, int] = field(default_factory=dict)  # reason -> items
+
+    def describe(self) -> str:
+        return ", ".join(f"{count} {reason}" for reason, count in self.dropped.items() if count) or "nothing"
+
+
+@dataclass
+class _Entry:
+    section: str
+    line: str
+    score: float
+    order: int
+    items: int = 1
+    tokens: int = 0
+
+
+@dataclass
+class Compactor:
+    """
+    Turns an `updates` dict into a compact prompt text. Disabled (the
+    default), it is not used at all and the summarizer keeps sending the
+    plain update list.
+    """
+    enabled: bool = False
+    token_budget: int = DEFAULT_TOKEN_BUDGET
+    drop_bots: bool = True
+    bot_authors: tuple[str, ...] = DEFAULT_BOT_AUTHORS
+    max_messages_per_group: int = DEFAULT_MAX_MESSAGES_PER_GROUP
+    log: bool = False  # Print the tokens saved for every repo (they are always counted in the metrics)
+
+    @classmethod
+    def from_config(cls, settings: dict | None) -> "Compactor":
+        settings = settings or {}
+        return cls(
+            enabled=bool(settings.get('enabled', False)),
+            token_budget=max(200, int(settings.get('token_budget', DEFAULT_TOKEN_BUDGET))),
+            drop_bots=bool(settings.get('drop_bots', True)),
+            bot_authors=tuple(author.lower() for author in settings.get('bot_authors', DEFAULT_BOT_AUTHORS)),
+            max_messages_per_group=max(1, int(settings.get('max_messages_per_group', DEFAULT_MAX_MESSAGES_PER_GROUP))),
+            log=bool(settings.get('log', False)),
+        )
+
+    def is_bot(self, author: str | None) -> bool:
+        name = (author or "").lower()
+        return name.endswith("[bot]") or name.removesuffix("[bot]") in self.bot_authors
+
+    # --- Noise removal ---
+
+    def _drop_bots(self, items, dropped: dict, author_key: str) -> list:
+        if not self.drop_bots:
+            return list(items)
+        kept = [item for item in items if not self.is_bot(item.get(author_key))]
+        dropped["bot"] = dropped.get("bot", 0) + len(items) - len(kept)
+        return kept
+
+    @staticmethod
+    def _drop_reverted(commits: list, dropped: dict) -> list:
+        """Removes each commit reverted in the same window together with its revert."""
+        by_message = {}
+        for commit in commits:
+            by_message.setdefault(commit['message'], []).append(commit)
+        cancelled = set()
+        for commit in commits:
+            match = REVERT_COMMIT.match(commit['message'])
+            originals = by_message.get(match.group("message"), []) if match else []
+            originals = [original for original in originals if id(original) not in cancelled]
+            if originals and id(commit) not in cancelled:
+                cancelled.update((id(commit), id(originals[0])))
+        dropped["reverted"] = len(cancelled)
+        return [commit for commit in commits if id(commit) not in cancelled]
+
+    @staticmethod
+    def _drop_duplicates(commits: list, dropped: dict) -> list:
+        seen, kept = set(), []
+        for commit in commits:
+            key = normalize_message(commit['message'])
+            if key not in seen:
+                seen.add(key)
+                kept.append(commit)
+        dropped["duplicate"] = len(commits) - len(kept)
+        return kept
+
+    # --- Entries ---
+
+    def _commit_entries(self, commits: list) -> list[_Entry]:
+        """One entry per conventional-commit (type, scope), or per author for other commits."""
+        groups = {}
+        for commit in commits:
+            match = CONVENTIONAL_COMMIT.match(commit['message'])
+            if match:
+                kind = match.group("type").lower()
+                scope = match.group("scope")
+                key = (kind + (f"({scope})" if scope else ""), None)
+                subject, breaking = match.group("subject"), bool(match.group("breaking"))
+            else:
+                kind, key = None, (None, commit['author'])
+                subject, breaking = commit['message'], False
+            group = groups.setdefault(key, {"kind": kind, "subjects": [], "authors": [], "breaking": False})
+            group["subjects"].append(subject)
+            if commit['author'] not in group["authors"]:
+                group["authors"].append(commit['author'])
+            group["breaking"] = group["breaking"] or breaking or "BREAKING CHANGE" in commit['message']
+
+        entries = []
+        for order, ((label, author), group) in enumerate(groups.items()):
+            count = len(group["subjects"])
+            shown = group["subjects"][:self.max_messages_per_group]
+            subjects = "; ".join(shown) + (f"; 等另外 {count - len(shown)} 条" if count > len(shown) else "")
+            title = f"**{label}**" if label else f"`{author}` 的提交"
+            authors = f" (作者: {', '.join(f'`{a}`' for a in group['authors'][:5])})" if label else ""
+            breaking = " ⚠️ 含破坏性变更" if group["breaking"] else ""
+            weight = COMMIT_TYPE_WEIGHTS.get(group["kind"], OTHER_COMMIT_WEIGHT) if label else OTHER_COMMIT_WEIGHT
+            score = weight + (BREAKING_WEIGHT if group["breaking"] else 0) + math.log2(count)
+            entries.append(_Entry("commits", f"- {title} ×{count}{breaking}: {subjects}{authors}", score, order, count))
+        return entries
+
+    @staticmethod
+    def _item_entries(section: str, items, weights: dict) -> list[_Entry]:
+        entries = []
+        for order, item in enumerate(items):
+            state = "open" if item['state'] == 'open' else "closed"
+            if section == "pull_requests":
+                status = "📝 开启中" if state == "open" else "✅ 已合并/关闭"
+            else:
+                status = "📝 开启中" if state == "open" else "✅ 已关闭"
+            line = f"- `#{item['number']}` {item['title']} (由 `{item['user']}`) - **状态: {status}**"
+            entries.append(_Entry(section, line, weights[state], order))
+        return entries
+
+    # --- Compaction ---
+
+    def compact(self, updates: dict) -> CompactionResult:
+        dropped = {}
+        commits = self._drop_bots(updates.get('commits') or [], dropped, "author")
+        commits = self._drop_duplicates(self._drop_reverted(commits, dropped), dropped)
+        pull_requests = self._drop_bots(updates.get('pull_requests') or [], dropped, "user")
+        issues = self._drop_bots(updates.get('issues') or [], dropped, "user")
+
+        entries = [_Entry("releases", f"- **{r['name']} ({r['tag_name']})** 由 `{r['author']}` 发布。", RELEASE_WEIGHT, order)
+                   for order, r in enumerate(updates.get('releases') or [])]
+        entries += self._commit_entries(commits)
+        entries += self._item_entries("pull_requests", pull_requests, PULL_REQUEST_WEIGHTS)
+        entries += self._item_entries("issues", issues, ISSUE_WEIGHTS)
+
+        # Most significant first (newest first among equals) until the budget is spent
+        headings = dict(SECTIONS)
+        budget = self.token_budget - OMITTED_RESERVE_TOKENS
+        used, chosen, opened = 0, [], set()
+        for entry in sorted(entries, key=lambda e: (-e.score, e.order)):
+            entry.tokens = estimate_tokens(entry.line)
+            cost = entry.tokens + (0 if entry.section in opened else estimate_tokens(headings[entry.section]))
+            if used + cost > budget:
+                continue
+            used += cost
+            opened.add(entry.section)
+            chosen.append(entry)
+
+        lines = []
+        for section, heading in SECTIONS:
+            section_entries = sorted((e for e in chosen if e.section == section), key=lambda e: e.order)
+            if section_entries:
+                lines.append(heading)
+                lines.extend(entry.line for entry in section_entries)
+                lines.append("")
+
+        chosen_ids = {id(entry) for entry in chosen}
+        omitted = {}
+        for entry in entries:
+            if id(entry) not in chosen_ids:
+                omitted[entry.section] = omitted.get(entry.section, 0) + entry.items
+        dropped["over_budget"] = sum(omitted.values())
+        # Items a streaming fetch counted but did not keep
+        for section, _ in SECTIONS:
+            hidden = getattr(updates.get(section), 'remaining', 0)
+            if hidden:
+                omitted[section] = omitted.get(section, 0) + hidden
+
+        notes = []
+        if dropped.get("bot"):
+            notes.append(f"- 机器人账号的更新 {dropped['bot']} 条")
+        if dropped.get("reverted"):
+            notes.append(f"- 在本时段内被回滚的提交及其回滚 {dropped['reverted']} 条")
+        if dropped.get("duplicate"):
+            notes.append(f"- 重复的提交 {dropped['duplicate']} 条")
+        if omitted:
+            counts = "，".join(f"{NOUNS[section]} {count} 条" for section, count in omitted.items())
+            notes.append(f"- 优先级较低、未列出的条目：{counts}")
+        if notes:
+            lines.append("## 🧹 已省略")
+            lines.extend(notes)
+
+        text = "\n".join(lines)
+        return CompactionResult(text=text, tokens=estimate_tokens(text), dropped=dropped)
@@ -1,4 +1,5 @@
 import yaml
+from collections.abc import Mapping
 from pathlib import Path
 
 CONFIG_PATH = Path("config.yaml")
@@ -10,10 +11,44 @@ def load_config():
             f"'{CONFIG_PATH}' not found. "
             "Please copy 'config.example.yaml' to 'config.yaml' and fill in your details."
         )
-    
+
     with open(CONFIG_PATH, 'r') as f:
         config = yaml.safe_load(f)
     return config
 
-# Load config once on module import
-config = load_config()
+
+class LazyConfig(Mapping):
+    """
+    The configuration, read from `config.yaml` on first access rather than on
+    import, so commands that never look at it (e.g. `--help`) start quickly
+    and work without a config file.
+    """
+
+    def __init__(self):
+        self._data = None
+
+    def _load(self) -> dict:
+        if self._data is None:
+            self._data = load_config() or {}
+        return self._data
+
+    def __getitem__(self, key):
+        return self._load()[key]
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+    def available(self) -> bool:
+        """True once loaded or if the config file exists."""
+        return self._data is not None or CONFIG_PATH.is_file()
+
+    def reload(self):
+        """Forgets the loaded values; the next access reads the file again."""
+        self._data = None
+
+
+# Loaded on first access
+config = LazyConfig()
@@ -1,62 +1,426 @@
-from sqlalchemy import create_engine
+import threading
+from contextlib import contextmanager
+from sqlalchemy import Integer, bindparam, case, create_engine, delete, event, func, inspect, select, text, update
+from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.orm import sessionmaker
 from github_sentinel.models.subscription import Base, Subscription
+from github_sentinel.models.http_validator import HttpValidator
+from github_sentinel.models.job import Job
+from github_sentinel.models.summary_cache import SummaryCacheEntry
+from github_sentinel.models.outbound_message import OutboundMessage
+from github_sentinel.models.activity_event import ActivityEvent
+from github_sentinel.models.webhook_event import WebhookEvent
+from github_sentinel.models.subscriber import Subscriber, SubscriberChannel, SubscriberRepo
 from github_sentinel.components.config_loader import config
 import datetime
 from datetime import datetime, timezone # <-- ADD timezone
 
-engine = create_engine(f"sqlite:///{config['database']['path']}")
-Base.metadata.create_all(engine)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+DEFAULT_DATABASE_PATH = "./sentinel.db"
+DEFAULT_BUSY_TIMEOUT_SECONDS = 30
+DEFAULT_MAX_OVERFLOW = 10
+DEFAULT_BATCH_SIZE = 100
+ACTIVITY_SMOOTHING = 0.3  # Weight of the newest check in `avg_items_per_check`
+# Applied to every new connection. WAL lets readers (CLI, scheduler, outbox threads)
+# run while a sweep writes; NORMAL sync is durable across crashes of the process in WAL mode.
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "temp_store": "MEMORY",
+}
+WATERMARK_COLUMNS = {
+    "commit_sha": "last_commit_sha",
+    "release_id": "last_release_id",
+    "issue_updated_at": "last_issue_updated_at",
+}
+
+
+def database_config() -> dict:
+    # Database-only commands (list-repos, import, ...) also work without a config.yaml
+    settings = (config.get('database', {}) or {}) if config.available() else {}
+    return {"path": DEFAULT_DATABASE_PATH, **settings}
+
+
+def _sqlite_pragmas(settings: dict) -> dict:
+    pragmas = dict(DEFAULT_PRAGMAS)
+    if not settings.get('wal', True):
+        pragmas["journal_mode"] = "DELETE"
+    busy_timeout = float(settings.get('busy_timeout_seconds', DEFAULT_BUSY_TIMEOUT_SECONDS))
+    pragmas["busy_timeout"] = int(busy_timeout * 1000)
+    pragmas.update(settings.get('pragmas', {}) or {})
+    return pragmas
+
+
+def _create_engine(settings: dict):
+    """
+    Sweeps run on a thread pool and queue workers in other processes share the
+    file, so connections are pooled per thread (`pool_size` defaults to the
+    sweep's worker count), may cross threads, and wait for locks instead of failing.
+    """
+    workers = ((config.get('concurrency', {}) or {}) if config.available() else {}).get('max_workers', 8)
+    busy_timeout = float(settings.get('busy_timeout_seconds', DEFAULT_BUSY_TIMEOUT_SECONDS))
+    engine = create_engine(
+        f"sqlite:///{settings['path']}",
+        connect_args={"check_same_thread": False, "timeout": busy_timeout},
+        pool_size=int(settings.get('pool_size', max(5, int(workers) + 2))),
+        max_overflow=int(settings.get('max_overflow', DEFAULT_MAX_OVERFLOW)),
+        pool_timeout=busy_timeout,
+    )
+    pragmas = _sqlite_pragmas(settings)
+
+    @event.listens_for(engine, "connect")
+    def _configure_connection(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    return engine
+
+
+def _add_missing_columns(engine):
+    """
+    `create_all` never alters existing tables, so databases created by older
+    versions are upgraded here by adding any (nullable) columns they lack,
+    together with their indexes.
+    """
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            with engine.begin() as conn:
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
+
+_engine = None
+_session_factory = None
+_init_lock = threading.Lock()
+
+
+def get_engine():
+    """
+    The process's engine. It is created, and the schema created or upgraded,
+    on first use rather than on import, so commands that never touch the
+    database don't pay for it.
+    """
+    global _engine, _session_factory
+    if _engine is None:
+        with _init_lock:
+            if _engine is None:
+                engine = _create_engine(database_config())
+                Base.metadata.create_all(engine)
+                _add_missing_columns(engine)
+                # Objects are handed out after their session closed, so keep their loaded attributes on commit
+                _session_factory = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+                _engine = engine
+    return _engine
+
+
+def __getattr__(name):
+    # `db_manager.engine` keeps working for callers that expect a module attribute
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 def get_db_session():
-    return SessionLocal()
+    get_engine()
+    return _session_factory()
 
-def add_subscription(repo_url, schedule):
-    session = get_db_session()
-    existing = session.query(Subscription).filter_by(repo_url=repo_url).first()
-    if existing:
-        print(f"Warning: Repository {repo_url} is already subscribed.")
-        session.close()
-        return
-    
-    new_sub = Subscription(repo_url=repo_url, schedule=schedule)
-    session.add(new_sub)
-    session.commit()
-    session.close()
 
-def remove_subscription(repo_url):
+@contextmanager
+def session_scope():
+    """One unit of work: commits when the block succeeds, rolls back when it raises."""
     session = get_db_session()
-    sub = session.query(Subscription).filter_by(repo_url=repo_url).first()
-    if sub:
-        session.delete(sub)
+    try:
+        yield session
         session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
         session.close()
-        return True
-    session.close()
-    return False
+
+
+# --- Subscriptions ---
+
+def add_subscriptions(entries: list[tuple[str, str]]) -> tuple[list[str], list[str]]:
+    """
+    Subscribes several (repo_url, schedule) pairs in one transaction.
+    Returns (added, already subscribed) repository URLs.
+    """
+    schedules = {}
+    for repo_url, schedule in entries:
+        schedules.setdefault(repo_url, schedule)
+    if not schedules:
+        return [], []
+    with session_scope() as session:
+        existing = set()
+        urls = list(schedules)
+        for i in range(0, len(urls), 500):  # Keep well below SQLite's bound-parameter limit
+            chunk = urls[i:i + 500]
+            existing.update(session.scalars(select(Subscription.repo_url).where(Subscription.repo_url.in_(chunk))))
+        added = [url for url in urls if url not in existing]
+        session.add_all(Subscription(repo_url=url, schedule=schedules[url]) for url in added)
+    return added, [url for url in urls if url in existing]
+
+
+def add_subscription(repo_url, schedule):
+    _, skipped = add_subscriptions([(repo_url, schedule)])
+    if skipped:
+        print(f"Warning: Repository {repo_url} is already subscribed.")
+
+
+def remove_subscriptions(repo_urls: list[str]) -> int:
+    """Unsubscribes several repositories with one DELETE per 500 URLs; returns how many were removed."""
+    urls = list(dict.fromkeys(repo_urls))
+    removed = 0
+    with session_scope() as session:
+        for i in range(0, len(urls), 500):
+            chunk = select(Subscription.id).where(Subscription.repo_url.in_(urls[i:i + 500]))
+            session.execute(delete(SubscriberRepo).where(SubscriberRepo.subscription_id.in_(chunk)))
+            result = session.execute(delete(Subscription).where(Subscription.repo_url.in_(urls[i:i + 500])))
+            removed += result.rowcount
+    return removed
+
+
+def remove_subscription(repo_url):
+    return remove_subscriptions([repo_url]) > 0
 
 def get_all_subscriptions():
-    session = get_db_session()
-    subs = session.query(Subscription).all()
-    session.close()
-    return subs
+    with session_scope() as session:
+        return session.query(Subscription).all()
 
 def list_subscriptions():
     return get_all_subscriptions()
 
+def update_last_checked_many(subscription_ids: list[int], checked_at: datetime | None = None):
+    """Sets `last_checked_at` of several subscriptions in a single UPDATE."""
+    if not subscription_ids:
+        return
+    with session_scope() as session:
+        session.execute(update(Subscription)
+                        .where(Subscription.id.in_(list(subscription_ids)))
+                        .values(last_checked_at=checked_at or datetime.now(timezone.utc)))
+
 def update_last_checked(subscription_id):
-    session = get_db_session()
-    sub = session.query(Subscription).filter_by(id=subscription_id).first()
-    if sub:
-        # CHANGE: Use an aware datetime here as well
-        sub.last_checked_at = datetime.now(timezone.utc) # <-- MODIFIED
-        session.commit()
-    session.close()
+    update_last_checked_many([subscription_id])
+
+def get_subscriptions_by_ids(subscription_ids: list[int]) -> list[Subscription]:
+    with session_scope() as session:
+        return session.query(Subscription).filter(Subscription.id.in_(list(subscription_ids))).all()
+
+def get_subscription_by_id(subscription_id: int) -> Subscription | None:
+    with session_scope() as session:
+        return session.get(Subscription, subscription_id)
+
+def canonical_repo_urls(repo_urls: list[str]) -> list[str]:
+    """
+    Normalizes repository URLs to one identity per repository: 'owner/repo',
+    clone URLs and differently-cased spellings of a subscribed repository all
+    map to its existing subscription URL. Raises ValueError for non-repositories.
+    """
+    from github_sentinel.components.subscription_io import normalize_repo_url
+    urls = [normalize_repo_url(url) for url in repo_urls]
+    lowered = sorted({url.lower() for url in urls})
+    known = {}
+    with session_scope() as session:
+        for i in range(0, len(lowered), 500):
+            chunk = lowered[i:i + 500]
+            for (url,) in session.query(Subscription.repo_url).filter(func.lower(Subscription.repo_url).in_(chunk)):
+                known[url.lower()] = url
+    for url in urls:
+        known.setdefault(url.lower(), url)  # New repositories: the first spelling given
+    return list(dict.fromkeys(known[url.lower()] for url in urls))
+
+
+def canonical_repo_url(repo_url: str) -> str:
+    return canonical_repo_urls([repo_url])[0]
+
 
 def get_subscription_by_url(repo_url: str) -> Subscription | None:
     """按 URL 查询单个订阅记录。"""
-    session = get_db_session()
-    sub = session.query(Subscription).filter_by(repo_url=repo_url).first()
-    session.close()
-    return sub
\ No newline at end of file
+    with session_scope() as session:
+        return session.query(Subscription).filter_by(repo_url=repo_url).first()
+
+# --- Fetch state ---
+
+def get_validators(repo_url: str) -> dict[str, dict]:
+    """Returns the cached ETag/Last-Modified validators of a repo, keyed by endpoint."""
+    with session_scope() as session:
+        rows = session.query(HttpValidator).filter_by(repo_url=repo_url).all()
+    return {row.endpoint: {"etag": row.etag, "last_modified": row.last_modified} for row in rows}
+
+
+def _upsert_validators(session, validators: dict[str, dict[str, dict]]):
+    """Upserts {repo_url: {endpoint: validator}} with one multi-row statement."""
+    now = datetime.now(timezone.utc)
+    rows = [{"repo_url": repo_url, "endpoint": endpoint, "etag": validator.get("etag"),
+             "last_modified": validator.get("last_modified"), "updated_at": now}
+            for repo_url, endpoints in validators.items() for endpoint, validator in endpoints.items()]
+    if not rows:
+        return
+    statement = insert(HttpValidator)
+    statement = statement.on_conflict_do_update(
+        index_elements=["repo_url", "endpoint"],
+        set_={column: statement.excluded[column] for column in ("etag", "last_modified", "updated_at")},
+    )
+    session.execute(statement, rows)
+
+
+def bulk_update_watermarks(session, watermarks: dict[str, dict]):
+    """Advances {repo_url: watermarks} with one executemany per set of changed columns."""
+    groups: dict[tuple, list[dict]] = {}
+    for repo_url, marks in watermarks.items():
+        values = {WATERMARK_COLUMNS[key]: value for key, value in marks.items()
+                  if key in WATERMARK_COLUMNS and value is not None}
+        if values:
+            groups.setdefault(tuple(sorted(values)), []).append({"b_repo_url": repo_url, **values})
+    for columns, rows in groups.items():
+        statement = (update(Subscription.__table__)
+                     .where(Subscription.__table__.c.repo_url == bindparam("b_repo_url"))
+                     .values({column: bindparam(column) for column in columns}))
+        session.execute(statement, rows)
+
+
+def bulk_record_checks(session, checks: dict[int, int]):
+    """
+    Folds the item counts of finished checks ({subscription_id: items}) into
+    the activity statistics of their subscriptions with one executemany.
+    """
+    if not checks:
+        return
+    columns = Subscription.__table__.c
+    items = bindparam("items", type_=Integer)
+    statement = (update(Subscription.__table__)
+                 .where(columns.id == bindparam("b_id"))
+                 .values(last_item_count=items,
+                         empty_check_streak=case((items == 0, func.coalesce(columns.empty_check_streak, 0) + 1),
+                                                 else_=0),
+                         avg_items_per_check=func.coalesce(
+                             columns.avg_items_per_check * (1 - ACTIVITY_SMOOTHING) + items * ACTIVITY_SMOOTHING,
+                             items)))
+    session.execute(statement, [{"b_id": subscription_id, "items": count} for subscription_id, count in checks.items()])
+
+
+def record_checks(checks: dict[int, int]):
+    with session_scope() as session:
+        bulk_record_checks(session, checks)
+
+
+def save_validators(repo_url: str, validators: dict[str, dict]):
+    """Upserts validators for the given endpoints of a repo."""
+    if not validators:
+        return
+    with session_scope() as session:
+        _upsert_validators(session, {repo_url: validators})
+
+
+def update_watermarks(repo_url: str, watermarks: dict):
+    """Advances the high-water marks of a subscription; `None` values are left unchanged."""
+    with session_scope() as session:
+        bulk_update_watermarks(session, {repo_url: watermarks})
+
+
+class SweepBatch:
+    """
+    Unit of work for one sweep: the per-repo writes of a sweep (checked
+    timestamps, activity statistics, validators, high-water marks) are collected from the worker
+    threads and written together in one transaction, every `batch_size`
+    repositories and when the sweep ends, instead of one commit per write.
+    """
+
+    def __init__(self, batch_size: int | None = None):
+        size = database_config().get('batch_size', DEFAULT_BATCH_SIZE) if batch_size is None else batch_size
+        self.batch_size = max(1, int(size))
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.checked: list[int] = []
+        self.checks: dict[int, int] = {}
+        self.validators: dict[str, dict] = {}
+        self.watermarks: dict[str, dict] = {}
+        self.repos: set[str] = set()
+
+    def mark_checked(self, subscription_id: int):
+        with self._lock:
+            self.checked.append(subscription_id)
+        self._maybe_flush()
+
+    def record_check(self, subscription_id: int, items: int):
+        with self._lock:
+            self.checks[subscription_id] = items
+        self._maybe_flush()
+
+    def add_state(self, repo_url: str, validators: dict | None = None, watermarks: dict | None = None):
+        with self._lock:
+            if validators:
+                self.validators.setdefault(repo_url, {}).update(validators)
+            if watermarks:
+                self.watermarks.setdefault(repo_url, {}).update(watermarks)
+            self.repos.add(repo_url)
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if len(self.repos) + len(self.checked) + len(self.checks) >= self.batch_size:
+            self.flush()
+
+    def flush(self, checked_at: datetime | None = None):
+        """Writes everything collected so far in a single transaction."""
+        with self._lock:
+            checked, checks, validators, watermarks = self.checked, self.checks, self.validators, self.watermarks
+            self._reset()
+            if not (checked or checks or validators or watermarks):
+                return
+            with session_scope() as session:
+                if checked:
+                    session.execute(update(Subscription)
+                                    .where(Subscription.id.in_(checked))
+                                    .values(last_checked_at=checked_at or datetime.now(timezone.utc)))
+                bulk_record_checks(session, checks)
+                _upsert_validators(session, validators)
+                bulk_update_watermarks(session, watermarks)
+
+# --- Scheduling ---
+
+def get_due_subscriptions(now: datetime) -> list[Subscription]:
+    """Subscriptions whose `next_due_at` has passed, earliest first (an indexed range query)."""
+    with session_scope() as session:
+        return (session.query(Subscription)
+                .filter(Subscription.next_due_at <= now)
+                .order_by(Subscription.next_due_at)
+                .all())
+
+
+def get_unscheduled_subscriptions() -> list[Subscription]:
+    """Subscriptions that have not been placed on the schedule yet."""
+    with session_scope() as session:
+        return session.query(Subscription).filter(Subscription.next_due_at.is_(None)).all()
+
+
+def set_next_due(due_times: dict[int, datetime], intervals: dict[int, tuple[int | None, str | None]] | None = None,
+                 slots: dict[int, datetime] | None = None):
+    """
+    Sets `next_due_at` for several subscriptions ({subscription_id: due time})
+    in one executemany, together with the un-jittered slot it was derived from
+    ({subscription_id: slot}; the due time itself if not given) and the polling
+    interval and its reason ({subscription_id: (seconds, reason)}) when the
+    scheduler chose one.
+    """
+    if not due_times:
+        return
+    slots = slots or {}
+    rows = [{"id": subscription_id, "next_due_at": due_at, "scheduled_at": slots.get(subscription_id, due_at)}
+            for subscription_id, due_at in due_times.items()]
+    if intervals is not None:
+        for row in rows:
+            row["poll_interval_seconds"], row["poll_reason"] = intervals.get(row["id"], (None, None))
+    with session_scope() as session:
+        session.execute(update(Subscription), rows)
@@ -1,64 +1,428 @@
-from github import Github, GithubException
+import threading
+from urllib.parse import parse_qs, urlparse
+import requests
 from github_sentinel.components.config_loader import config
+from github_sentinel.components.db_manager import get_validators, save_validators, update_watermarks
+from github_sentinel.components.metrics import metrics
+from github_sentinel.components.rate_limiter import RateLimitGovernor
+from github_sentinel.components.streaming import UpdateList, display_limits, take
+from github_sentinel.models.records import CommitRecord, IssueRecord, ReleaseRecord
 from datetime import datetime, timedelta, timezone
 
-class GitHubClient:
-    def __init__(self):
-        try:
-            self.gh = Github(config['github']['token'])
-        except Exception as e:
-            raise ConnectionError(f"Failed to connect to GitHub. Check your token. Error: {e}")
+DEFAULT_API_URL = "https://api.github.com"
+MAX_PER_PAGE = 100
+
+# Cheap first-page probes used for conditional requests. Each one's ETag changes
+# whenever the corresponding full listing would return something new.
+CONDITIONAL_PROBES = {
+    "commits": ("commits", {"per_page": 1}),
+    "issues": ("issues", {"state": "all", "sort": "updated", "direction": "desc", "per_page": 1}),
+    "releases": ("releases", {"per_page": 1}),
+}
+
+
+class FetchStateMixin:
+    """
+    Per-repo state produced by a fetch (validators, high-water marks) that is
+    only persisted once the whole pipeline for that repo succeeded.
+    """
+
+    def _init_fetch_state(self):
+        self._pending: dict[str, dict] = {}
+        self._pending_lock = threading.Lock()
+
+    def _set_pending(self, repo_url: str, key: str, value):
+        with self._pending_lock:
+            self._pending.setdefault(repo_url, {})[key] = value
+
+    def commit_state(self, repo_url: str, batch=None):
+        """
+        Persists the validators and high-water marks gathered by the last fetch
+        of `repo_url`, or hands them to the sweep's `SweepBatch` to be written
+        together with the other repositories.
+        """
+        with self._pending_lock:
+            state = self._pending.pop(repo_url, None)
+        if not state:
+            return
+        if batch is not None:
+            batch.add_state(repo_url, state.get("validators"), state.get("watermarks"))
+            return
+        if state.get("validators"):
+            save_validators(repo_url, state["validators"])
+        if state.get("watermarks"):
+            update_watermarks(repo_url, state["watermarks"])
+
+    def discard_state(self, repo_url: str):
+        """Drops unpersisted fetch state, e.g. after the pipeline failed for `repo_url`."""
+        with self._pending_lock:
+            self._pending.pop(repo_url, None)
+
+
+def repo_name_from_url(repo_url: str) -> str:
+    """'https://github.com/owner/repo' -> 'owner/repo'."""
+    return repo_url.replace("https://github.com/", "").strip('/')
+
+
+def normalize_since(since: datetime | None) -> datetime:
+    """Default window for first runs and a safety net for naive datetimes."""
+    # If 'since' is None (first run for this repo), fetch updates from the last 24 hours.
+    if since is None:
+        # First run, create a new aware datetime. This is correct.
+        return datetime.now(timezone.utc) - timedelta(days=1)
+    if since.tzinfo is None:
+        # DEFENSIVE CHECK: If the datetime from DB is naive, FIX IT.
+        # This is our safety net that catches the error.
+        print(f"Warning: Received a naive datetime '{since}' from the database. Assuming it is UTC and making it timezone-aware.")
+        return since.replace(tzinfo=timezone.utc)
+    return since
+
+
+class RestListing:
+    """
+    A lazily paginated GitHub REST listing that yields raw JSON objects,
+    following `Link: rel="next"` headers. Requests go through the rate-limit
+    governor and nothing is fetched until iteration starts.
+    """
+
+    def __init__(self, client: "GitHubClient", token: str, repo_name: str, path: str, params: dict,
+                 url: str | None = None):
+        self.client = client
+        self.token = token
+        self.repo_name = repo_name
+        self.path = path
+        self.url = url or f"{client.api_url}/repos/{repo_name}/{path}"
+        self.params = params
+
+    def _get(self, url: str, params: dict | None) -> requests.Response:
+        response = self.client.governor.request(
+            self.client.session, "GET", url, token=self.token, params=params,
+            headers={"Accept": "application/vnd.github+json"}, timeout=30)
+        if response.status_code != 200:
+            raise ValueError(f"Could not access repository '{self.repo_name}'. Is the URL correct and token valid? "
+                             f"Error: {response.status_code} {response.text[:200]}")
+        return response
+
+    def __iter__(self):
+        url, params = self.url, self.params
+        while url:
+            response = self._get(url, params)
+            metrics.inc("sentinel_github_pages_total", endpoint=self.path)
+            yield from response.json()
+            # The next-page URL already carries the query string
+            url, params = response.links.get("next", {}).get("url"), None
+
+    @property
+    def totalCount(self) -> int:
+        """Total number of items, read from the last-page link of a per_page=1 request."""
+        response = self._get(self.url, {**self.params, "per_page": 1})
+        last = response.links.get("last", {}).get("url")
+        if last:
+            return int(parse_qs(urlparse(last).query).get("page", ["1"])[0])
+        return len(response.json())
+
+
+class GitHubClient(FetchStateMixin):
+    """
+    Fetches repository activity from the GitHub REST API.
+    Items are built as slotted records straight from the listing JSON, so no
+    per-item follow-up requests are ever made.
+    """
+
+    def __init__(self, session: requests.Session | None = None, governor: RateLimitGovernor | None = None):
+        github_config = config['github']
+        self.governor = governor or RateLimitGovernor.from_config(github_config)
+        self.session = session or requests.Session()
+        self.api_url = github_config.get('api_url', DEFAULT_API_URL).rstrip('/')
+        self.conditional_requests = github_config.get('conditional_requests', True)
+        fetch_config = config.get('fetch', {}) or {}
+        self.streaming = bool(fetch_config.get('streaming', False))
+        self.display_limits = display_limits(fetch_config)
+        self._init_fetch_state()
+
+    def _probe(self, repo_name: str, endpoint: str, validator: dict | None, token: str) -> tuple[bool, dict | None]:
+        """
+        Sends a conditional request for the first page of `endpoint`.
+        Returns (changed, new_validator). A 304 means nothing changed and does not
+        count against the primary rate limit; any error is treated as "changed" so
+        we fall back to a full fetch.
+        """
+        path, params = CONDITIONAL_PROBES[endpoint]
+        headers = {"Accept": "application/vnd.github+json"}
+        if validator:
+            if validator.get("etag"):
+                headers["If-None-Match"] = validator["etag"]
+            if validator.get("last_modified"):
+                headers["If-Modified-Since"] = validator["last_modified"]
 
-    def fetch_updates(self, repo_url: str, since: datetime | None) -> dict:
-        """Fetch all relevant updates from a repository since a given time."""
         try:
-            repo_name = repo_url.replace("https://github.com/", "").strip('/')
-            repo = self.gh.get_repo(repo_name)
-        except GithubException as e:
-            raise ValueError(f"Could not access repository '{repo_name}'. Is the URL correct and token valid? Error: {e.data}")
-        
-        # If 'since' is None (first run for this repo), fetch updates from the last 24 hours.
-        if since is None:
-            # First run, create a new aware datetime. This is correct.
-            since = datetime.now(timezone.utc) - timedelta(days=1)
-        elif since.tzinfo is None:
-            # DEFENSIVE CHECK: If the datetime from DB is naive, FIX IT.
-            # This is our safety net that catches the error.
-            print(f"Warning: Received a naive datetime '{since}' from the database. Assuming it is UTC and making it timezone-aware.")
-            since = since.replace(tzinfo=timezone.utc)
-            
+            response = self.governor.request(self.session, "GET", f"{self.api_url}/repos/{repo_name}/{path}",
+                                             token=token, params=params, headers=headers, timeout=10)
+        except requests.exceptions.RequestException as e:
+            print(f"Warning: Conditional request for {repo_name}/{path} failed: {e}")
+            return True, None
+
+        if response.status_code == 304:
+            return False, None
+        if response.status_code != 200:
+            return True, None
+
+        new_validator = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+        if not new_validator["etag"] and not new_validator["last_modified"]:
+            new_validator = None
+        return True, new_validator
+
+    def _changed_endpoints(self, repo_url: str, repo_name: str, token: str) -> set[str]:
+        """Returns the endpoints whose content changed since the validators were stored."""
+        if not self.conditional_requests:
+            return set(CONDITIONAL_PROBES)
+
+        cached = get_validators(repo_url)
+        changed = set()
+        fresh_validators = {}
+        for endpoint in CONDITIONAL_PROBES:
+            is_changed, validator = self._probe(repo_name, endpoint, cached.get(endpoint), token)
+            if is_changed:
+                changed.add(endpoint)
+            if validator:
+                fresh_validators[endpoint] = validator
+
+        self._set_pending(repo_url, "validators", fresh_validators)
+        return changed
+
+    def _open_repo(self, repo_url: str):
+        """
+        Probes which listings changed. Returns (repo_name, token, changed), or
+        None if nothing changed (304s).
+        """
+        repo_name = repo_name_from_url(repo_url)
+
+        # Ask GitHub which listings changed at all; if none did, skip the
+        # (rate-limited) full fetch and the rest of the pipeline.
+        token = self.governor.token_for(repo_name)
+        changed = self._changed_endpoints(repo_url, repo_name, token)
+        if not changed:
+            print(f"{repo_url}: not modified since last check (304).")
+            return None
+        return repo_name, token, changed
+
+    def _per_page(self, kind: str) -> int:
+        """Full pages normally; in streaming mode just enough to fill (and peek past) the display limit."""
+        if not self.streaming:
+            return MAX_PER_PAGE
+        if kind == "issues":
+            # Issues and pull requests share one listing
+            return min(MAX_PER_PAGE, self.display_limits["issues"] + self.display_limits["pull_requests"] + 1)
+        return min(MAX_PER_PAGE, self.display_limits[kind] + 1)
+
+    def _listings(self, repo_name: str, token: str, changed: set[str], since: datetime, watermarks: dict) -> dict:
+        """Lazy REST listings (no request is made until they are iterated)."""
+        listings = {}
+        if "commits" in changed:
+            listings["commits"] = RestListing(self, token, repo_name, "commits", {
+                "since": since.strftime('%Y-%m-%dT%H:%M:%SZ'), "per_page": self._per_page("commits")})
+        if "issues" in changed:
+            last_updated = watermarks.get("issue_updated_at")
+            if last_updated is not None and last_updated.tzinfo is None:
+                last_updated = last_updated.replace(tzinfo=timezone.utc)
+            issues_since = max(since, last_updated) if last_updated else since
+            listings["issues"] = RestListing(self, token, repo_name, "issues", {
+                "since": issues_since.strftime('%Y-%m-%dT%H:%M:%SZ'), "state": "all",
+                "sort": "updated", "direction": "desc", "per_page": self._per_page("issues")})
+        if "releases" in changed:
+            listings["releases"] = RestListing(self, token, repo_name, "releases",
+                                               {"per_page": self._per_page("releases")})
+        return listings
+
+    @staticmethod
+    def _iter_commits(listing, watermarks: dict, new_marks: dict):
+        """Commits newest first, stopping at the last reported SHA."""
+        last_sha = watermarks.get("commit_sha")
+        for data in listing:
+            if data["sha"] == last_sha:
+                return
+            new_marks.setdefault("commit_sha", data["sha"])
+            yield CommitRecord.from_json(data)
+
+    @staticmethod
+    def _iter_issues(listing, watermarks: dict, new_marks: dict):
+        """("issues" | "pull_requests", item) pairs, most recently updated first."""
+        last_updated = watermarks.get("issue_updated_at")
+        if last_updated is not None and last_updated.tzinfo is None:
+            last_updated = last_updated.replace(tzinfo=timezone.utc)
+        for data in listing:
+            issue = IssueRecord.from_json(data)
+            if last_updated and issue.updated_at <= last_updated:
+                return
+            new_marks.setdefault("issue_updated_at", issue.updated_at)
+            yield ("pull_requests" if issue.is_pull_request else "issues"), issue
+
+    @staticmethod
+    def _iter_releases(listing, since: datetime, watermarks: dict, new_marks: dict):
+        """
+        Releases published within the check window, in listing order (newest
+        created first), stopping at the last reported release or at the first
+        release published before the window. The listing is ordered by
+        creation, so a draft published inside the window is found only if it
+        was created after both of those; one created earlier is not reported.
+        """
+        last_release_id = watermarks.get("release_id")
+        for data in listing:
+            release = ReleaseRecord.from_json(data)
+            if release.id == last_release_id:
+                return
+            if release.draft or not release.published_at:
+                continue  # Drafts are reported once they are published
+            if release.published_at <= since:
+                return
+            new_marks.setdefault("release_id", release.id)
+            yield release
+
+    def iter_updates(self, repo_url: str, since: datetime | None, watermarks: dict | None = None):
+        """
+        Lazily yields ("commits" | "issues" | "pull_requests" | "releases", item)
+        pairs; pages are only requested as the consumer advances. High-water
+        marks are recorded once the generator is exhausted.
+        """
+        watermarks = watermarks or {}
+        opened = self._open_repo(repo_url)
+        if opened is None:
+            return
+        repo_name, token, changed = opened
+        since = normalize_since(since)
+        listings = self._listings(repo_name, token, changed, since, watermarks)
+        new_marks = {}
+
+        if "commits" in listings:
+            for item in self._iter_commits(listings["commits"], watermarks, new_marks):
+                yield "commits", item
+        if "issues" in listings:
+            yield from self._iter_issues(listings["issues"], watermarks, new_marks)
+        if "releases" in listings:
+            for item in self._iter_releases(listings["releases"], since, watermarks, new_marks):
+                yield "releases", item
+
+        self._set_pending(repo_url, "watermarks", new_marks)
+
+    def _collect_capped(self, listings: dict, since: datetime, watermarks: dict, new_marks: dict) -> dict:
+        """
+        Streaming mode: keeps only the first `display_limits` items of each kind
+        and stops paginating once they are filled, recording how many more exist.
+        """
+        updates = {kind: UpdateList() for kind in ("commits", "issues", "pull_requests", "releases")}
+
+        if "commits" in listings:
+            items, has_more = take(self._iter_commits(listings["commits"], watermarks, new_marks),
+                                   self.display_limits["commits"])
+            remaining, exact = 0, True
+            if has_more:
+                remaining, exact = self._count_more_commits(listings["commits"], watermarks.get("commit_sha"), items)
+            updates["commits"] = UpdateList(items, remaining=remaining, exact=exact)
+
+        if "issues" in listings:
+            extra = {"issues": 0, "pull_requests": 0}
+            stopped_early = False
+            stream = self._iter_issues(listings["issues"], watermarks, new_marks)
+            for kind, item in stream:
+                if len(updates[kind]) < self.display_limits[kind]:
+                    updates[kind].append(item)
+                else:
+                    extra[kind] += 1
+                if all(len(updates[k]) >= self.display_limits[k] for k in extra):
+                    stopped_early = next(stream, None) is not None
+                    break
+            for kind in extra:
+                updates[kind].remaining = extra[kind]
+                updates[kind].exact = not stopped_early
+
+        if "releases" in listings:
+            releases = self._iter_releases(listings["releases"], since, watermarks, new_marks)
+            items, has_more = take(releases, self.display_limits["releases"])
+            # Releases are bounded by the check window, so counting the rest (after
+            # the item `take` peeked at) is cheap
+            remaining = 1 + sum(1 for _ in releases) if has_more else 0
+            updates["releases"] = UpdateList(items, remaining=remaining)
+
+        return updates
+
+    def _count_more_commits(self, listing: RestListing, last_sha: str | None, items: list) -> tuple[int, bool]:
+        """
+        How many commits after `items` are new, as (count, exact). Without a
+        watermark the listing's totalCount is bounded by the check window; with
+        one, the compare API counts the commits since the last reported SHA in
+        a single request (totalCount, which ignores the watermark, is only the
+        fallback and may overstate).
+        """
+        if last_sha:
+            response = self.governor.request(
+                self.session, "GET", f"{self.api_url}/repos/{listing.repo_name}/compare/{last_sha}...{items[0].sha}",
+                token=listing.token, params={"per_page": 1},
+                headers={"Accept": "application/vnd.github+json"}, timeout=30)
+            if response.status_code == 200 and response.json().get("total_commits") is not None:
+                return max(1, response.json()["total_commits"] - len(items)), True
+        # totalCount costs one extra request (per_page=1) instead of paging the rest
+        return max(1, listing.totalCount - len(items)), not last_sha
+
+    def fetch_updates(self, repo_url: str, since: datetime | None, watermarks: dict | None = None) -> dict:
+        """
+        Fetch all relevant updates from a repository since a given time.
+
+        `watermarks` holds the newest items already reported ("commit_sha",
+        "release_id", "issue_updated_at"); each listing is read newest-first and
+        pagination stops as soon as one of them is reached. The new marks are
+        persisted by `commit_state`. With `fetch.streaming`, only the items shown
+        in a report are kept (see `_collect_capped`).
+        """
+        watermarks = watermarks or {}
         updates = {
             "commits": [], "issues": [], "pull_requests": [], "releases": []
         }
-        
-        # 1. Fetch Commits
-        for commit in repo.get_commits(since=since):
-            updates["commits"].append({
-                "sha": commit.sha,
-                "author": commit.commit.author.name,
-                "message": commit.commit.message.split('\n')[0],
-                "url": commit.html_url
-            })
-            
-        # 2. Fetch Issues and Pull Requests
-        for issue in repo.get_issues(since=since, state="all", sort="updated"):
-            item = {
-                "number": issue.number, "title": issue.title, "user": issue.user.login,
-                "state": issue.state, "url": issue.html_url,
-                "created_at": issue.created_at, "updated_at": issue.updated_at,
-                "closed_at": issue.closed_at
-            }
-            if issue.pull_request:
-                updates["pull_requests"].append(item)
-            else:
-                updates["issues"].append(item)
-
-        # 3. Fetch Releases
-        for release in repo.get_releases():
-            if release.published_at and release.published_at > since:
-                updates["releases"].append({
-                    "tag_name": release.tag_name, "name": release.title,
-                    "author": release.author.login, "url": release.html_url
-                })
-                
+        opened = self._open_repo(repo_url)
+        if opened is None:
+            return updates
+        repo_name, token, changed = opened
+
+        since = normalize_since(since)
+        listings = self._listings(repo_name, token, changed, since, watermarks)
+        new_marks = {}
+
+        if self.streaming:
+            updates = self._collect_capped(listings, since, watermarks, new_marks)
+        else:
+            if "commits" in listings:
+                updates["commits"] = list(self._iter_commits(listings["commits"], watermarks, new_marks))
+            if "issues" in listings:
+                for kind, item in self._iter_issues(listings["issues"], watermarks, new_marks):
+                    updates[kind].append(item)
+            if "releases" in listings:
+                updates["releases"] = list(self._iter_releases(listings["releases"], since, watermarks, new_marks))
+
+        self._set_pending(repo_url, "watermarks", new_marks)
         return updates
+
+    def list_owner_repos(self, owner: str, include_forks: bool = False, include_archived: bool = False) -> list[str]:
+        """
+        URLs of the repositories of an organization (or user), read from the
+        paginated `/orgs/{owner}/repos` listing 100 at a time.
+        """
+        token = self.governor.token_for(owner)
+        response = self.governor.request(
+            self.session, "GET", f"{self.api_url}/users/{owner}", token=token,
+            headers={"Accept": "application/vnd.github+json"}, timeout=30)
+        if response.status_code != 200:
+            raise ValueError(f"Could not find GitHub organization or user '{owner}'. "
+                             f"Error: {response.status_code} {response.text[:200]}")
+        if response.json().get("type") == "Organization":
+            url, params = f"{self.api_url}/orgs/{owner}/repos", {"type": "all", "per_page": MAX_PER_PAGE}
+        else:
+            url, params = f"{self.api_url}/users/{owner}/repos", {"type": "owner", "per_page": MAX_PER_PAGE}
+
+        repo_urls = []
+        for data in RestListing(self, token, owner, "repos", params, url=url):
+            if (data.get("fork") and not include_forks) or (data.get("archived") and not include_archived):
+                continue
+            repo_urls.append(f"https://github.com/{data['full_name']}")
+        return repo_urls
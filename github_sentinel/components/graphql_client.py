@@ -0,0 +1,317 @@
+import json
+import math
+import time
+import requests
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from github_sentinel.components.config_loader import config
+from github_sentinel.components.github_client import (
+    DEFAULT_API_URL, FetchStateMixin, normalize_since, repo_name_from_url,
+)
+from github_sentinel.components.rate_limiter import GRAPHQL_RESOURCE, RateLimitGovernor
+from github_sentinel.components.streaming import UpdateList
+from github_sentinel.models.records import CommitRecord, IssueRecord, ReleaseRecord, parse_github_datetime
+
+DEFAULT_BATCH_SIZE = 20
+# GitHub charges roughly one point per 100 requested nodes, with a minimum of 1
+# point per query; keep each query well below the 5,000 points/hour budget.
+DEFAULT_MAX_QUERY_COST = 50
+DEFAULT_PAGE_SIZES = {"commits": 50, "issues": 50, "pull_requests": 50, "releases": 10}
+# Pages per connection before the rest is only counted
+DEFAULT_MAX_PAGES = 10
+# updates key -> repository connection
+CONNECTIONS = {"commits": "history", "issues": "issues", "pull_requests": "pullRequests", "releases": "releases"}
+
+_ACTOR = "author { login }"
+_ISSUE_FIELDS = f"nodes {{ databaseId number title state url createdAt updatedAt closedAt {_ACTOR} }}"
+_PAGE_INFO = "totalCount pageInfo { hasNextPage endCursor }"
+
+
+def _login(node: dict) -> str:
+    return (node.get("author") or {}).get("login") or "ghost"
+
+
+@dataclass
+class _RepoPages:
+    """What has been read of one repository so far, across pages."""
+    updates: dict = field(default_factory=lambda: {"commits": [], "issues": [], "pull_requests": [], "releases": []})
+    new_marks: dict = field(default_factory=dict)
+    cursors: dict = field(default_factory=dict)  # kind -> endCursor of the next page to read
+    totals: dict = field(default_factory=dict)  # kind -> totalCount
+    pages: int = 0
+
+
+class GraphQLBatchClient(FetchStateMixin):
+    """
+    Fetch backend that asks the GitHub GraphQL API for the commits, issues,
+    pull requests and releases of many repositories in one aliased query.
+    Returns the same `updates` dict shape as `GitHubClient.fetch_updates`.
+    """
+
+    def __init__(self, session: requests.Session | None = None, governor: RateLimitGovernor | None = None):
+        github_config = config['github']
+        graphql_config = github_config.get('graphql', {}) or {}
+        api_url = github_config.get('api_url', DEFAULT_API_URL).rstrip('/')
+
+        self.session = session or requests.Session()
+        self.governor = governor or RateLimitGovernor.from_config(github_config)
+        self.url = graphql_config.get('url', f"{api_url}/graphql")
+        self.batch_size = max(1, int(graphql_config.get('batch_size', DEFAULT_BATCH_SIZE)))
+        self.max_query_cost = max(1, int(graphql_config.get('max_query_cost', DEFAULT_MAX_QUERY_COST)))
+        self.page_sizes = dict(DEFAULT_PAGE_SIZES)
+        self.page_sizes.update(graphql_config.get('page_sizes', {}) or {})
+        self.max_pages = max(1, int(graphql_config.get('max_pages', DEFAULT_MAX_PAGES)))
+        self.rate_limit: dict = {}
+        self._init_fetch_state()
+
+    def close(self):
+        pass
+
+    # --- Query building ---
+
+    def _nodes_per_repo(self) -> int:
+        return sum(self.page_sizes.values())
+
+    def effective_batch_size(self) -> int:
+        """Largest batch whose estimated point cost stays within `max_query_cost`."""
+        by_cost = (self.max_query_cost * 100) // max(1, self._nodes_per_repo())
+        return max(1, min(self.batch_size, by_cost))
+
+    def estimate_cost(self, repo_count: int) -> int:
+        return max(1, math.ceil(repo_count * self._nodes_per_repo() / 100))
+
+    def _repo_fragment(self, alias: str, repo_name: str, since: datetime, cursors: dict | None = None) -> str:
+        """
+        One aliased repository. With `cursors` ({kind: endCursor}) only those
+        connections are requested, continuing after the given cursors.
+        """
+        owner, name = repo_name.split('/', 1)
+        since_literal = json.dumps(since.strftime('%Y-%m-%dT%H:%M:%SZ'))
+        sizes = self.page_sizes
+
+        def first(kind: str) -> str:
+            after = f", after: {json.dumps(cursors[kind])}" if cursors and cursors.get(kind) else ""
+            return f"first: {sizes[kind]}{after}"
+
+        parts = {
+            "commits": f"""defaultBranchRef {{ target {{ ... on Commit {{
+      history({first('commits')}, since: {since_literal}) {{
+        {_PAGE_INFO} nodes {{ oid messageHeadline url committedDate author {{ name }} }}
+      }}
+    }} }} }}""",
+            "issues": f"""issues({first('issues')}, filterBy: {{since: {since_literal}}}, orderBy: {{field: UPDATED_AT, direction: DESC}}) {{
+      {_PAGE_INFO} {_ISSUE_FIELDS}
+    }}""",
+            "pull_requests": f"""pullRequests({first('pull_requests')}, orderBy: {{field: UPDATED_AT, direction: DESC}}) {{
+      {_PAGE_INFO} {_ISSUE_FIELDS}
+    }}""",
+            "releases": f"""releases({first('releases')}, orderBy: {{field: CREATED_AT, direction: DESC}}) {{
+      {_PAGE_INFO} nodes {{ databaseId tagName name url createdAt publishedAt isDraft {_ACTOR} }}
+    }}""",
+        }
+        selected = "\n    ".join(part for kind, part in parts.items() if cursors is None or kind in cursors)
+        return f"""
+  {alias}: repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) {{
+    {selected}
+  }}"""
+
+    def build_query(self, batch: list[tuple]) -> str:
+        """`batch` holds (repo_name, since) or, for follow-up pages, (repo_name, since, cursors)."""
+        fragments = [self._repo_fragment(f"r{i}", *item) for i, item in enumerate(batch)]
+        return "query {" + "".join(fragments) + "\n  rateLimit { cost remaining resetAt }\n}"
+
+    # --- Execution ---
+
+    def _wait_for_budget(self, cost: int):
+        """Sleeps until the reset time if the remaining point budget cannot cover the next query."""
+        remaining = self.rate_limit.get("remaining")
+        reset_at = parse_github_datetime(self.rate_limit.get("resetAt"))
+        if remaining is None or remaining >= cost or reset_at is None:
+            return
+        delay = (reset_at - datetime.now(timezone.utc)).total_seconds()
+        if delay > 0:
+            print(f"GraphQL point budget low ({remaining} left), waiting {delay:.0f}s for reset...")
+            time.sleep(delay)
+
+    def _execute(self, query: str, token: str) -> dict:
+        response = self.governor.request(
+            self.session, "POST", self.url, token=token, resource=GRAPHQL_RESOURCE,
+            json={"query": query},
+            headers={"Authorization": f"bearer {token}"},
+            timeout=60,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    @staticmethod
+    def _connection(node: dict, kind: str) -> dict:
+        if kind == "commits":
+            target = ((node.get("defaultBranchRef") or {}).get("target") or {})
+            return target.get("history") or {}
+        return node.get(CONNECTIONS[kind]) or {}
+
+    def _convert(self, node: dict, since: datetime, watermarks: dict, state: "_RepoPages | None" = None) -> "_RepoPages":
+        """
+        Adds one page of an aliased repository node to `state` (a new one for
+        the first page). Connections that ended before reaching the watermark
+        get a cursor in `state.cursors` for the next page.
+        """
+        state = state or _RepoPages()
+        updates, new_marks = state.updates, state.new_marks
+        requested = list(state.cursors) if state.cursors else list(CONNECTIONS)
+        state.cursors = {}
+
+        def page_done(kind: str, stopped: bool):
+            connection = self._connection(node, kind)
+            if connection.get("totalCount") is not None:
+                state.totals.setdefault(kind, connection["totalCount"])
+            page_info = connection.get("pageInfo") or {}
+            if not stopped and page_info.get("hasNextPage") and page_info.get("endCursor"):
+                state.cursors[kind] = page_info["endCursor"]
+
+        if "commits" in requested:
+            stopped = False
+            for commit in self._connection(node, "commits").get("nodes", []):
+                if commit["oid"] == watermarks.get("commit_sha"):
+                    stopped = True
+                    break
+                new_marks.setdefault("commit_sha", commit["oid"])
+                updates["commits"].append(CommitRecord(
+                    sha=commit["oid"],
+                    author=(commit.get("author") or {}).get("name") or "unknown",
+                    message=commit["messageHeadline"],
+                    url=commit["url"],
+                    committed_at=parse_github_datetime(commit.get("committedDate")),
+                ))
+            page_done("commits", stopped)
+
+        last_updated = watermarks.get("issue_updated_at")
+        if last_updated is not None and last_updated.tzinfo is None:
+            last_updated = last_updated.replace(tzinfo=timezone.utc)
+        threshold = max(since, last_updated) if last_updated else since
+        for key in ("issues", "pull_requests"):
+            if key not in requested:
+                continue
+            stopped = False
+            for item in self._connection(node, key).get("nodes", []):
+                updated_at = parse_github_datetime(item["updatedAt"])
+                if updated_at <= threshold:
+                    stopped = True
+                    break  # Ordered by UPDATED_AT DESC
+                if new_marks.get("issue_updated_at") is None or updated_at > new_marks["issue_updated_at"]:
+                    new_marks["issue_updated_at"] = updated_at
+                updates[key].append(IssueRecord(
+                    id=item["databaseId"], number=item["number"], title=item["title"], user=_login(item),
+                    # REST reports merged pull requests as "closed"
+                    state="open" if item["state"] == "OPEN" else "closed",
+                    url=item["url"],
+                    created_at=parse_github_datetime(item["createdAt"]),
+                    updated_at=updated_at,
+                    closed_at=parse_github_datetime(item.get("closedAt")),
+                    is_pull_request=key == "pull_requests",
+                ))
+            page_done(key, stopped)
+
+        if "releases" in requested:
+            # Ordered by creation: as in the REST client, the scan ends at the last reported
+            # release or at one published before the window
+            stopped = False
+            for release in self._connection(node, "releases").get("nodes", []):
+                if release.get("databaseId") == watermarks.get("release_id"):
+                    stopped = True
+                    break
+                created_at = parse_github_datetime(release["createdAt"])
+                published_at = parse_github_datetime(release.get("publishedAt"))
+                if release.get("isDraft") or not published_at:
+                    continue
+                if published_at <= since:
+                    stopped = True
+                    break
+                new_marks.setdefault("release_id", release.get("databaseId"))
+                updates["releases"].append(ReleaseRecord(
+                    id=release.get("databaseId"), tag_name=release["tagName"],
+                    name=release.get("name") or release["tagName"], author=_login(release), url=release["url"],
+                    created_at=created_at, published_at=published_at,
+                ))
+            page_done("releases", stopped)
+
+        state.pages += 1
+        return state
+
+    def _mark_truncated(self, state: "_RepoPages"):
+        """Connections still unfinished after `max_pages` report how much was left out, like the REST client."""
+        for kind in state.cursors:
+            items = state.updates[kind]
+            # totalCount is bounded by the window for commits and issues; otherwise "at least one more"
+            total = state.totals.get(kind) if kind in ("commits", "issues") else None
+            remaining = max(1, total - len(items)) if total is not None else 1
+            state.updates[kind] = UpdateList(items, remaining=remaining, exact=False)
+
+    def _query(self, entries: list[tuple]) -> tuple[dict, dict]:
+        """Runs one aliased query for `entries` (see `build_query`); returns (data, {alias: error message})."""
+        self._wait_for_budget(self.estimate_cost(len(entries)))
+        token = self.governor.token_for(entries[0][0], GRAPHQL_RESOURCE)
+        payload = self._execute(self.build_query(entries), token)
+        self.rate_limit = (payload.get("data") or {}).get("rateLimit") or self.rate_limit
+        errors_by_alias = {}
+        for error in payload.get("errors") or []:
+            path = error.get("path") or []
+            if path:
+                errors_by_alias.setdefault(path[0], error.get("message", "unknown error"))
+        return payload.get("data") or {}, errors_by_alias
+
+    def fetch_updates_batch(self, items: list[tuple]) -> dict:
+        """
+        Fetches updates for `items` of (repo_url, since, watermarks) using as few
+        queries as the point budget allows. Connections that fill their page
+        before reaching the watermark are paged on (again batched across
+        repositories) for up to `max_pages` pages; what is left after that is
+        reported as a count. Returns {repo_url: updates dict or Exception}.
+        """
+        results = {}
+        batch_size = self.effective_batch_size()
+        prepared = [(repo_url, repo_name_from_url(repo_url), normalize_since(since), watermarks or {})
+                    for repo_url, since, watermarks in items]
+        states = {}
+        # The first round requests every connection; later rounds only the unfinished ones
+        pending = [(entry, None) for entry in prepared]
+        while pending:
+            following = []
+            for start in range(0, len(pending), batch_size):
+                batch = pending[start:start + batch_size]
+                try:
+                    data, errors_by_alias = self._query(
+                        [(name, since) if state is None else (name, since, state.cursors)
+                         for (_, name, since, _), state in batch])
+                except Exception as e:
+                    for (repo_url, *_), _ in batch:
+                        results[repo_url] = ConnectionError(f"GraphQL batch request failed: {e}")
+                        states.pop(repo_url, None)
+                    continue
+
+                for i, ((repo_url, repo_name, since, watermarks), state) in enumerate(batch):
+                    alias = f"r{i}"
+                    node = data.get(alias)
+                    if node is None:
+                        message = errors_by_alias.get(alias, "repository not returned")
+                        results[repo_url] = ValueError(f"Could not access repository '{repo_name}' via GraphQL: {message}")
+                        states.pop(repo_url, None)
+                        continue
+                    state = states[repo_url] = self._convert(node, since, watermarks, state)
+                    if state.cursors and state.pages < self.max_pages:
+                        following.append(((repo_url, repo_name, since, watermarks), state))
+                    elif state.cursors:
+                        self._mark_truncated(state)
+            pending = following
+
+        for repo_url, state in states.items():
+            self._set_pending(repo_url, "watermarks", state.new_marks)
+            results[repo_url] = state.updates
+        return results
+
+    def fetch_updates(self, repo_url: str, since: datetime | None, watermarks: dict | None = None) -> dict:
+        """Single-repository variant with the same signature as `GitHubClient.fetch_updates`."""
+        result = self.fetch_updates_batch([(repo_url, since, watermarks)])[repo_url]
+        if isinstance(result, Exception):
+            raise result
+        return result
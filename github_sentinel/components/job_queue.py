@@ -0,0 +1,140 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import and_, func, or_
+from github_sentinel.components.config_loader import config
+from github_sentinel.components.db_manager import get_db_session
+from github_sentinel.models.job import Job
+
+DEFAULT_LEASE_SECONDS = 600
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_RETRY_BACKOFF_SECONDS = 60
+
+
+class JobQueue:
+    """
+    Persistent job queue stored in the sentinel SQLite database.
+
+    The scheduler enqueues one job per due subscription and `sentinel worker`
+    processes lease them. Jobs survive restarts; a lease that is not completed
+    within `lease_seconds` expires and the job is retried, up to `max_attempts`;
+    after that it is marked dead.
+    """
+
+    def __init__(self, lease_seconds: int | None = None, max_attempts: int | None = None,
+                 retry_backoff_seconds: int | None = None):
+        queue_config = config.get('queue', {}) or {}
+        self.lease_seconds = int(lease_seconds or queue_config.get('lease_seconds', DEFAULT_LEASE_SECONDS))
+        self.max_attempts = int(max_attempts or queue_config.get('max_attempts', DEFAULT_MAX_ATTEMPTS))
+        self.retry_backoff_seconds = int(
+            retry_backoff_seconds or queue_config.get('retry_backoff_seconds', DEFAULT_RETRY_BACKOFF_SECONDS))
+
+    @staticmethod
+    def _visible(now: datetime):
+        """Jobs a worker may take: pending and available."""
+        return and_(Job.status == "pending", Job.available_at <= now)
+
+    @staticmethod
+    def _reap_expired(session, now: datetime) -> int:
+        """
+        Releases leases that expired because their worker died: the job goes
+        back to pending if it has attempts left, and is marked dead otherwise.
+        """
+        expired = and_(Job.status == "leased", Job.lease_until < now)
+        error = "Lease expired before the worker finished (worker stopped or crashed)."
+        retried = (session.query(Job).filter(expired, Job.attempts < Job.max_attempts)
+                   .update({"status": "pending", "available_at": now, "lease_until": None, "leased_by": None,
+                            "last_error": error}, synchronize_session=False))
+        dead = (session.query(Job).filter(expired, Job.attempts >= Job.max_attempts)
+                .update({"status": "dead", "finished_at": now, "lease_until": None, "last_error": error},
+                        synchronize_session=False))
+        return retried + dead
+
+    def enqueue(self, subscriptions) -> int:
+        """Adds a check job per subscription, skipping ones that already have an open job."""
+        session = get_db_session()
+        now = datetime.now(timezone.utc)
+        self._reap_expired(session, now)
+        # A lease only keeps a job open while it is valid; expired ones were just reaped
+        open_ids = {row[0] for row in session.query(Job.subscription_id).filter(or_(
+            Job.status == "pending", and_(Job.status == "leased", Job.lease_until >= now))).all()}
+        jobs = [Job(subscription_id=sub.id, repo_url=sub.repo_url, max_attempts=self.max_attempts, available_at=now)
+                for sub in subscriptions if sub.id not in open_ids]
+        session.add_all(jobs)
+        session.commit()
+        session.close()
+        return len(jobs)
+
+    def lease(self, worker_id: str) -> Job | None:
+        """
+        Atomically claims the oldest visible job for `worker_id`.
+        The conditional UPDATE only succeeds for one worker, so concurrent workers
+        never run the same job.
+        """
+        session = get_db_session()
+        try:
+            self._reap_expired(session, datetime.now(timezone.utc))
+            session.commit()
+            for _ in range(5):
+                now = datetime.now(timezone.utc)
+                candidate = (session.query(Job.id).filter(self._visible(now))
+                             .order_by(Job.available_at).first())
+                if candidate is None:
+                    return None
+                claimed = (session.query(Job)
+                           .filter(Job.id == candidate[0], self._visible(now))
+                           .update({
+                               "status": "leased",
+                               "leased_by": worker_id,
+                               "lease_until": now + timedelta(seconds=self.lease_seconds),
+                               "attempts": Job.attempts + 1,
+                           }, synchronize_session=False))
+                session.commit()
+                if claimed:
+                    job = session.get(Job, candidate[0])
+                    session.expunge(job)
+                    return job
+            return None  # Lost every race; let the caller poll again
+        finally:
+            session.close()
+
+    @staticmethod
+    def _held(job: Job):
+        """
+        Matches `job` only while the lease it was claimed with is still current,
+        so a worker whose lease expired cannot overwrite the result of the next holder.
+        """
+        return and_(Job.id == job.id, Job.status == "leased", Job.leased_by == job.leased_by,
+                    Job.attempts == job.attempts)
+
+    def complete(self, job: Job) -> bool:
+        """Marks the job done; False if its lease was lost in the meantime."""
+        session = get_db_session()
+        updated = session.query(Job).filter(self._held(job)).update({
+            "status": "done", "finished_at": datetime.now(timezone.utc), "lease_until": None,
+        }, synchronize_session=False)
+        session.commit()
+        session.close()
+        return bool(updated)
+
+    def fail(self, job: Job, error: str) -> bool:
+        """
+        Schedules a retry with exponential backoff, or marks the job dead after
+        its last attempt. False if its lease was lost in the meantime.
+        """
+        now = datetime.now(timezone.utc)
+        values = {"last_error": error[:1000], "lease_until": None}
+        if job.attempts >= job.max_attempts:
+            values.update(status="dead", finished_at=now)
+        else:
+            values.update(status="pending",
+                          available_at=now + timedelta(seconds=self.retry_backoff_seconds * 2 ** (job.attempts - 1)))
+        session = get_db_session()
+        updated = session.query(Job).filter(self._held(job)).update(values, synchronize_session=False)
+        session.commit()
+        session.close()
+        return bool(updated)
+
+    def stats(self) -> dict[str, int]:
+        session = get_db_session()
+        rows = session.query(Job.status, func.count(Job.id)).group_by(Job.status).all()
+        session.close()
+        return dict(rows)
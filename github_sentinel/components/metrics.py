@@ -0,0 +1,216 @@
+"""
+Process-wide pipeline metrics.
+
+Components record counters (API calls, pages, cache hits, LLM tokens,
+notification failures) and timers (per-stage and per-request latencies) on the
+shared `metrics` instance. After every sweep the per-repo timings and a
+snapshot of all metrics are written to a JSON file, which `sentinel stats`
+reads; the scheduler can also serve them as Prometheus text over HTTP.
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from github_sentinel.components.config_loader import config
+
+# Written next to the database unless `metrics.json_path` says otherwise
+DEFAULT_JSON_NAME = "sentinel_metrics.json"
+
+
+def _metrics_config() -> dict:
+    return config.get('metrics', {}) or {}
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for _, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
+
+
+class Metrics:
+    """Thread-safe counters and timers, keyed by metric name and label values."""
+
+    def __init__(self):
+        self._counters: dict[tuple, float] = {}
+        self._timers: dict[tuple, list[float]] = {}  # key -> [count, sum, max]
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> tuple:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            timer = self._timers.setdefault(key, [0, 0.0, 0.0])
+            timer[0] += 1
+            timer[1] += seconds
+            timer[2] = max(timer[2], seconds)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Times the `with` block (also when it raises)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._timers.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "counters": [{"name": name, "labels": dict(labels), "value": value}
+                             for (name, labels), value in sorted(self._counters.items())],
+                "timers": [{"name": name, "labels": dict(labels), "count": t[0], "sum": t[1], "max": t[2]}
+                           for (name, labels), t in sorted(self._timers.items())],
+            }
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format; timers are exported as summaries plus a `_max` gauge."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            timers = sorted(self._timers.items())
+        lines = []
+        declared = set()
+        for (name, labels), value in counters:
+            if name not in declared:
+                lines.append(f"# TYPE {name} counter")
+                declared.add(name)
+            lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        for (name, labels), (count, total, _) in timers:
+            if name not in declared:
+                lines.append(f"# TYPE {name} summary")
+                declared.add(name)
+            lines.append(f"{name}_count{_format_labels(labels)} {count:g}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total:.6f}")
+        for (name, labels), (_, _, peak) in timers:
+            if f"{name}_max" not in declared:
+                lines.append(f"# TYPE {name}_max gauge")
+                declared.add(f"{name}_max")
+            lines.append(f"{name}_max{_format_labels(labels)} {peak:.6f}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+# --- Sweep export ---
+
+def metrics_json_path() -> Path:
+    configured = _metrics_config().get('json_path') if config.available() else None
+    if configured:
+        return Path(configured)
+    from github_sentinel.components.db_manager import database_config
+    database = str(database_config()['path'])
+    directory = Path(database).parent if database != ":memory:" else Path(".")
+    return directory / DEFAULT_JSON_NAME
+
+
+def write_sweep_metrics(report, path: Path | None = None):
+    """
+    Merges the per-repo timings of `report` (a SweepReport) into the JSON
+    metrics file, together with the process metrics. A scheduler tick only
+    sweeps the repositories that are due, so every repository keeps the entry
+    of the sweep that last checked it, stamped with `checked_at`.
+    """
+    path = path or metrics_json_path()
+    finished_at = datetime.now(timezone.utc).isoformat()
+    try:
+        previous = load_sweep_metrics(path) or {}
+    except (OSError, ValueError):
+        previous = {}  # Unreadable or half-migrated file: start over
+    repos = {entry["repo_url"]: {"checked_at": previous.get("finished_at"), **entry}
+             for entry in previous.get("repos", [])}
+    for r in report.results:
+        repos[r.repo_url] = {"repo_url": r.repo_url, "checked_at": finished_at, "total": r.total,
+                             "timings": r.timings, "error": r.error}
+    data = {
+        "finished_at": finished_at,
+        "wall_seconds": report.wall_time,
+        "repos": list(repos.values()),
+        **metrics.snapshot(),
+    }
+    try:
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(data, indent=2))
+        tmp.replace(path)  # Readers never see a half-written file
+    except OSError as e:
+        print(f"Warning: Could not write metrics to {path}: {e}")
+
+
+def load_sweep_metrics(path: Path | None = None) -> dict | None:
+    path = path or metrics_json_path()
+    if not path.is_file():
+        return None
+    return json.loads(path.read_text())
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def stage_summary(repos: list[dict]) -> dict[str, dict[str, float]]:
+    """p50 / p95 / max seconds of each stage (and the total) over the repos of a sweep."""
+    samples: dict[str, list[float]] = {"total": [r["total"] for r in repos]}
+    for repo in repos:
+        for stage, seconds in repo["timings"].items():
+            samples.setdefault(stage, []).append(seconds)
+    return {stage: {"p50": percentile(values, 50), "p95": percentile(values, 95), "max": max(values, default=0.0)}
+            for stage, values in samples.items() if values}
+
+
+# --- Prometheus endpoint ---
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            body, content_type = metrics.to_prometheus().encode(), "text/plain; version=0.0.4"
+        elif self.path == "/metrics.json":
+            body, content_type = json.dumps(metrics.snapshot()).encode(), "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_metrics_server(port: int | None = None) -> ThreadingHTTPServer | None:
+    """
+    Serves /metrics (Prometheus text) and /metrics.json on `metrics.http_port`
+    from a daemon thread. Does nothing when no port is configured.
+    """
+    metrics_config = _metrics_config()
+    port = port or metrics_config.get('http_port')
+    if not port:
+        return None
+    server = ThreadingHTTPServer((metrics_config.get('http_host', '127.0.0.1'), int(port)), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="sentinel-metrics", daemon=True).start()
+    print(f"Serving metrics at http://{server.server_address[0]}:{server.server_address[1]}/metrics")
+    return server
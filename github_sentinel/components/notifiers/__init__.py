@@ -1,24 +1,71 @@
 from github_sentinel.components.config_loader import config
+from github_sentinel.components.metrics import metrics
+from .outbox import outbox_config
 from .slack_notifier import SlackNotifier
-# from .discord_notifier import DiscordNotifier # Uncomment when implemented
+from .discord_notifier import DiscordNotifier
 
-def dispatch_notification(report: str):
+
+def build_notifiers(session=None) -> list:
     """
-    Dispatches the report to all enabled notification channels.
+    Builds one notifier per enabled channel.
+    Channels that fail to initialize (e.g. missing webhook URL) are reported and skipped.
     """
-    print("Dispatching notifications...")
-    
+    notifiers = []
+
     if config.get('notifications', {}).get('slack', {}).get('enabled'):
         print("Slack notifier is enabled.")
         try:
-            SlackNotifier().send(report)
+            notifiers.append(SlackNotifier(session=session))
+        except Exception as e:
+            print(f"Error initializing Slack notifier: {e}")
+
+    if config.get('notifications', {}).get('discord', {}).get('enabled'):
+        print("Discord notifier is enabled.")
+        try:
+            notifiers.append(DiscordNotifier(session=session))
+        except Exception as e:
+            print(f"Error initializing Discord notifier: {e}")
+
+    return notifiers
+
+
+def dispatch_notification(report: str, repo_url: str | None = None, channels: list[str] | None = None,
+                          include_default: bool = True):
+    """
+    Dispatches the report to all enabled notification channels (unless
+    `include_default` is False) and to the given subscriber `channels`.
+    With the outbox enabled (the default) the report is only queued here and
+    delivered in the background; otherwise it is sent synchronously.
+    """
+    from github_sentinel.components.registry import (
+        refresh_subscriber_notifiers, shared_notifiers, shared_outbox, shared_subscriber_notifiers,
+    )
+
+    if outbox_config().get('enabled', True):
+        queued = shared_outbox().enqueue(report, repo_url, channels=channels, include_default=include_default)
+        if queued:
+            print(f"Queued the report for {queued} notification channel(s).")
+        return
+
+    print("Dispatching notifications...")
+
+    targets = list(shared_notifiers()) if include_default else []
+    if channels:
+        wanted = set(channels)
+        subscriber_notifiers = shared_subscriber_notifiers()
+        if wanted - {notifier.channel for notifier in subscriber_notifiers}:
+            refresh_subscriber_notifiers()  # Channels added since they were built
+        matched = [notifier for notifier in subscriber_notifiers if notifier.channel in wanted]
+        for channel in wanted - {notifier.channel for notifier in matched}:
+            metrics.inc("sentinel_notifications_total", channel=channel, result="failed")
+            print(f"Error sending to {channel}: the channel is not available.")
+        targets += matched
+    for notifier in targets:
+        channel = notifier.channel
+        try:
+            notifier.send(report)
         except Exception as e:
-            print(f"Error sending to Slack: {e}")
-    
-    # Example for Discord
-    # if config.get('notifications', {}).get('discord', {}).get('enabled'):
-    #     print("Discord notifier is enabled.")
-    #     try:
-    #         DiscordNotifier().send(report)
-    #     except Exception as e:
-    #         print(f"Error sending to Discord: {e}")
+            metrics.inc("sentinel_notifications_total", channel=channel, result="failed")
+            print(f"Error sending to {channel}: {e}")
+        else:
+            metrics.inc("sentinel_notifications_total", channel=channel, result="sent")
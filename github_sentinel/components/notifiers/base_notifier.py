@@ -1,14 +1,42 @@
 from abc import ABC, abstractmethod
 
+
+class NotificationError(Exception):
+    """
+    A message could not be delivered.
+    `retryable` is True for transient failures (429, 5xx, network errors);
+    `retry_after` carries the server's Retry-After delay in seconds, if any.
+    """
+
+    def __init__(self, message: str, retryable: bool = True, retry_after: float | None = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
 class BaseNotifier(ABC):
     """Abstract base class for all notifiers."""
 
+    # Outbox channel name; messages persisted for this channel are sent by this notifier.
+    channel = "base"
+    # Longest message the channel accepts; digests are packed to stay below it.
+    max_message_length = 3800
+
     @abstractmethod
-    def send(self, message: str):
+    def send(self, message: str, start: int = 0, progress=None):
         """
         Sends a message to the notification channel.
         
         Args:
             message (str): The content of the message to send.
+            start (int): Posts of the message already delivered by an earlier attempt; they are skipped.
+            progress (callable): Called with the number of posts delivered so far after each post.
+
+        Raises:
+            NotificationError: If the message could not be delivered.
         """
         pass
+
+    def post_count(self, message: str) -> int:
+        """How many posts `message` takes on this channel."""
+        return 1
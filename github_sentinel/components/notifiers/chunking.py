@@ -0,0 +1,76 @@
+"""
+Markdown-aware message splitting shared by the notifiers.
+
+Reports are split on their `##` section headings and the sections are packed
+into as few chunks as the channel's length limit allows. Only a section that
+is too long on its own is split further, by lines, with its heading repeated
+at the top of each continuation chunk.
+"""
+
+CONTINUED = "（续）"  # Reports are written in Chinese
+SECTION_SEPARATOR = "\n\n"
+
+
+def _sections(text: str) -> list[str]:
+    """Splits a report into its preamble and one block per `##` section."""
+    sections, current = [], []
+    for line in text.splitlines():
+        if line.startswith("## ") and current:
+            sections.append("\n".join(current).strip("\n"))
+            current = []
+        current.append(line)
+    if current:
+        sections.append("\n".join(current).strip("\n"))
+    return [section for section in sections if section.strip()]
+
+
+def _hard_split(line: str, limit: int) -> list[str]:
+    return [line[i:i + limit] for i in range(0, len(line), limit)] or [""]
+
+
+def _split_section(section: str, limit: int) -> list[str]:
+    """Splits one oversized section by lines, repeating its heading in every piece."""
+    lines = section.splitlines()
+    heading = lines[0] + CONTINUED if lines[0].startswith("## ") else None
+    if heading and len(heading) > limit // 2:
+        heading = None  # A giant heading would leave no room for content
+
+    pieces, current, size = [], [], 0
+    for line in lines:
+        for part in _hard_split(line, limit - (len(heading) + 1 if heading else 0)):
+            added = len(part) + (1 if current else 0)
+            if current and size + added > limit:
+                pieces.append("\n".join(current))
+                current, size = ([heading], len(heading)) if heading else ([], 0)
+                added = len(part) + (1 if current else 0)
+            current.append(part)
+            size += added
+    if current:
+        pieces.append("\n".join(current))
+    return pieces
+
+
+def split_markdown(text: str, limit: int) -> list[str]:
+    """
+    Splits `text` into chunks of at most `limit` characters, breaking between
+    `##` sections where possible. Chunks keep the original section order.
+    """
+    if len(text) <= limit:
+        return [text]
+
+    pieces = []
+    for section in _sections(text):
+        pieces.extend([section] if len(section) <= limit else _split_section(section, limit))
+
+    chunks, current, size = [], [], 0
+    for piece in pieces:
+        added = len(piece) + (len(SECTION_SEPARATOR) if current else 0)
+        if current and size + added > limit:
+            chunks.append(SECTION_SEPARATOR.join(current))
+            current, size = [], 0
+            added = len(piece)
+        current.append(piece)
+        size += added
+    if current:
+        chunks.append(SECTION_SEPARATOR.join(current))
+    return chunks
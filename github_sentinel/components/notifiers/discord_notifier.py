@@ -0,0 +1,24 @@
+from .webhook_notifier import WebhookNotifier
+
+# Discord rejects messages whose content is longer than 2000 characters.
+CONTENT_LIMIT = 2000
+
+
+class DiscordNotifier(WebhookNotifier):
+    """Posts reports to a Discord webhook, one message per 2000-character chunk (Discord renders Markdown)."""
+
+    channel = "discord"
+    chunk_length = CONTENT_LIMIT
+    max_message_length = CONTENT_LIMIT
+    # Discord webhooks allow about 5 requests per 2 seconds
+    default_min_interval_seconds = 0.5
+
+    def payloads(self, message: str) -> list[dict]:
+        return [{"content": chunk} for chunk in self.split(message)]
+
+    def retry_after(self, response):
+        # Discord puts a (fractional) retry_after in the JSON body of a 429
+        try:
+            return float(response.json()["retry_after"])
+        except (ValueError, KeyError, TypeError):
+            return super().retry_after(response)
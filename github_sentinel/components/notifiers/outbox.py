@@ -0,0 +1,347 @@
+"""
+Outbound notification queue.
+
+Reports are persisted to the `outbound_messages` table and delivered by
+background worker threads per channel, so a slow or failing webhook never
+stalls a sweep. Transient failures are retried with exponential backoff
+(honoring Retry-After), undelivered messages survive restarts, and with
+digests enabled several pending reports are combined into one post.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import and_, func, or_
+from github_sentinel.components.config_loader import config
+from github_sentinel.components.db_manager import get_db_session
+from github_sentinel.components.metrics import metrics
+from github_sentinel.models.outbound_message import OutboundMessage
+
+DEFAULT_WORKERS_PER_CHANNEL = 1
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_RETRY_BACKOFF_SECONDS = 30
+DEFAULT_MAX_RETRY_DELAY_SECONDS = 3600
+DEFAULT_LEASE_SECONDS = 120
+DEFAULT_POLL_SECONDS = 5
+DEFAULT_FLUSH_TIMEOUT_SECONDS = 60
+DEFAULT_DIGEST_MAX_REPORTS = 10
+DEFAULT_DIGEST_WINDOW_SECONDS = 30
+DIGEST_SEPARATOR = "\n\n---\n\n"
+
+
+def outbox_config() -> dict:
+    return (config.get('notifications', {}) or {}).get('outbox', {}) or {}
+
+
+class NotificationOutbox:
+    """
+    Persistent per-channel delivery queue in front of the notifiers.
+
+    `enqueue` only writes to the database; each channel's worker claims due
+    messages with a conditional UPDATE (so several processes can share the
+    table), sends them, and marks them sent, schedules a retry, or marks them
+    dead after `max_attempts` or a non-retryable error.
+    """
+
+    def __init__(self, notifiers: list, settings: dict | None = None, default_channels: list[str] | None = None,
+                 refresh=None):
+        """`refresh` returns notifiers for channels created since, looked up when a report names an unknown one."""
+        settings = outbox_config() if settings is None else settings
+        self.notifiers = {notifier.channel: notifier for notifier in notifiers}
+        # Channels that receive every report; the others (subscriber channels) only the ones addressed to them
+        self.default_channels = list(self.notifiers) if default_channels is None else list(default_channels)
+        self.workers_per_channel = max(1, int(settings.get('workers_per_channel', DEFAULT_WORKERS_PER_CHANNEL)))
+        self.max_attempts = int(settings.get('max_attempts', DEFAULT_MAX_ATTEMPTS))
+        self.retry_backoff_seconds = float(settings.get('retry_backoff_seconds', DEFAULT_RETRY_BACKOFF_SECONDS))
+        self.max_retry_delay_seconds = float(settings.get('max_retry_delay_seconds', DEFAULT_MAX_RETRY_DELAY_SECONDS))
+        self.lease_seconds = float(settings.get('lease_seconds', DEFAULT_LEASE_SECONDS))
+        self.poll_seconds = float(settings.get('poll_seconds', DEFAULT_POLL_SECONDS))
+        self.flush_timeout_seconds = float(settings.get('flush_timeout_seconds', DEFAULT_FLUSH_TIMEOUT_SECONDS))
+
+        digest_config = settings.get('digest', {}) or {}
+        self.digest = bool(digest_config.get('enabled', False))
+        self.digest_max_reports = max(1, int(digest_config.get('max_reports', DEFAULT_DIGEST_MAX_REPORTS)))
+        self.digest_window_seconds = float(digest_config.get('window_seconds', DEFAULT_DIGEST_WINDOW_SECONDS))
+
+        self._refresh = refresh
+        self._refresh_lock = threading.Lock()
+        self._started = False
+        self._stop = threading.Event()
+        self._flushing = threading.Event()
+        self._wake = {channel: threading.Event() for channel in self.notifiers}
+        self._threads: list[threading.Thread] = []
+
+    def _start_channel(self, channel: str):
+        for i in range(self.workers_per_channel):
+            thread = threading.Thread(target=self._run, args=(channel,), name=f"sentinel-outbox-{channel}-{i}",
+                                      daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def start(self) -> "NotificationOutbox":
+        """Starts the delivery threads of each channel; they also pick up messages left over from earlier runs."""
+        self._started = True
+        for channel in self.notifiers:
+            self._start_channel(channel)
+        return self
+
+    def add_notifiers(self, notifiers: list):
+        """Serves further channels from now on (starting their workers if the outbox runs)."""
+        for notifier in notifiers:
+            if notifier.channel in self.notifiers:
+                continue
+            self._wake[notifier.channel] = threading.Event()
+            self.notifiers[notifier.channel] = notifier
+            if self._started:
+                self._start_channel(notifier.channel)
+
+    def _resolve(self, channels) -> list[str]:
+        """`channels` this outbox does not serve, after looking for newly created ones."""
+        unknown = [channel for channel in channels if channel not in self.notifiers]
+        if unknown and self._refresh is not None:
+            with self._refresh_lock:
+                if any(channel not in self.notifiers for channel in unknown):
+                    self.add_notifiers(self._refresh())
+            unknown = [channel for channel in unknown if channel not in self.notifiers]
+        return unknown
+
+    def enqueue(self, message: str, repo_url: str | None = None, channels: list[str] | None = None,
+                include_default: bool = True) -> int:
+        """
+        Persists `message` once per target channel and wakes their workers.
+        The targets are the default channels (unless `include_default` is
+        False) plus `channels`. A channel no notifier serves is still
+        persisted, so the report is delivered once a process can serve it.
+        """
+        targets = list(self.default_channels) if include_default else []
+        for channel in self._resolve(channels or ()):
+            print(f"Warning: Notification channel '{channel}' is not available; its report is kept until it is.")
+        for channel in channels or ():
+            if channel not in targets:
+                targets.append(channel)
+        if not targets:
+            if include_default:
+                print("No notification channels are enabled; report not sent.")
+            return 0
+        now = datetime.now(timezone.utc)
+        session = get_db_session()
+        session.add_all(OutboundMessage(channel=channel, repo_url=repo_url, body=message, available_at=now, created_at=now)
+                        for channel in targets)
+        session.commit()
+        session.close()
+        for channel in targets:
+            if channel in self._wake:
+                self._wake[channel].set()
+        return len(targets)
+
+    # --- Claiming ---
+
+    @staticmethod
+    def _visible(channel: str, now: datetime):
+        """Messages ready to send: pending and due, or stuck in 'sending' past their lease (the sender died)."""
+        return and_(OutboundMessage.channel == channel, or_(
+            and_(OutboundMessage.status == "pending", OutboundMessage.available_at <= now),
+            and_(OutboundMessage.status == "sending", OutboundMessage.lease_until < now),
+        ))
+
+    def _pack(self, channel: str, candidates: list[OutboundMessage]) -> list[OutboundMessage]:
+        """
+        The longest prefix of `candidates` that fits in one post of `channel`.
+        Only single messages take several posts, so a partly delivered report
+        always resumes on its own.
+        """
+        notifier = self.notifiers[channel]
+        batch, size = [], 0
+        for message in candidates:
+            added = len(message.body) + (len(DIGEST_SEPARATOR) if batch else 0)
+            if batch:
+                if message.posts_sent or size + added > notifier.max_message_length:
+                    break
+                if notifier.post_count(DIGEST_SEPARATOR.join([m.body for m in batch] + [message.body])) > 1:
+                    break
+            batch.append(message)
+            size += added
+            if message.posts_sent:
+                break  # Partly delivered: resumes on its own
+        return batch
+
+    def _claim(self, channel: str) -> list[OutboundMessage]:
+        """
+        Claims the next message for `channel` (or the next digest of several).
+        With digests, a partial batch is held back until its oldest message has
+        waited `digest.window_seconds`, so reports of one sweep share a post.
+        """
+        session = get_db_session()
+        try:
+            now = datetime.now(timezone.utc)
+            limit = self.digest_max_reports if self.digest else 1
+            candidates = (session.query(OutboundMessage).filter(self._visible(channel, now))
+                          .order_by(OutboundMessage.id).limit(limit).all())
+            if not candidates:
+                return []
+            if self.digest and len(candidates) < limit and not self._flushing.is_set():
+                oldest = min(message.created_at for message in candidates)
+                if oldest > now - timedelta(seconds=self.digest_window_seconds):
+                    return []
+
+            claimed = []
+            for message in self._pack(channel, candidates):
+                updated = (session.query(OutboundMessage)
+                           .filter(OutboundMessage.id == message.id, self._visible(channel, now))
+                           .update({
+                               "status": "sending",
+                               "lease_until": now + timedelta(seconds=self.lease_seconds),
+                               "attempts": OutboundMessage.attempts + 1,
+                           }, synchronize_session=False))
+                if updated:
+                    claimed.append(message.id)
+            session.commit()
+            if not claimed:
+                return []
+            messages = (session.query(OutboundMessage).filter(OutboundMessage.id.in_(claimed))
+                        .order_by(OutboundMessage.id).all())
+            for message in messages:
+                session.expunge(message)
+            return messages
+        finally:
+            session.close()
+
+    # --- Delivery ---
+
+    def _retry_delay(self, attempts: int, retry_after: float | None) -> float:
+        if retry_after is not None:
+            return retry_after
+        return min(self.max_retry_delay_seconds, self.retry_backoff_seconds * 2 ** (attempts - 1))
+
+    def _deliver(self, channel: str, messages: list[OutboundMessage]) -> float | None:
+        """Sends one post; returns how long the channel should pause (Retry-After), if at all."""
+        notifier = self.notifiers[channel]
+        body = DIGEST_SEPARATOR.join(message.body for message in messages)
+        start, progress = 0, None
+        if len(messages) == 1:
+            start = messages[0].posts_sent or 0
+            progress = lambda posts: self._record_progress(messages[0].id, posts)
+        try:
+            with metrics.timer("sentinel_notification_send_seconds", channel=channel):
+                notifier.send(body, start=start, progress=progress)
+        except Exception as e:
+            # NotificationError says whether to retry; anything unexpected is retried too
+            retryable = getattr(e, "retryable", True)
+            retry_after = getattr(e, "retry_after", None)
+            self._record_failure(channel, messages, str(e), retryable, retry_after)
+            return retry_after
+
+        metrics.inc("sentinel_notification_posts_total", channel=channel)
+        metrics.inc("sentinel_notifications_total", len(messages), channel=channel, result="sent")
+        session = get_db_session()
+        session.query(OutboundMessage).filter(OutboundMessage.id.in_([m.id for m in messages])).update({
+            "status": "sent", "sent_at": datetime.now(timezone.utc), "lease_until": None, "last_error": None,
+        }, synchronize_session=False)
+        session.commit()
+        session.close()
+        if len(messages) > 1:
+            print(f"Sent a digest of {len(messages)} reports to {channel}.")
+        return None
+
+    @staticmethod
+    def _record_progress(message_id: int, posts: int):
+        """Persists how many posts of a message went out, so a retry does not repost them."""
+        session = get_db_session()
+        session.query(OutboundMessage).filter_by(id=message_id).update({"posts_sent": posts},
+                                                                       synchronize_session=False)
+        session.commit()
+        session.close()
+
+    def _record_failure(self, channel: str, messages: list[OutboundMessage], error: str, retryable: bool,
+                        retry_after: float | None):
+        session = get_db_session()
+        now = datetime.now(timezone.utc)
+        for message in messages:
+            values = {"last_error": error[:1000], "lease_until": None}
+            if not retryable or message.attempts >= self.max_attempts:
+                values.update(status="dead")
+                metrics.inc("sentinel_notifications_total", channel=channel, result="dead")
+                print(f"Giving up on a {channel} notification for {message.repo_url} after "
+                      f"{message.attempts} attempt(s): {error}")
+            else:
+                delay = self._retry_delay(message.attempts, retry_after)
+                values.update(status="pending", available_at=now + timedelta(seconds=delay))
+                metrics.inc("sentinel_notifications_total", channel=channel, result="retry")
+                print(f"{channel} notification for {message.repo_url} failed ({error}); retrying in {delay:.0f}s.")
+            session.query(OutboundMessage).filter_by(id=message.id).update(values, synchronize_session=False)
+        session.commit()
+        session.close()
+
+    def _run(self, channel: str):
+        wake = self._wake[channel]
+        idle_wait = min(self.poll_seconds, self.digest_window_seconds) if self.digest else self.poll_seconds
+        while not self._stop.is_set():
+            wake.clear()
+            try:
+                messages = self._claim(channel)
+                pause = self._deliver(channel, messages) if messages else None
+            except Exception as e:
+                # Database trouble: keep the thread alive; leased messages become visible again later
+                print(f"Error in the {channel} notification outbox: {e}")
+                messages, pause = [], None
+            if not messages:
+                wake.wait(idle_wait)
+            elif pause:
+                # A rate-limited webhook rejects everything until Retry-After has passed
+                self._stop.wait(pause)
+
+    # --- Shutdown and inspection ---
+
+    def _due_count(self) -> int:
+        """Messages of this process's channels that could be sent now or are being sent."""
+        session = get_db_session()
+        now = datetime.now(timezone.utc)
+        count = session.query(func.count(OutboundMessage.id)).filter(
+            OutboundMessage.channel.in_(list(self.notifiers)),
+            or_(and_(OutboundMessage.status == "pending", OutboundMessage.available_at <= now),
+                OutboundMessage.status == "sending"),
+        ).scalar()
+        session.close()
+        return count
+
+    def flush(self, timeout: float | None = None) -> int:
+        """
+        Sends everything that is due now (digests no longer wait for their window).
+        Returns how many messages are still undelivered after `timeout`.
+        """
+        if not self._threads:
+            return 0
+        self._flushing.set()
+        for wake in self._wake.values():
+            wake.set()
+        deadline = time.monotonic() + (self.flush_timeout_seconds if timeout is None else timeout)
+        remaining = self._due_count()
+        while remaining and time.monotonic() < deadline:
+            time.sleep(0.2)
+            remaining = self._due_count()
+        self._flushing.clear()
+        return remaining
+
+    def close(self):
+        """Flushes due messages, then stops the workers. Whatever is left is retried on the next start."""
+        remaining = self.flush()
+        if remaining:
+            print(f"{remaining} notification(s) not delivered yet; they will be retried on the next run.")
+        self._stop.set()
+        for wake in self._wake.values():
+            wake.set()
+        for thread in self._threads:
+            thread.join(timeout=15)
+        self._threads = []
+
+    @staticmethod
+    def stats() -> dict[str, dict[str, int]]:
+        """{channel: {status: count}} over the whole outbox table."""
+        session = get_db_session()
+        rows = (session.query(OutboundMessage.channel, OutboundMessage.status, func.count(OutboundMessage.id))
+                .group_by(OutboundMessage.channel, OutboundMessage.status).all())
+        session.close()
+        stats = {}
+        for channel, status, count in rows:
+            stats.setdefault(channel, {})[status] = count
+        return stats
@@ -1,25 +1,45 @@
-import requests
-from .base_notifier import BaseNotifier
-from ..config_loader import config
-
-class SlackNotifier(BaseNotifier):
-    def __init__(self):
-        self.webhook_url = config['notifications']['slack'].get('webhook_url')
-        if not self.webhook_url:
-            raise ValueError("Slack webhook URL is not configured in config.yaml")
-
-    def send(self, message: str):
-        # Slack has a message size limit, truncate if necessary
-        if len(message) > 3800:
-            message = message[:3800] + "\n\n... (message truncated)"
-
-        # Slack's 'mrkdwn' format is very similar to GitHub's Markdown
-        payload = {"text": message}
-        try:
-            response = requests.post(self.webhook_url, json=payload, timeout=10)
-            response.raise_for_status()
-            print("Successfully sent notification to Slack.")
-        except requests.exceptions.RequestException as e:
-            print(f"Failed to send Slack notification: {e}")
-            # Re-raise or handle as needed
-            raise
+import re
+from .webhook_notifier import WebhookNotifier
+
+# Slack rejects section blocks with more than 3000 characters of text.
+BLOCK_TEXT_LIMIT = 3000
+DEFAULT_BLOCKS_PER_MESSAGE = 4
+
+_HEADING = re.compile(r"^#{1,6} +(.+)$", re.MULTILINE)
+_BOLD = re.compile(r"\*\*(.+?)\*\*")
+_LINK = re.compile(r"\[([^\]]+)\]\((\S+?)\)")
+
+
+def to_mrkdwn(markdown: str) -> str:
+    """Converts the Markdown of a report to Slack's 'mrkdwn' (headings and bold become *bold*, links <url|text>)."""
+    text = _BOLD.sub(r"*\1*", markdown)
+    text = _HEADING.sub(r"*\1*", text)
+    return _LINK.sub(r"<\2|\1>", text)
+
+
+class SlackNotifier(WebhookNotifier):
+    """
+    Posts reports as Block Kit messages: the report is split into section
+    blocks on its `##` headings, and consecutive blocks are grouped into
+    messages of at most `blocks_per_message`, posted in order.
+    """
+
+    channel = "slack"
+    chunk_length = BLOCK_TEXT_LIMIT
+
+    def __init__(self, session=None, channel_config: dict | None = None, channel: str | None = None):
+        super().__init__(session=session, channel_config=channel_config, channel=channel)
+        self.blocks_per_message = max(1, int(self.channel_config.get('blocks_per_message', DEFAULT_BLOCKS_PER_MESSAGE)))
+        # Lets the outbox pack digests up to what one post can carry
+        self.max_message_length = BLOCK_TEXT_LIMIT * self.blocks_per_message
+
+    def payloads(self, message: str) -> list[dict]:
+        chunks = self.split(message)
+        payloads = []
+        for i in range(0, len(chunks), self.blocks_per_message):
+            group = chunks[i:i + self.blocks_per_message]
+            blocks = [{"type": "section", "text": {"type": "mrkdwn", "text": to_mrkdwn(chunk)}} for chunk in group]
+            # `text` is the fallback shown in notifications and clients without Block Kit
+            fallback = next((line for line in group[0].splitlines() if line.strip()), "GitHub Sentinel report")
+            payloads.append({"text": to_mrkdwn(fallback)[:150], "blocks": blocks})
+        return payloads
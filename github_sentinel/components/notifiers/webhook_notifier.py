@@ -0,0 +1,93 @@
+import threading
+import time
+from abc import abstractmethod
+import requests
+from .base_notifier import BaseNotifier, NotificationError
+from .chunking import split_markdown
+from ..config_loader import config
+
+
+class WebhookNotifier(BaseNotifier):
+    """
+    Base class for notifiers that post JSON to an incoming webhook.
+
+    A report is split into chunks of at most `chunk_length` characters on its
+    `##` sections (see `chunking.split_markdown`), each chunk becomes one post
+    built by `payloads`, and posts are sent in order over the shared session,
+    at most one every `min_interval_seconds`. A retried message resumes
+    after the posts that already went out.
+    """
+
+    chunk_length = 2000
+    default_min_interval_seconds = 1.0
+
+    def __init__(self, session: requests.Session | None = None, channel_config: dict | None = None,
+                 channel: str | None = None):
+        """
+        `channel_config` defaults to the channel's section of config.yaml;
+        subscriber channels pass their own, with a unique `channel` name.
+        """
+        if channel_config is None:
+            channel_config = config['notifications'][self.channel]
+        if channel is not None:
+            self.channel = channel
+        self.channel_config = channel_config
+        self.webhook_url = channel_config.get('webhook_url')
+        if not self.webhook_url:
+            raise ValueError(f"{self.channel.capitalize()} webhook URL is not configured in config.yaml")
+        # A shared keep-alive session avoids a new TLS handshake per report
+        self.session = session or requests.Session()
+        self.min_interval_seconds = float(channel_config.get('min_interval_seconds', self.default_min_interval_seconds))
+        self._pace_lock = threading.Lock()
+        self._next_post_at = 0.0
+
+    @abstractmethod
+    def payloads(self, message: str) -> list[dict]:
+        """One JSON payload per post, in order."""
+
+    def post_count(self, message: str) -> int:
+        return len(self.payloads(message))
+
+    def retry_after(self, response: requests.Response) -> float | None:
+        value = response.headers.get("Retry-After")
+        try:
+            return float(value) if value else None
+        except ValueError:
+            return None
+
+    def _pace(self):
+        """Blocks until this channel may post again (webhooks allow roughly one post per second)."""
+        with self._pace_lock:
+            now = time.monotonic()
+            wait = max(0.0, self._next_post_at - now)
+            self._next_post_at = max(now, self._next_post_at) + self.min_interval_seconds
+        if wait:
+            time.sleep(wait)
+
+    def _post(self, payload: dict):
+        self._pace()
+        try:
+            response = self.session.post(self.webhook_url, json=payload, timeout=10)
+        except requests.exceptions.RequestException as e:
+            print(f"Failed to send {self.channel} notification: {e}")
+            raise NotificationError(f"{self.channel} webhook request failed: {e}") from e
+
+        if response.status_code == 429 or response.status_code >= 500:
+            raise NotificationError(f"{self.channel} webhook returned {response.status_code}",
+                                    retry_after=self.retry_after(response))
+        if response.status_code >= 400:
+            # Bad payload, revoked webhook, ...: retrying will not help
+            raise NotificationError(f"{self.channel} webhook returned {response.status_code}: {response.text[:200]}",
+                                    retryable=False)
+
+    def send(self, message: str, start: int = 0, progress=None):
+        payloads = self.payloads(message)
+        for index in range(start, len(payloads)):
+            self._post(payloads[index])
+            if progress is not None:
+                progress(index + 1)
+        resumed = f", resumed after {start}" if start else ""
+        print(f"Successfully sent notification to {self.channel.capitalize()} ({len(payloads)} message(s){resumed}).")
+
+    def split(self, message: str) -> list[str]:
+        return split_markdown(message, self.chunk_length)
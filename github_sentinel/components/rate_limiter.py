@@ -0,0 +1,227 @@
+import itertools
+import threading
+import time
+import requests
+from github_sentinel.components.metrics import metrics
+
+DEFAULT_RESERVE = 50
+DEFAULT_MAX_RETRIES = 3
+# Start spreading requests over the reset window once less than this share of the budget is left.
+DEFAULT_PACE_BELOW = 0.2
+# GitHub asks clients to wait at least a minute after a secondary rate limit without Retry-After.
+SECONDARY_LIMIT_BACKOFF = 60.0
+# REST and GraphQL calls are metered separately (X-RateLimit-Resource), even on the same token.
+CORE_RESOURCE = "core"
+GRAPHQL_RESOURCE = "graphql"
+
+
+class TokenBudget:
+    """Last known primary rate-limit state of one token for one resource (core, graphql, ...)."""
+
+    def __init__(self, token: str, resource: str = CORE_RESOURCE):
+        self.token = token
+        self.resource = resource
+        self.limit: int | None = None
+        self.remaining: int | None = None
+        self.reset_at: float | None = None  # epoch seconds
+        self.next_allowed_at = 0.0
+        self.lock = threading.Lock()
+
+    def seconds_to_reset(self, now: float) -> float:
+        return max(0.0, (self.reset_at or now) - now)
+
+
+class RateLimitGovernor:
+    """
+    Shared rate-limit governor for every GitHub call made by a sweep.
+
+    It tracks X-RateLimit-* headers per token and resource, paces requests so
+    a low budget is spread over the remaining reset window instead of being
+    exhausted mid-sweep, backs off on 403/429 (honoring Retry-After), and hands out
+    tokens round-robin or per organization.
+    """
+
+    def __init__(self, tokens: list[str], strategy: str = "round_robin", org_tokens: dict | None = None,
+                 reserve: int = DEFAULT_RESERVE, max_retries: int = DEFAULT_MAX_RETRIES,
+                 pace_below: float = DEFAULT_PACE_BELOW):
+        if not tokens:
+            raise ValueError("At least one GitHub token is required.")
+        self.tokens = list(dict.fromkeys(tokens))
+        self.strategy = strategy
+        self.org_tokens = {org.lower(): token for org, token in (org_tokens or {}).items()}
+        self.budgets: dict[tuple[str, str], TokenBudget] = {}  # (token, resource) -> budget
+        self._budgets_lock = threading.Lock()
+        self.reserve = reserve
+        self.max_retries = max_retries
+        self.pace_below = pace_below
+        self._cycle = itertools.cycle(self.tokens)
+        self._cycle_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, github_config: dict) -> "RateLimitGovernor":
+        # `token` is optional when `tokens` lists them all
+        tokens = [github_config.get('token')] + list(github_config.get('tokens', []) or [])
+        limits = github_config.get('rate_limit', {}) or {}
+        return cls(
+            tokens=[t for t in tokens if t],
+            strategy=github_config.get('token_strategy', 'round_robin'),
+            org_tokens=github_config.get('org_tokens'),
+            reserve=int(limits.get('reserve', DEFAULT_RESERVE)),
+            max_retries=int(limits.get('max_retries', DEFAULT_MAX_RETRIES)),
+            pace_below=float(limits.get('pace_below', DEFAULT_PACE_BELOW)),
+        )
+
+    def budget(self, token: str, resource: str = CORE_RESOURCE) -> TokenBudget:
+        with self._budgets_lock:
+            budget = self.budgets.get((token, resource))
+            if budget is None:
+                budget = self.budgets[(token, resource)] = TokenBudget(token, resource)
+            return budget
+
+    # --- Token selection ---
+
+    def _exhausted(self, budget: TokenBudget, now: float) -> bool:
+        return (budget.remaining is not None and budget.remaining <= self.reserve
+                and budget.seconds_to_reset(now) > 0)
+
+    def token_for(self, repo_name: str | None = None, resource: str = CORE_RESOURCE) -> str:
+        """Picks the token to use for `repo_name` ("owner/repo") when calling `resource`."""
+        if self.strategy == "per_org" and repo_name:
+            token = self.org_tokens.get(repo_name.split('/', 1)[0].lower())
+            if token:
+                return token
+
+        # Round-robin, skipping tokens whose budget is used up until their reset.
+        now = time.time()
+        with self._cycle_lock:
+            for _ in range(len(self.tokens)):
+                token = next(self._cycle)
+                if not self._exhausted(self.budget(token, resource), now):
+                    return token
+        # All exhausted: the one that resets first.
+        return min((self.budget(token, resource) for token in self.tokens), key=lambda b: b.reset_at or 0).token
+
+    # --- Pacing ---
+
+    def acquire(self, token: str, cost: int = 1, resource: str = CORE_RESOURCE):
+        """
+        Blocks until `token` may spend `cost` requests on `resource`. Each caller
+        reserves its own slot, so concurrent callers are spaced `interval` apart
+        instead of all waking up together.
+        """
+        budget = self.budget(token, resource)
+        with budget.lock:
+            now = time.time()
+            earliest, interval = now, 0.0
+
+            if budget.remaining is not None and budget.limit:
+                window = budget.seconds_to_reset(now)
+                usable = budget.remaining - self.reserve
+                if usable < cost and window > 0:
+                    # Out of budget: wait for the reset.
+                    earliest = now + window
+                    budget.remaining = None
+                elif budget.remaining < budget.limit * self.pace_below and window > 0:
+                    # Spread what is left evenly over the rest of the window.
+                    interval = window * cost / max(usable, 1)
+                if budget.remaining is not None:
+                    budget.remaining -= cost
+
+            slot = max(earliest, budget.next_allowed_at)
+            budget.next_allowed_at = slot + interval
+            delay = slot - now
+        if delay > 0:
+            if delay >= 5:
+                print(f"Rate limit: pacing GitHub requests, waiting {delay:.0f}s...")
+            time.sleep(delay)
+
+    def observe(self, token: str, remaining: int | None, limit: int | None, reset_at: float | None,
+                resource: str = CORE_RESOURCE):
+        """Records rate-limit state reported by GitHub for `token` on `resource`."""
+        budget = self.budget(token, resource)
+        with budget.lock:
+            if remaining is not None:
+                budget.remaining = remaining
+            if limit is not None:
+                budget.limit = limit
+            if reset_at is not None:
+                budget.reset_at = reset_at
+
+    def observe_headers(self, token: str, headers, resource: str = CORE_RESOURCE):
+        def as_int(name):
+            value = headers.get(name)
+            return int(value) if value is not None and str(value).isdigit() else None
+        # GitHub names the budget a response was charged to; trust it over the caller's guess
+        resource = headers.get("X-RateLimit-Resource") or resource
+        self.observe(token, as_int("X-RateLimit-Remaining"), as_int("X-RateLimit-Limit"), as_int("X-RateLimit-Reset"),
+                     resource=resource)
+
+    def backoff_seconds(self, response: requests.Response, attempt: int) -> float | None:
+        """How long to wait before retrying `response`, or None if it should not be retried."""
+        if response.status_code not in (403, 429):
+            return None
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        if response.headers.get("X-RateLimit-Remaining") == "0":
+            reset = response.headers.get("X-RateLimit-Reset")
+            if reset and reset.isdigit():
+                return max(1.0, int(reset) - time.time())
+        if response.status_code == 429 or "secondary rate limit" in response.text.lower():
+            return SECONDARY_LIMIT_BACKOFF * (2 ** attempt)
+        return None  # A plain permission error
+
+    # --- Requests ---
+
+    def request(self, session: requests.Session, method: str, url: str, token: str,
+                resource: str = CORE_RESOURCE, **kwargs) -> requests.Response:
+        """
+        Sends a request through `session` with `token`, pacing it against the
+        token's `resource` budget and retrying rate-limited responses with backoff.
+        """
+        headers = dict(kwargs.pop("headers", {}) or {})
+        headers.setdefault("Authorization", f"token {token}")
+        for attempt in range(self.max_retries + 1):
+            self.acquire(token, resource=resource)
+            with metrics.timer("sentinel_github_request_seconds"):
+                response = session.request(method, url, headers=headers, **kwargs)
+            metrics.inc("sentinel_github_requests_total", status=response.status_code)
+            self.observe_headers(token, response.headers, resource)
+            delay = self.backoff_seconds(response, attempt)
+            if delay is None or attempt == self.max_retries:
+                return response
+            metrics.inc("sentinel_github_retries_total")
+            print(f"Rate limited by GitHub ({response.status_code}) on {url}, retrying in {delay:.0f}s...")
+            time.sleep(delay)
+        return response
+
+
+class RequestRateLimiter:
+    """
+    Sliding one-minute window limiter for requests-per-minute and
+    tokens-per-minute quotas (e.g. an LLM provider's RPM/TPM limits).
+    A limit of 0 disables that dimension.
+    """
+
+    def __init__(self, requests_per_minute: int = 0, tokens_per_minute: int = 0):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._events: list[tuple[float, int]] = []  # (timestamp, tokens)
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int = 0):
+        """Blocks until a request costing `tokens` fits within both quotas."""
+        if tokens > self.tokens_per_minute > 0:
+            tokens = self.tokens_per_minute  # A single oversized request must still be allowed through
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._events = [(ts, n) for ts, n in self._events if now - ts < 60]
+                used_tokens = sum(n for _, n in self._events)
+                over_requests = 0 < self.requests_per_minute <= len(self._events)
+                over_tokens = self.tokens_per_minute > 0 and used_tokens + tokens > self.tokens_per_minute
+                if not over_requests and not over_tokens:
+                    self._events.append((now, tokens))
+                    return
+                wait = 60 - (now - self._events[0][0]) if self._events else 0.1
+            time.sleep(max(wait, 0.05))
@@ -0,0 +1,157 @@
+"""
+Process-wide registry of long-lived components.
+
+GitHub clients, LLM clients, notifiers and HTTP sessions are expensive to
+build (new connection pools, TLS handshakes), so they are created lazily once
+per process, shared by every worker thread of a sweep, and torn down together
+by `close_shared_components()`.
+"""
+
+import atexit
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from github_sentinel.components.config_loader import config
+
+_lock = threading.RLock()
+_components: dict = {}
+
+
+def _pool_size() -> int:
+    """Keep-alive pool size: enough connections for every sweep worker."""
+    return max(10, int((config.get('concurrency', {}) or {}).get('max_workers', 8)))
+
+
+def _get_or_create(name: str, factory):
+    with _lock:
+        if name not in _components:
+            _components[name] = factory()
+        return _components[name]
+
+
+def shared_http_session() -> requests.Session:
+    """Pooled keep-alive `requests` session used for webhooks and raw GitHub API calls."""
+    def build():
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=_pool_size(), pool_maxsize=_pool_size())
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+    return _get_or_create("http_session", build)
+
+
+def shared_llm_http_client():
+    """Pooled keep-alive `httpx` client for the OpenAI SDK (which does not use `requests`)."""
+    def build():
+        import httpx
+        limits = httpx.Limits(max_connections=_pool_size(), max_keepalive_connections=_pool_size())
+        return httpx.Client(limits=limits, timeout=httpx.Timeout(60.0, connect=10.0))
+    return _get_or_create("llm_http_client", build)
+
+
+def shared_rate_limiter():
+    """The fleet-wide GitHub rate-limit governor, shared by every fetch backend."""
+    from github_sentinel.components.rate_limiter import RateLimitGovernor
+    return _get_or_create("rate_limiter", lambda: RateLimitGovernor.from_config(config['github']))
+
+
+def shared_github_client():
+    """The single `GitHubClient` shared by all sweeps in this process."""
+    from github_sentinel.components.github_client import GitHubClient
+    return _get_or_create("github_client", lambda: GitHubClient(
+        session=shared_http_session(), governor=shared_rate_limiter()))
+
+
+def shared_fetcher():
+    """
+    The configured fetch backend (`github.backend`): the REST `GitHubClient`
+    by default, or the batching `GraphQLBatchClient` for "graphql".
+    """
+    backend = config['github'].get('backend', 'rest')
+    if backend == 'graphql':
+        from github_sentinel.components.graphql_client import GraphQLBatchClient
+        return _get_or_create("graphql_client", lambda: GraphQLBatchClient(
+            session=shared_http_session(), governor=shared_rate_limiter()))
+    if backend != 'rest':
+        print(f"Warning: Unknown github.backend '{backend}' in config. Defaulting to 'rest'.")
+    return shared_github_client()
+
+
+def shared_summarizer(summarizer_type: str | None = None):
+    """The configured summarizer (or the one of `summarizer_type`, as chosen by a subscriber), built once."""
+    from github_sentinel.components.summarizer import get_summarizer
+    if summarizer_type is None:
+        return _get_or_create("summarizer", get_summarizer)
+    return _get_or_create(f"summarizer:{summarizer_type}", lambda: get_summarizer(summarizer_type))
+
+
+def shared_notifiers() -> list:
+    """All enabled notifiers, built once. Misconfigured channels are reported and skipped."""
+    def build():
+        from github_sentinel.components.notifiers import build_notifiers
+        return build_notifiers(session=shared_http_session())
+    return _get_or_create("notifiers", build)
+
+
+def shared_subscriber_notifiers() -> list:
+    """The notifiers of every subscriber channel in the database, built once."""
+    def build():
+        from github_sentinel.components.subscribers import build_subscriber_notifiers
+        return build_subscriber_notifiers(session=shared_http_session())
+    return _get_or_create("subscriber_notifiers", build)
+
+
+def refresh_subscriber_notifiers() -> list:
+    """
+    Builds notifiers for subscriber channels added since `shared_subscriber_notifiers`
+    was built (e.g. by the CLI while the scheduler runs) and returns the new ones.
+    """
+    from github_sentinel.components.subscribers import build_subscriber_notifiers
+    with _lock:
+        current = shared_subscriber_notifiers()
+        known = {notifier.channel for notifier in current}
+        added = [notifier for notifier in build_subscriber_notifiers(session=shared_http_session())
+                 if notifier.channel not in known]
+        current.extend(added)
+        return added
+
+
+def shared_outbox():
+    """
+    The notification outbox with its per-channel delivery threads, started
+    once. Besides the config.yaml channels (which get every report) it serves
+    the subscriber channels, picking up ones added later when a report is
+    addressed to them.
+    """
+    def build():
+        from github_sentinel.components.notifiers.outbox import NotificationOutbox
+        defaults = shared_notifiers()
+        return NotificationOutbox(defaults + shared_subscriber_notifiers(),
+                                  default_channels=[notifier.channel for notifier in defaults],
+                                  refresh=refresh_subscriber_notifiers).start()
+    return _get_or_create("outbox", build)
+
+
+def close_shared_components():
+    """
+    Closes every component that was built, releasing pooled connections.
+    Components are closed in reverse order of creation, so e.g. the outbox
+    flushes before the HTTP session its notifiers use is closed.
+    """
+    with _lock:
+        components = list(_components.items())[::-1]
+        _components.clear()
+
+    for name, component in components:
+        items = component if isinstance(component, list) else [component]
+        for item in items:
+            close = getattr(item, "close", None)
+            if close is None:
+                continue
+            try:
+                close()
+            except Exception as e:
+                print(f"Warning: Failed to close {name}: {e}")
+
+
+atexit.register(close_shared_components)
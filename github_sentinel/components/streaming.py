@@ -0,0 +1,42 @@
+"""
+Helpers for the streaming fetch mode: listings are consumed lazily and only
+the first few items (the ones a report actually shows) are kept in memory.
+"""
+
+DEFAULT_DISPLAY_LIMITS = {"commits": 15, "pull_requests": 30, "issues": 30, "releases": 10}
+
+_EXHAUSTED = object()
+
+
+class UpdateList(list):
+    """
+    A list of the items kept for a report, plus how many more exist.
+    `remaining` counts the items that were not kept; `exact` is False when that
+    count is only a lower bound (pagination stopped before the end).
+    """
+
+    def __init__(self, items=(), remaining: int = 0, exact: bool = True):
+        super().__init__(items)
+        self.remaining = remaining
+        self.exact = exact
+
+
+def take(iterator, limit: int) -> tuple[list, bool]:
+    """
+    Takes up to `limit` items from `iterator`. Returns (items, has_more), where
+    `has_more` peeks one item ahead (fetching at most one more page).
+    """
+    items = []
+    for item in iterator:
+        items.append(item)
+        if len(items) >= limit:
+            break
+    if len(items) < limit:
+        return items, False
+    return items, next(iterator, _EXHAUSTED) is not _EXHAUSTED
+
+
+def display_limits(fetch_config: dict) -> dict[str, int]:
+    limits = dict(DEFAULT_DISPLAY_LIMITS)
+    limits.update((fetch_config or {}).get('display_limits', {}) or {})
+    return {kind: max(1, int(limit)) for kind, limit in limits.items()}
@@ -0,0 +1,215 @@
+"""
+Subscribers: several teams following the same repositories.
+
+A repository keeps a single `Subscription`, so it is fetched once per check
+no matter how many subscribers follow it. Its followers are grouped into
+audiences that need the same report (same summarizer, same filters); each
+audience's report is summarized once and fanned out to the channels of all
+its members. The channels of config.yaml (`notifications`) keep receiving the
+unfiltered report of every repository, as before.
+"""
+
+import json
+from dataclasses import dataclass, field
+from github_sentinel.components.config_loader import config
+from github_sentinel.components.db_manager import add_subscriptions, canonical_repo_urls, session_scope
+from github_sentinel.models.subscriber import Subscriber, SubscriberChannel, SubscriberRepo
+from github_sentinel.models.subscription import Subscription
+
+CHANNEL_TYPES = ("slack", "discord")
+SUMMARIZER_TYPES = ("simple", "ai")
+ACTIVITY_TYPES = ("commits", "issues", "pull_requests", "releases")
+
+
+@dataclass
+class Audience:
+    """Recipients of one report variant of a repository."""
+    summarizer: str | None = None  # None: the configured default
+    filters: dict = field(default_factory=dict)
+    channels: list[str] = field(default_factory=list)  # Subscriber channel keys
+    include_default: bool = False  # Also the channels of config.yaml
+
+    @property
+    def primary(self) -> bool:
+        """The unfiltered report of the default summarizer, which every sweep produces anyway."""
+        return self.summarizer is None and not self.filters
+
+
+# --- Filters ---
+
+def validate_filters(filters: dict) -> dict:
+    """Keeps the supported keys: `types` (activity types to report) and `exclude_authors`."""
+    clean = {}
+    types = filters.get("types")
+    if types:
+        unknown = set(types) - set(ACTIVITY_TYPES)
+        if unknown:
+            raise ValueError(f"Unknown activity type(s) {sorted(unknown)}; use {', '.join(ACTIVITY_TYPES)}.")
+        clean["types"] = sorted(set(types))
+    authors = filters.get("exclude_authors")
+    if authors:
+        clean["exclude_authors"] = sorted({author.lower() for author in authors})
+    return clean
+
+
+def _author(item) -> str:
+    return (item.get("author") or item.get("user") or "").lower()
+
+
+def apply_filters(updates: dict, filters: dict) -> dict:
+    """The part of `updates` an audience with `filters` gets to see."""
+    if not filters:
+        return updates
+    types = set(filters.get("types") or ACTIVITY_TYPES)
+    excluded = set(filters.get("exclude_authors") or ())
+    return {kind: ([item for item in items if _author(item) not in excluded] if kind in types and items else [])
+            for kind, items in updates.items()}
+
+
+# --- Audiences ---
+
+def audiences_for(subscription_id: int) -> list[Audience]:
+    """
+    The audiences of one repository: the config.yaml channels plus every
+    follower, grouped by (summarizer, filters). The primary audience comes first.
+    """
+    with session_scope() as session:
+        rows = (session.query(SubscriberRepo, Subscriber)
+                .join(Subscriber, Subscriber.id == SubscriberRepo.subscriber_id)
+                .filter(SubscriberRepo.subscription_id == subscription_id).all())
+        subscriber_ids = [subscriber.id for _, subscriber in rows]
+        channels = (session.query(SubscriberChannel).filter(SubscriberChannel.subscriber_id.in_(subscriber_ids)).all()
+                    if subscriber_ids else [])
+
+    keys_by_subscriber = {}
+    for channel in channels:
+        keys_by_subscriber.setdefault(channel.subscriber_id, []).append(channel.key)
+
+    default_summarizer = (config.get('summarizer', {}) or {}).get('type', 'simple')
+    groups = {(None, "{}"): Audience(include_default=True)}
+    for follow, subscriber in rows:
+        filters = json.loads(follow.filters) if follow.filters else {}
+        # Choosing the configured summarizer explicitly is the same as not choosing one
+        summarizer = subscriber.summarizer if subscriber.summarizer != default_summarizer else None
+        key = (summarizer, json.dumps(filters, sort_keys=True))
+        audience = groups.setdefault(key, Audience(summarizer=summarizer, filters=filters))
+        audience.channels.extend(keys_by_subscriber.get(subscriber.id, []))
+    return [audience for audience in groups.values() if audience.include_default or audience.channels]
+
+
+# --- Management ---
+
+def add_subscriber(name: str, summarizer: str | None = None) -> bool:
+    if summarizer is not None and summarizer not in SUMMARIZER_TYPES:
+        raise ValueError(f"Unknown summarizer '{summarizer}'; use {' or '.join(SUMMARIZER_TYPES)}.")
+    with session_scope() as session:
+        if session.query(Subscriber).filter_by(name=name).first():
+            return False
+        session.add(Subscriber(name=name, summarizer=summarizer))
+    return True
+
+
+def _subscriber(session, name: str) -> Subscriber:
+    subscriber = session.query(Subscriber).filter_by(name=name).first()
+    if subscriber is None:
+        raise ValueError(f"Subscriber '{name}' does not exist. Create it with 'subscriber add {name}'.")
+    return subscriber
+
+
+def remove_subscriber(name: str):
+    """Removes the subscriber with its channels and follows; the repositories stay subscribed."""
+    with session_scope() as session:
+        subscriber = _subscriber(session, name)
+        session.query(SubscriberChannel).filter_by(subscriber_id=subscriber.id).delete()
+        session.query(SubscriberRepo).filter_by(subscriber_id=subscriber.id).delete()
+        session.delete(subscriber)
+
+
+def add_channel(name: str, channel_type: str, webhook_url: str, options: dict | None = None) -> str:
+    """Adds a delivery channel to a subscriber; returns its outbox channel key."""
+    if channel_type not in CHANNEL_TYPES:
+        raise ValueError(f"Unknown channel type '{channel_type}'; use {' or '.join(CHANNEL_TYPES)}.")
+    with session_scope() as session:
+        subscriber = _subscriber(session, name)
+        channel = SubscriberChannel(subscriber_id=subscriber.id, type=channel_type, webhook_url=webhook_url,
+                                    options=json.dumps(options) if options else None)
+        session.add(channel)
+        session.flush()
+        return channel.key
+
+
+def follow(name: str, repo_urls: list[str], schedule: str = "daily", filters: dict | None = None) -> int:
+    """
+    Makes a subscriber follow repositories (subscribing the ones nobody
+    followed yet) with the given filters; returns how many follows were added.
+    Following again replaces the filters.
+    """
+    filters_json = json.dumps(validate_filters(filters or {}), sort_keys=True)
+    filters_value = filters_json if filters_json != "{}" else None
+    with session_scope() as session:
+        _subscriber(session, name)
+    urls = canonical_repo_urls(repo_urls)
+    add_subscriptions([(url, schedule) for url in urls])
+
+    added = 0
+    with session_scope() as session:
+        subscriber = _subscriber(session, name)
+        subscriptions = session.query(Subscription).filter(Subscription.repo_url.in_(urls)).all()
+        existing = {row.subscription_id: row for row in
+                    session.query(SubscriberRepo).filter_by(subscriber_id=subscriber.id).all()}
+        for subscription in subscriptions:
+            row = existing.get(subscription.id)
+            if row is None:
+                session.add(SubscriberRepo(subscriber_id=subscriber.id, subscription_id=subscription.id,
+                                           filters=filters_value))
+                added += 1
+            else:
+                row.filters = filters_value
+    return added
+
+
+def unfollow(name: str, repo_urls: list[str]) -> int:
+    with session_scope() as session:
+        subscriber = _subscriber(session, name)
+        urls = canonical_repo_urls(repo_urls)
+        ids = [sub_id for (sub_id,) in session.query(Subscription.id).filter(Subscription.repo_url.in_(urls)).all()]
+        return (session.query(SubscriberRepo)
+                .filter(SubscriberRepo.subscriber_id == subscriber.id, SubscriberRepo.subscription_id.in_(ids))
+                .delete(synchronize_session=False))
+
+
+def list_subscribers() -> list[dict]:
+    """Every subscriber with its channels and followed repositories (and their filters)."""
+    with session_scope() as session:
+        subscribers = session.query(Subscriber).order_by(Subscriber.name).all()
+        channels = session.query(SubscriberChannel).all()
+        follows = (session.query(SubscriberRepo, Subscription.repo_url)
+                   .join(Subscription, Subscription.id == SubscriberRepo.subscription_id).all())
+    result = []
+    for subscriber in subscribers:
+        result.append({
+            "name": subscriber.name,
+            "summarizer": subscriber.summarizer,
+            "channels": [channel.key for channel in channels if channel.subscriber_id == subscriber.id],
+            "repos": {url: json.loads(row.filters) if row.filters else {}
+                      for row, url in follows if row.subscriber_id == subscriber.id},
+        })
+    return result
+
+
+def build_subscriber_notifiers(session=None) -> list:
+    """One notifier per subscriber channel, named by its channel key; broken ones are reported and skipped."""
+    from github_sentinel.components.notifiers.discord_notifier import DiscordNotifier
+    from github_sentinel.components.notifiers.slack_notifier import SlackNotifier
+    classes = {"slack": SlackNotifier, "discord": DiscordNotifier}
+
+    with session_scope() as db:
+        channels = db.query(SubscriberChannel).all()
+    notifiers = []
+    for channel in channels:
+        settings = {**(json.loads(channel.options) if channel.options else {}), "webhook_url": channel.webhook_url}
+        try:
+            notifiers.append(classes[channel.type](session=session, channel_config=settings, channel=channel.key))
+        except Exception as e:
+            print(f"Error initializing subscriber channel {channel.key}: {e}")
+    return notifiers
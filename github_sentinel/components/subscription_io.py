@@ -0,0 +1,125 @@
+"""
+Bulk import and export of subscriptions.
+
+Accepted input formats:
+  - text: one repository per line, optionally followed by its schedule
+    ("https://github.com/owner/repo 6h"); blank lines and `#` comments are skipped,
+  - csv: `repo_url,schedule` rows, with or without a header,
+  - yaml: a list of URLs or of `{repo_url, schedule}` mappings, optionally
+    under a top-level `subscriptions` key (the shape `export` writes).
+
+Repositories may be given as full URLs or as "owner/repo".
+"""
+
+import csv
+import io
+from pathlib import Path
+import yaml
+from github_sentinel.core.schedules import parse_schedule
+
+FORMATS = ("text", "csv", "yaml")
+_EXTENSIONS = {".csv": "csv", ".yaml": "yaml", ".yml": "yaml", ".txt": "text"}
+
+
+def detect_format(path: str | None, fmt: str | None = None) -> str:
+    """The explicit `fmt`, else the one implied by the file extension, else text."""
+    if fmt:
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format '{fmt}'. Use one of: {', '.join(FORMATS)}.")
+        return fmt
+    return _EXTENSIONS.get(Path(path).suffix.lower(), "text") if path else "text"
+
+
+def normalize_repo_url(value: str) -> str:
+    """
+    'owner/repo', 'github.com/owner/repo' or an HTTPS or SSH clone URL
+    ('git@github.com:owner/repo.git', 'ssh://git@github.com/owner/repo')
+    -> 'https://github.com/owner/repo'.
+    """
+    name = value.strip()
+    for prefix in ("https://", "http://", "ssh://"):
+        if name.startswith(prefix):
+            name = name[len(prefix):]
+    if name.startswith("git@"):
+        name = name[len("git@"):]
+    if name.startswith("www."):
+        name = name[len("www."):]
+    for host in ("github.com/", "github.com:"):
+        if name.startswith(host):
+            name = name[len(host):]
+    name = name.strip("/")
+    if name.endswith(".git"):
+        name = name[:-len(".git")]
+    parts = name.split("/")
+    if len(parts) != 2 or not all(parts) or any(c in name for c in "@:"):
+        raise ValueError(f"'{value}' is not a GitHub repository (expected owner/repo or its URL).")
+    return f"https://github.com/{parts[0]}/{parts[1]}"
+
+
+def _text_entries(text: str):
+    for number, line in enumerate(text.splitlines(), start=1):
+        line = line.split("#", 1)[0].strip()
+        if line:
+            repo, *schedule = line.split(None, 1)
+            yield number, repo, schedule[0] if schedule else None
+
+
+def _csv_entries(text: str):
+    for number, row in enumerate(csv.reader(io.StringIO(text)), start=1):
+        cells = [cell.strip() for cell in row]
+        if not cells or not cells[0] or cells[0].startswith("#"):
+            continue
+        if number == 1 and cells[0].lower() in ("repo_url", "repo", "url", "repository"):
+            continue  # Header row
+        yield number, cells[0], (cells[1] if len(cells) > 1 and cells[1] else None)
+
+
+def _yaml_entries(text: str):
+    data = yaml.safe_load(text) or []
+    if isinstance(data, dict):
+        data = data.get("subscriptions") or []
+    if not isinstance(data, list):
+        raise ValueError("YAML input must be a list of repositories (or have a 'subscriptions' list).")
+    for number, item in enumerate(data, start=1):
+        if isinstance(item, dict):
+            repo = item.get("repo_url") or item.get("repo") or item.get("url")
+            yield number, str(repo or ""), item.get("schedule")
+        else:
+            yield number, str(item), None
+
+
+def parse_subscriptions(text: str, fmt: str = "text", default_schedule: str = "daily") -> list[tuple[str, str]]:
+    """
+    Parses and validates an import file into (repo_url, schedule) pairs,
+    duplicates removed (the first occurrence wins). Raises ValueError listing
+    every invalid entry, so nothing is imported from a partly broken file.
+    """
+    entries = {"text": _text_entries, "csv": _csv_entries, "yaml": _yaml_entries}[fmt](text)
+    subscriptions, errors = {}, []
+    for number, repo, schedule in entries:
+        schedule = schedule or default_schedule
+        try:
+            repo_url = normalize_repo_url(repo)
+            parse_schedule(schedule)
+        except ValueError as e:
+            errors.append(f"entry {number}: {e}")
+            continue
+        subscriptions.setdefault(repo_url, schedule)
+    if errors:
+        raise ValueError("Invalid entries:\n" + "\n".join(errors))
+    return list(subscriptions.items())
+
+
+def format_subscriptions(subscriptions, fmt: str = "yaml") -> str:
+    """Serializes subscriptions so that `parse_subscriptions` reads them back."""
+    rows = [(sub.repo_url, sub.schedule) for sub in subscriptions]
+    if fmt == "yaml":
+        return yaml.safe_dump({"subscriptions": [{"repo_url": url, "schedule": schedule} for url, schedule in rows]},
+                              sort_keys=False, allow_unicode=True)
+    if fmt == "csv":
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(["repo_url", "schedule"])
+        writer.writerows(rows)
+        return out.getvalue()
+    return "".join(f"{url} {schedule}\n" for url, schedule in rows)
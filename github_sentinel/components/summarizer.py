@@ -1,8 +1,47 @@
 from abc import ABC, abstractmethod
-import openai
 from github_sentinel.components.config_loader import config
+from github_sentinel.components.metrics import metrics
+from github_sentinel.components.summary_cache import SummaryCache, make_cache_key
+from github_sentinel.components.rate_limiter import RequestRateLimiter
+from github_sentinel.components.streaming import display_limits
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 
+DEFAULT_MAX_PROMPT_TOKENS = 6000
+DEFAULT_PACK_BELOW_TOKENS = 1500
+DEFAULT_MAX_REPOS_PER_REQUEST = 8
+DEFAULT_LLM_CONCURRENCY = 4
+DEFAULT_EXPECTED_OUTPUT_TOKENS = 800
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数：ASCII 约 4 个字符一个 token，中文等非 ASCII 字符约一个字符一个 token。"""
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return ascii_chars // 4 + (len(text) - ascii_chars) + 1
+
+
+def split_by_tokens(text: str, max_tokens: int) -> list[str]:
+    """
+    按行把文本拆成不超过 max_tokens 的分块。
+    每个分块开头会重复当前所在的 `##` 标题，保证分块内容有上下文。
+    """
+    chunks, current, current_tokens, heading = [], [], 0, None
+    for line in text.splitlines():
+        if line.startswith("## "):
+            heading = line
+        line_tokens = estimate_tokens(line)
+        if current and current_tokens + line_tokens > max_tokens:
+            chunks.append("\n".join(current))
+            current, current_tokens = [], 0
+            if heading and not line.startswith("## "):
+                current.append(heading)
+                current_tokens += estimate_tokens(heading)
+        current.append(line)
+        current_tokens += line_tokens
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
 
 # --- 基类 (保持不变) ---
 class BaseSummarizer(ABC):
@@ -25,6 +64,24 @@ class SimpleSummarizer(BaseSummarizer):
     它将原始数据转换为易于阅读的 Markdown 报告。
     """
 
+    def __init__(self, limits: dict[str, int] | None = None):
+        # 每个板块最多显示的条目数，防止报告过长
+        self.limits = limits or display_limits(config.get('fetch', {}) or {})
+
+    @staticmethod
+    def _more_line(items, shown: int, noun: str) -> str | None:
+        """
+        生成"以及更多"提示行。流式抓取时 items 为 UpdateList，
+        其 remaining 记录了未保留的条目数（exact=False 表示只是下限）。
+        """
+        hidden = max(0, len(items) - shown) + getattr(items, 'remaining', 0)
+        exact = getattr(items, 'exact', True)
+        if hidden > 0:
+            return f"- ... 以及另外 {hidden:,} 条{noun}。" if exact else f"- ... 以及至少 {hidden:,} 条更多{noun}。"
+        if not exact:
+            return f"- ... 以及更多{noun}。"
+        return None
+
     def _format_updates(self, updates: dict) -> str:
         """将原始更新数据格式化为清晰的 Markdown 文本块。"""
         content = []
@@ -32,34 +89,47 @@ class SimpleSummarizer(BaseSummarizer):
         # 1. 新版本发布 (Releases)
         if updates.get('releases'):
             content.append("## 🚀 新版本发布")
-            for r in updates['releases']:
+            shown = self.limits['releases']
+            for r in updates['releases'][:shown]:
                 content.append(f"- **{r['name']} ({r['tag_name']})** 由 `{r['author']}` 发布。")
+            more = self._more_line(updates['releases'], shown, "版本发布")
+            if more:
+                content.append(more)
             content.append("")  # 添加空行以分隔
 
         # 2. 最新提交 (Commits)
         if updates.get('commits'):
             content.append("## ⚙️ 最新提交")
-            # 限制最多显示15条，防止报告过长
-            for c in updates['commits'][:15]:
+            shown = self.limits['commits']
+            for c in updates['commits'][:shown]:
                 content.append(f"- `{c['sha'][:7]}`: {c['message']} (作者: `{c['author']}`)")
-            if len(updates['commits']) > 15:
-                content.append("- ... 以及更多提交。")
+            more = self._more_line(updates['commits'], shown, "提交")
+            if more:
+                content.append(more)
             content.append("")
 
         # 3. 拉取请求 (Pull Requests)
         if updates.get('pull_requests'):
             content.append("## 📥 拉取请求 (Pull Requests) 动态")
-            for pr in updates['pull_requests']:
+            shown = self.limits['pull_requests']
+            for pr in updates['pull_requests'][:shown]:
                 status = "✅ 已合并/关闭" if pr['state'] != 'open' else "📝 开启中"
                 content.append(f"- `#{pr['number']}` {pr['title']} (由 `{pr['user']}`) - **状态: {status}**")
+            more = self._more_line(updates['pull_requests'], shown, "拉取请求动态")
+            if more:
+                content.append(more)
             content.append("")
 
         # 4. 议题 (Issues)
         if updates.get('issues'):
             content.append("## 📝 议题 (Issues) 动态")
-            for issue in updates['issues']:
+            shown = self.limits['issues']
+            for issue in updates['issues'][:shown]:
                 status = "✅ 已关闭" if issue['state'] != 'open' else "📝 开启中"
                 content.append(f"- `#{issue['number']}` {issue['title']} (由 `{issue['user']}`) - **状态: {status}**")
+            more = self._more_line(updates['issues'], shown, "议题动态")
+            if more:
+                content.append(more)
             content.append("")
 
         return "\n".join(content)
@@ -83,59 +153,244 @@ class AISummarizer(BaseSummarizer):
     # ... (此处省略 AISummarizer 的代码，保持原样即可)
     """Uses an LLM to generate an intelligent summary of updates."""
 
-    def __init__(self):
+    SYSTEM_PROMPT = (
+        "You are GitHub Sentinel, an AI assistant for developer teams. Your task is to analyze a list of recent "
+        "GitHub repository activities and provide a high-level summary. The summary should be in Chinese. "
+        "Structure the report with clear Markdown headings (e.g., '## 关键摘要', '## 需关注的拉取请求', '## 主要变更'). "
+        "Focus on what's important for a project manager or team lead to know, avoiding excessive detail. "
+        "Start with a brief, high-level '关键摘要' section."
+    )
+
+    # map-reduce 时用于摘要单个分块的提示词
+    CHUNK_PROMPT = (
+        "You are GitHub Sentinel. You receive one part of a long list of GitHub repository activities. "
+        "Summarize the important points of this part in concise Chinese bullet points; "
+        "they will later be merged into a single report."
+    )
+
+    # 打包模式：一次请求中为多个仓库生成摘要，用分隔行区分各仓库
+    BATCH_PROMPT = SYSTEM_PROMPT + (
+        " You will receive the activities of several repositories. Write one independent report per repository. "
+        "Start each report with a line of exactly '<<<REPO: <repository url>>>>' and do not mention other repositories in it."
+    )
+    BATCH_MARKER = "<<<REPO: {url}>>>"
+
+    def __init__(self, http_client=None, bypass_cache: bool = False):
         llm_config = config.get('llm', {})
         if not llm_config.get('api_key'):
             raise ValueError("LLM configuration ('llm.api_key') is missing in config.yaml for 'ai' summarizer.")
-        self.client = openai.OpenAI(api_key=llm_config['api_key'])
+        import openai  # 延迟导入：只有 AI 摘要器需要 openai SDK，其余命令不必为它付出启动时间
+        # http_client 由组件注册表提供，以便在多个仓库之间复用 keep-alive 连接池
+        # base_url 可指向任意 OpenAI 兼容服务（包括本地的模拟服务）
+        self.client = openai.OpenAI(api_key=llm_config['api_key'], base_url=llm_config.get('base_url'),
+                                    http_client=http_client)
         self.model = llm_config.get('model', 'gpt-4o-mini')
 
-    def _format_updates_for_prompt(self, updates: dict) -> str:
+        # 摘要缓存：按内容哈希缓存 LLM 回复；bypass_cache=True 时总是重新生成
+        cache_config = llm_config.get('cache', {}) or {}
+        self.cache = SummaryCache.from_config(cache_config) if cache_config.get('enabled', True) else None
+        self.bypass_cache = bypass_cache
+
+        # 批处理与分块：小仓库打包到一次请求，超长输入按 token 估算拆分后 map-reduce
+        batching_config = llm_config.get('batching', {}) or {}
+        self.batching = bool(batching_config.get('enabled', False))
+        self.max_prompt_tokens = int(batching_config.get('max_prompt_tokens', DEFAULT_MAX_PROMPT_TOKENS))
+        self.pack_below_tokens = int(batching_config.get('pack_below_tokens', DEFAULT_PACK_BELOW_TOKENS))
+        self.max_repos_per_request = int(batching_config.get('max_repos_per_request', DEFAULT_MAX_REPOS_PER_REQUEST))
+        self.concurrency = max(1, int(batching_config.get('concurrency', DEFAULT_LLM_CONCURRENCY)))
+        self.expected_output_tokens = int(batching_config.get('expected_output_tokens', DEFAULT_EXPECTED_OUTPUT_TOKENS))
+        self.limiter = RequestRateLimiter(
+            requests_per_minute=int(batching_config.get('requests_per_minute', 0)),
+            tokens_per_minute=int(batching_config.get('tokens_per_minute', 0)),
+        )
+
+        # 压缩阶段：过滤机器人、抵消回滚、合并重复提交，并按重要性裁剪到 token 预算内
+        from github_sentinel.components.compaction import Compactor  # 延迟导入，避免循环依赖
+        self.compactor = Compactor.from_config(llm_config.get('compaction'))
+
+    def close(self):
+        self.client.close()
+
+    def _format_updates_for_prompt(self, updates: dict, repo_url: str | None = None) -> str:
         # 复用 SimpleSummarizer 的格式化方法来为 AI 提供干净的输入
-        return SimpleSummarizer()._format_updates(updates)
+        text = SimpleSummarizer()._format_updates(updates)
+        if not self.compactor.enabled or not text.strip():
+            return text
+
+        with metrics.timer("sentinel_stage_seconds", stage="compact"):
+            compacted = self.compactor.compact(updates)
+        raw_tokens = estimate_tokens(text)
+        # 压缩结果不比原始列表更短时（例如活动很少）仍使用原始列表
+        if compacted.tokens >= raw_tokens:
+            return text
+        saved = raw_tokens - compacted.tokens
+        metrics.inc("sentinel_llm_prompt_tokens_saved_total", saved, model=self.model)
+        for reason, count in compacted.dropped.items():
+            if count:
+                metrics.inc("sentinel_compaction_dropped_items_total", count, reason=reason)
+        if self.compactor.log:
+            print(f"Compacted {repo_url or 'updates'}: {raw_tokens} -> {compacted.tokens} prompt tokens "
+                  f"({saved / raw_tokens:.0%} saved; dropped {compacted.describe()}).")
+        return compacted.text
+
+    def _complete(self, system_prompt: str, user_prompt: str) -> str:
+        """
+        调用 LLM 生成回复。
+        相同的 (模型, 系统提示词, 用户输入) 会命中持久化缓存，不再消耗 LLM 延迟和 token。
+        未命中缓存时，请求会先经过 RPM/TPM 限流器。
+        """
+        key = None
+        if self.cache is not None and not self.bypass_cache:
+            key = make_cache_key(self.model, system_prompt, user_prompt)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        self.limiter.acquire(estimate_tokens(system_prompt + user_prompt) + self.expected_output_tokens)
+        try:
+            with metrics.timer("sentinel_llm_request_seconds", model=self.model):
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ]
+                )
+        except Exception:
+            metrics.inc("sentinel_llm_requests_total", model=self.model, result="failed")
+            raise
+        metrics.inc("sentinel_llm_requests_total", model=self.model, result="ok")
+        # 记录服务端返回的实际 token 用量
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            metrics.inc("sentinel_llm_tokens_total", usage.prompt_tokens or 0, model=self.model, kind="prompt")
+            metrics.inc("sentinel_llm_tokens_total", usage.completion_tokens or 0, model=self.model, kind="completion")
+        content = response.choices[0].message.content
+        if self.cache is not None and content:
+            # 即使本次绕过了缓存读取，也写入最新结果
+            self.cache.put(key or make_cache_key(self.model, system_prompt, user_prompt), self.model, content)
+        return content
+
+    def _summarize_text(self, update_text: str) -> str:
+        """为一个仓库的更新文本生成摘要；超出 token 预算时按分块 map-reduce。"""
+        if estimate_tokens(update_text) <= self.max_prompt_tokens:
+            return self._complete(self.SYSTEM_PROMPT, f"请为以下仓库活动生成一份摘要报告:\n\n{update_text}")
+
+        chunks = split_by_tokens(update_text, self.max_prompt_tokens)
+        print(f"Update text too large for one request, summarizing in {len(chunks)} chunks.")
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            partials = list(pool.map(
+                lambda chunk: self._complete(self.CHUNK_PROMPT, f"仓库活动（部分）:\n\n{chunk}"), chunks))
+        merged = "\n\n".join(partials)
+        return self._complete(self.SYSTEM_PROMPT, f"以下是同一仓库各部分活动的要点，请合并为一份摘要报告:\n\n{merged}")
 
     def summarize(self, repo_url: str, updates: dict) -> str:
-        header = self._get_report_header(repo_url)
-        update_text = self._format_updates_for_prompt(updates)
+        return self._summarize_one(repo_url, updates, self._format_updates_for_prompt(updates, repo_url))
 
+    def _summarize_one(self, repo_url: str, updates: dict, update_text: str) -> str:
+        """为单个仓库生成报告；update_text 为已格式化（可能已压缩）的提示输入。"""
+        header = self._get_report_header(repo_url)
         if not update_text.strip():
             return header + "在过去的时间段内没有发现重要的更新。"
 
-        system_prompt = (
-            "You are GitHub Sentinel, an AI assistant for developer teams. Your task is to analyze a list of recent "
-            "GitHub repository activities and provide a high-level summary. The summary should be in Chinese. "
-            "Structure the report with clear Markdown headings (e.g., '## 关键摘要', '## 需关注的拉取请求', '## 主要变更'). "
-            "Focus on what's important for a project manager or team lead to know, avoiding excessive detail. "
-            "Start with a brief, high-level '关键摘要' section."
-        )
-
-        user_prompt = f"请为以下仓库活动生成一份摘要报告:\n\n{update_text}"
-
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ]
-            )
-            summary = response.choices[0].message.content
+            summary = self._summarize_text(update_text)
             return header + summary
         except Exception as e:
             print(f"Error calling LLM API: {e}")
-            return header + "生成 AI 摘要时出错。\n\n**原始更新列表:**\n" + update_text
+            # 回退时展示完整的原始列表，而不是压缩后的提示文本
+            return header + "生成 AI 摘要时出错。\n\n**原始更新列表:**\n" + SimpleSummarizer()._format_updates(updates)
+
+    def _summarize_packed(self, group: list[tuple[str, str]]) -> dict[str, str]:
+        """一次请求为多个小仓库生成摘要，并按分隔行拆回各仓库。缺失的仓库不出现在结果中。"""
+        parts = [f"{self.BATCH_MARKER.format(url=url)}\n{text}" for url, text in group]
+        response = self._complete(self.BATCH_PROMPT, "请为以下各仓库的活动分别生成摘要报告:\n\n" + "\n\n".join(parts))
+
+        summaries = {}
+        for url, _ in group:
+            marker = self.BATCH_MARKER.format(url=url)
+            start = response.find(marker)
+            if start == -1:
+                continue
+            start += len(marker)
+            ends = [response.find(self.BATCH_MARKER.format(url=other), start) for other, _ in group if other != url]
+            end = min([e for e in ends if e != -1], default=len(response))
+            summary = response[start:end].strip()
+            if summary:
+                summaries[url] = summary
+        return summaries
+
+    def summarize_many(self, items: list[tuple[str, dict]]) -> dict[str, str]:
+        """
+        批量生成多个仓库的报告，返回 {repo_url: report}。
+        小仓库按 token 预算打包到同一请求，大仓库单独请求（必要时分块），
+        所有请求在限流器约束下并发执行。
+        """
+        texts = {url: self._format_updates_for_prompt(updates, url) for url, updates in items}
+        reports = {}
+        small, large = [], []
+        for url, text in texts.items():
+            if not text.strip():
+                reports[url] = self._get_report_header(url) + "在过去的时间段内没有发现重要的更新。"
+            elif estimate_tokens(text) < self.pack_below_tokens:
+                small.append((url, text))
+            else:
+                large.append(url)
+
+        # 将小仓库打包成不超过 token 预算和仓库数上限的分组
+        groups, current, current_tokens = [], [], 0
+        for url, text in small:
+            tokens = estimate_tokens(text)
+            if current and (current_tokens + tokens > self.max_prompt_tokens or len(current) >= self.max_repos_per_request):
+                groups.append(current)
+                current, current_tokens = [], 0
+            current.append((url, text))
+            current_tokens += tokens
+        if current:
+            groups.append(current)
+
+        item_map = dict(items)
+
+        def run_group(group):
+            try:
+                summaries = self._summarize_packed(group) if len(group) > 1 else {}
+            except Exception as e:
+                print(f"Error calling LLM API for a batch of {len(group)} repositories: {e}")
+                summaries = {}
+            results = {}
+            for url, _ in group:
+                if url in summaries:
+                    results[url] = self._get_report_header(url) + summaries[url]
+                else:
+                    # 未打包或未能从批量回复中解析出的仓库单独请求（复用已压缩的文本）
+                    results[url] = self._summarize_one(url, item_map[url], texts[url])
+            return results
+
+        def run_single(url):
+            return {url: self._summarize_one(url, item_map[url], texts[url])}
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = [pool.submit(run_group, group) for group in groups]
+            futures += [pool.submit(run_single, url) for url in large]
+            for future in futures:
+                reports.update(future.result())
+
+        print(f"Summarized {len(items)} repositories with {len(groups)} packed and {len(large)} individual requests.")
+        return reports
 
 
 # --- 工厂函数 (保持不变) ---
-def get_summarizer() -> BaseSummarizer:
+def get_summarizer(summarizer_type: str | None = None) -> BaseSummarizer:
     """
     工厂函数，根据配置获取合适的摘要器。
+    传入 summarizer_type 时（例如订阅者自选的摘要器）忽略配置中的类型。
     """
-    summarizer_type = config.get('summarizer', {}).get('type', 'simple')
+    summarizer_type = summarizer_type or config.get('summarizer', {}).get('type', 'simple')
 
     if summarizer_type == 'ai':
         print("Using AI Summarizer.")
-        return AISummarizer()
+        from github_sentinel.components.registry import shared_llm_http_client
+        return AISummarizer(http_client=shared_llm_http_client())
     elif summarizer_type == 'simple':
         print("Using Simple Summarizer.")
         return SimpleSummarizer()
@@ -0,0 +1,96 @@
+import hashlib
+import threading
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func
+from github_sentinel.components.db_manager import get_db_session
+from github_sentinel.components.metrics import metrics
+from github_sentinel.models.summary_cache import SummaryCacheEntry
+
+DEFAULT_TTL_HOURS = 24 * 7
+DEFAULT_MAX_ENTRIES = 5000
+
+
+def make_cache_key(model: str, system_prompt: str, update_text: str) -> str:
+    """Content hash identifying one LLM request."""
+    digest = hashlib.sha256()
+    for part in (model, system_prompt, update_text):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class SummaryCache:
+    """
+    Persistent LLM response cache in the sentinel database.
+    Entries expire after `ttl`, and the least recently used ones are evicted
+    once there are more than `max_entries`.
+    """
+
+    def __init__(self, ttl: timedelta | None = None, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl or timedelta(hours=DEFAULT_TTL_HOURS)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, cache_config: dict) -> "SummaryCache":
+        return cls(
+            ttl=timedelta(hours=float(cache_config.get('ttl_hours', DEFAULT_TTL_HOURS))),
+            max_entries=int(cache_config.get('max_entries', DEFAULT_MAX_ENTRIES)),
+        )
+
+    def _count(self, hit: bool):
+        metrics.inc("sentinel_summary_cache_total", result="hit" if hit else "miss")
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key: str) -> str | None:
+        session = get_db_session()
+        try:
+            entry = session.get(SummaryCacheEntry, key)
+            now = datetime.now(timezone.utc)
+            if entry is None or entry.created_at < now - self.ttl:
+                if entry is not None:
+                    session.delete(entry)
+                    session.commit()
+                self._count(hit=False)
+                return None
+            entry.last_used_at = now
+            summary = entry.summary
+            session.commit()
+            self._count(hit=True)
+            return summary
+        finally:
+            session.close()
+
+    def put(self, key: str, model: str, summary: str):
+        session = get_db_session()
+        try:
+            now = datetime.now(timezone.utc)
+            session.merge(SummaryCacheEntry(key=key, model=model, summary=summary,
+                                            size=len(summary), created_at=now, last_used_at=now))
+            session.commit()
+            self._evict(session)
+        finally:
+            session.close()
+
+    def _evict(self, session):
+        """Drops expired entries, then the least recently used ones above `max_entries`."""
+        cutoff = datetime.now(timezone.utc) - self.ttl
+        session.query(SummaryCacheEntry).filter(SummaryCacheEntry.created_at < cutoff).delete(synchronize_session=False)
+        overflow = session.query(func.count(SummaryCacheEntry.key)).scalar() - self.max_entries
+        if overflow > 0:
+            oldest = (session.query(SummaryCacheEntry.key)
+                      .order_by(SummaryCacheEntry.last_used_at).limit(overflow).subquery())
+            session.query(SummaryCacheEntry).filter(SummaryCacheEntry.key.in_(oldest.select())).delete(
+                synchronize_session=False)
+        session.commit()
+
+    def describe(self) -> str:
+        total = self.hits + self.misses
+        rate = (self.hits / total * 100) if total else 0.0
+        return f"Summary cache: {self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate)."
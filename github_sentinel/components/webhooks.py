@@ -0,0 +1,297 @@
+"""
+Push-based ingestion of GitHub webhook deliveries.
+
+`WebhookReceiver` accepts deliveries over HTTP, verifies their
+X-Hub-Signature-256 HMAC against `webhooks.secret`, and appends the push,
+issues, pull_request and release events of subscribed repositories to the
+`webhook_events` buffer. `load_buffered_updates` later turns a repository's
+pending events into the `updates` dict `fetch_updates` would have returned,
+so reports are built without calling the GitHub API.
+"""
+
+import hashlib
+import hmac
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
+from github_sentinel.components.config_loader import config
+from github_sentinel.components.db_manager import bulk_update_watermarks, session_scope
+from github_sentinel.components.metrics import metrics
+from github_sentinel.components.streaming import UpdateList
+from github_sentinel.models.records import CommitRecord, IssueRecord, ReleaseRecord, parse_github_datetime
+from github_sentinel.models.subscription import Subscription
+from github_sentinel.models.webhook_event import WebhookEvent
+
+SUPPORTED_EVENTS = ("push", "issues", "pull_request", "release")
+DEFAULT_HOST = "0.0.0.0"
+DEFAULT_PORT = 8787
+DEFAULT_PATH = "/github/webhook"
+DEFAULT_RETENTION_DAYS = 7
+MAX_BODY_BYTES = 25 * 1024 * 1024  # GitHub never sends larger payloads
+# A push payload lists at most this many commits; larger pushes are reported with a "more" count
+PUSH_PAYLOAD_COMMIT_LIMIT = 20
+# Release actions that make a release the newest published one; edits of older releases are not among them
+RELEASE_PUBLISH_ACTIONS = ("published", "released", "prereleased")
+
+
+def webhook_config() -> dict:
+    return config.get('webhooks', {}) or {}
+
+
+def verify_signature(secret: str, body: bytes, signature: str | None) -> bool:
+    """Checks GitHub's `X-Hub-Signature-256: sha256=<hex HMAC of the body>` header."""
+    if not signature or not signature.startswith("sha256="):
+        return False
+    expected = "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def _relevant(event: str, payload: dict) -> bool:
+    """Events that could show up in a report: pushes to the default branch, and item changes other than deletion."""
+    if event == "push":
+        default_branch = (payload.get("repository") or {}).get("default_branch")
+        return payload.get("ref") == f"refs/heads/{default_branch}" and bool(payload.get("commits"))
+    return event in SUPPORTED_EVENTS and payload.get("action") != "deleted"
+
+
+def store_delivery(delivery_id: str, event: str, payload: dict, body: str) -> str:
+    """
+    Buffers one verified delivery. Any delivery, including GitHub's `ping`,
+    marks the repository as webhook-enabled. Returns "stored", "duplicate",
+    "ignored" (not an event reports use) or "unsubscribed".
+    """
+    full_name = (payload.get("repository") or {}).get("full_name")
+    if not full_name:
+        return "ignored"
+    repo_url = f"https://github.com/{full_name}"
+    now = datetime.now(timezone.utc)
+    with session_scope() as session:
+        subscription = (session.query(Subscription)
+                        .filter(func.lower(Subscription.repo_url) == repo_url.lower()).first())
+        if subscription is None:
+            return "unsubscribed"
+        subscription.webhook_last_event_at = now
+        if not _relevant(event, payload):
+            return "ignored"
+        statement = insert(WebhookEvent).values(
+            delivery_id=delivery_id, subscription_id=subscription.id, repo_url=subscription.repo_url,
+            event=event, action=payload.get("action"), payload=body, received_at=now,
+        ).on_conflict_do_nothing(index_elements=["delivery_id"])
+        return "stored" if session.execute(statement).rowcount else "duplicate"
+
+
+# --- Buffer -> updates ---
+
+def _commit_record(commit: dict) -> CommitRecord:
+    author = commit.get("author") or {}
+    return CommitRecord(
+        sha=commit["id"],
+        author=author.get("name") or author.get("username") or "ghost",
+        message=(commit.get("message") or "").split('\n')[0],
+        url=commit.get("url", ""),
+        committed_at=parse_github_datetime(commit.get("timestamp")),
+    )
+
+
+def load_buffered_updates(subscription_id: int, until: datetime | None = None,
+                          watermarks: dict | None = None) -> tuple[dict, list[int], dict]:
+    """
+    The pending events of one subscription (received before `until`) as an
+    `updates` dict, newest first and with each item at its latest state, plus
+    the ids of the events used and the high-water marks they advance.
+    Items at or behind `watermarks` were already reported (e.g. by the
+    catch-up poll the events arrived during) and are left out.
+    """
+    watermarks = watermarks or {}
+    last_updated = watermarks.get("issue_updated_at")
+    if last_updated is not None and last_updated.tzinfo is None:
+        last_updated = last_updated.replace(tzinfo=timezone.utc)
+    with session_scope() as session:
+        query = session.query(WebhookEvent).filter(WebhookEvent.subscription_id == subscription_id,
+                                                   WebhookEvent.processed_at.is_(None))
+        if until is not None:
+            query = query.filter(WebhookEvent.received_at < until)
+        events = query.order_by(WebhookEvent.id).all()
+
+    commits, issues, releases, marks = {}, {}, {}, {}
+    newest_release = None  # Edits of older releases must not move the release mark back
+    unlisted, exact = 0, True  # Commits of large pushes the payloads did not list
+    for event in events:
+        payload = json.loads(event.payload)
+        if event.event == "push":
+            listed = payload.get("commits") or []
+            for commit in listed:
+                if commit["id"] == watermarks.get("commit_sha"):
+                    # Everything pushed up to here was already reported
+                    commits.clear()
+                    unlisted, exact = 0, True
+                    continue
+                commits[commit["id"]] = _commit_record(commit)
+            if payload.get("size") is not None:
+                unlisted += max(0, int(payload["size"]) - len(listed))
+            elif len(listed) >= PUSH_PAYLOAD_COMMIT_LIMIT:
+                unlisted, exact = unlisted + 1, False  # At least one more
+            marks["commit_sha"] = (payload.get("head_commit") or {}).get("id") or payload.get("after")
+        elif event.event in ("issues", "pull_request"):
+            item = IssueRecord.from_json(payload["issue" if event.event == "issues" else "pull_request"])
+            item.is_pull_request = item.is_pull_request or event.event == "pull_request"
+            if last_updated is not None and item.updated_at and item.updated_at <= last_updated:
+                continue
+            issues[item.id] = item
+        elif event.event == "release":
+            release = ReleaseRecord.from_json(payload["release"])
+            if release.id == watermarks.get("release_id"):
+                continue
+            releases[release.id] = release
+            if (event.action in RELEASE_PUBLISH_ACTIONS and release.published_at
+                    and (newest_release is None or release.published_at > newest_release.published_at)):
+                newest_release = release
+                marks["release_id"] = release.id
+
+    def newest_first(items, attribute):
+        oldest = datetime.min.replace(tzinfo=timezone.utc)
+        return sorted(items, key=lambda item: getattr(item, attribute) or oldest, reverse=True)
+
+    issue_list = newest_first(issues.values(), "updated_at")
+    if issue_list and issue_list[0].updated_at:
+        marks["issue_updated_at"] = issue_list[0].updated_at
+    updates = {
+        "commits": UpdateList(newest_first(commits.values(), "committed_at"), remaining=unlisted, exact=exact),
+        "issues": [item for item in issue_list if not item.is_pull_request],
+        "pull_requests": [item for item in issue_list if item.is_pull_request],
+        "releases": newest_first(releases.values(), "published_at"),
+    }
+    return updates, [event.id for event in events], marks
+
+
+def finish_buffered(processed: dict[str, tuple[list[int], dict]], synced: dict[int, datetime]):
+    """
+    After a sweep, in one transaction: marks the buffered events of
+    successfully reported repositories processed and advances their
+    high-water marks ({repo_url: (event ids, watermarks)}), and records for
+    polled webhook repositories ({subscription_id: poll start}) that their
+    activity is covered up to the poll, discarding the events it already saw.
+    """
+    now = datetime.now(timezone.utc)
+    with session_scope() as session:
+        event_ids = [event_id for ids, _ in processed.values() for event_id in ids]
+        for i in range(0, len(event_ids), 500):
+            (session.query(WebhookEvent).filter(WebhookEvent.id.in_(event_ids[i:i + 500]))
+             .update({"processed_at": now}, synchronize_session=False))
+        bulk_update_watermarks(session, {repo_url: marks for repo_url, (_, marks) in processed.items() if marks})
+        for subscription_id, synced_at in synced.items():
+            session.query(Subscription).filter_by(id=subscription_id).update(
+                {"webhook_synced_at": synced_at}, synchronize_session=False)
+            (session.query(WebhookEvent)
+             .filter(WebhookEvent.subscription_id == subscription_id, WebhookEvent.processed_at.is_(None),
+                     WebhookEvent.received_at < synced_at)
+             .update({"processed_at": now}, synchronize_session=False))
+
+
+def prune_webhook_events(now: datetime | None = None) -> int:
+    """Deletes processed events older than `webhooks.retention_days`."""
+    retention_days = float(webhook_config().get('retention_days', DEFAULT_RETENTION_DAYS))
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=retention_days)
+    with session_scope() as session:
+        return (session.query(WebhookEvent)
+                .filter(WebhookEvent.processed_at.isnot(None), WebhookEvent.processed_at < cutoff)
+                .delete(synchronize_session=False))
+
+
+# --- HTTP receiver ---
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    receiver: "WebhookReceiver"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status: int, result: str):
+        body = json.dumps({"result": result}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/healthz":
+            self._reply(200, "ok")
+        else:
+            self._reply(404, "not found")
+
+    def do_POST(self):
+        if self.path != self.receiver.path:
+            self._reply(404, "not found")
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._reply(400, "invalid Content-Length")
+            return
+        if length > MAX_BODY_BYTES:
+            self._reply(413, "payload too large")
+            return
+        body = self.rfile.read(length)
+        event = self.headers.get("X-GitHub-Event", "")
+        delivery_id = self.headers.get("X-GitHub-Delivery", "")
+
+        if not verify_signature(self.receiver.secret, body, self.headers.get("X-Hub-Signature-256")):
+            metrics.inc("sentinel_webhook_deliveries_total", event=event or "unknown", result="bad_signature")
+            self._reply(401, "invalid signature")
+            return
+        if not event or not delivery_id:
+            self._reply(400, "missing X-GitHub-Event or X-GitHub-Delivery header")
+            return
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            # The webhook must use content type application/json
+            self._reply(415, "expected a JSON payload")
+            return
+
+        try:
+            result = store_delivery(delivery_id, event, payload, body.decode())
+        except Exception as e:
+            print(f"Error storing webhook delivery {delivery_id}: {e}")
+            self._reply(500, "could not store the event")  # GitHub shows it as failed; redeliver later
+            return
+        metrics.inc("sentinel_webhook_deliveries_total", event=event, result=result)
+        self._reply(202 if result == "stored" else 200, result)
+
+
+class WebhookReceiver:
+    """Serves the webhook endpoint from a daemon thread; `started_at` tells sweeps since when no delivery was missed."""
+
+    def __init__(self, host: str | None = None, port: int | None = None, secret: str | None = None,
+                 path: str | None = None):
+        settings = webhook_config()
+        self.secret = secret or settings.get('secret')
+        if not self.secret:
+            raise ValueError("'webhooks.secret' must be set (and match the secret of the GitHub webhooks).")
+        self.host = host or settings.get('host', DEFAULT_HOST)
+        self.port = int(port or settings.get('port', DEFAULT_PORT))
+        self.path = path or settings.get('path', DEFAULT_PATH)
+        self.started_at: datetime | None = None
+        self._server: ThreadingHTTPServer | None = None
+
+    def start(self) -> "WebhookReceiver":
+        handler = type("WebhookHandler", (_WebhookHandler,), {"receiver": self})
+        self._server = ThreadingHTTPServer((self.host, self.port), handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self.started_at = datetime.now(timezone.utc)
+        threading.Thread(target=self._server.serve_forever, name="sentinel-webhooks", daemon=True).start()
+        print(f"Receiving GitHub webhooks at http://{self.host}:{self.port}{self.path}")
+        return self
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
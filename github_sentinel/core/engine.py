@@ -0,0 +1,201 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from github_sentinel.components.config_loader import config
+from github_sentinel.components.metrics import metrics
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_STAGE_LIMITS = {"fetch": 8, "summarize": 4, "notify": 2}
+
+
+class RepoResult:
+    """Outcome and per-stage timings of processing a single subscription."""
+
+    def __init__(self, repo_url: str):
+        self.repo_url = repo_url
+        self.timings: dict[str, float] = {}
+        self.total = 0.0
+        self.error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class StageTimer:
+    """
+    Passed to `process_subscription` as its `stage` hook.
+    Each `with stage("fetch"):` block waits for a slot in that stage's semaphore
+    and records how long the work inside took (excluding the wait).
+    """
+
+    def __init__(self, semaphores: dict[str, threading.Semaphore], result: RepoResult):
+        self._semaphores = semaphores
+        self._result = result
+
+    @contextmanager
+    def __call__(self, name: str):
+        semaphore = self._semaphores.get(name)
+        if semaphore is not None:
+            semaphore.acquire()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._result.timings[name] = self._result.timings.get(name, 0.0) + elapsed
+            metrics.observe("sentinel_stage_seconds", elapsed, stage=name)
+            if semaphore is not None:
+                semaphore.release()
+
+
+class SweepReport:
+    """Aggregated results of one sweep over many subscriptions."""
+
+    def __init__(self, results: list[RepoResult], wall_time: float):
+        self.results = results
+        self.wall_time = wall_time
+
+    @classmethod
+    def combine(cls, reports: list["SweepReport"], extra_time: float = 0.0) -> "SweepReport":
+        """Merges the reports of consecutive phases of one sweep, adding up per-repo timings."""
+        merged: dict[str, RepoResult] = {}
+        for report in reports:
+            for result in report.results:
+                target = merged.setdefault(result.repo_url, RepoResult(result.repo_url))
+                for name, secs in result.timings.items():
+                    target.timings[name] = target.timings.get(name, 0.0) + secs
+                target.total += result.total
+                target.error = target.error or result.error
+        return cls(list(merged.values()), sum(r.wall_time for r in reports) + extra_time)
+
+    @property
+    def failed(self) -> list[RepoResult]:
+        return [r for r in self.results if not r.ok]
+
+    def print_summary(self, top: int = 10):
+        succeeded = len(self.results) - len(self.failed)
+        print(f"Sweep finished in {self.wall_time:.2f}s: "
+              f"{succeeded} succeeded, {len(self.failed)} failed, {len(self.results)} total.")
+        if not self.results:
+            return
+
+        print("Per-repository timings (slowest first):")
+        for r in sorted(self.results, key=lambda r: r.total, reverse=True)[:top]:
+            stages = ", ".join(f"{name}={secs:.2f}s" for name, secs in r.timings.items())
+            status = "ok" if r.ok else f"FAILED ({r.error})"
+            print(f"- {r.repo_url}: {r.total:.2f}s [{stages}] {status}")
+        if len(self.results) > top:
+            print(f"- ... and {len(self.results) - top} more.")
+
+
+class InFlightRepos:
+    """
+    Repositories some sweep in this process is working on right now. Sweeps
+    claim their repositories before starting, so a repository is never
+    processed by two overlapping sweeps (e.g. a scheduler tick and a manual check).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._repos: set[str] = set()
+
+    def claim(self, subscriptions) -> tuple[list, list]:
+        """Claims every subscription not already claimed; returns (claimed, busy)."""
+        claimed, busy = [], []
+        with self._lock:
+            for sub in subscriptions:
+                if sub.repo_url in self._repos:
+                    busy.append(sub)
+                else:
+                    self._repos.add(sub.repo_url)
+                    claimed.append(sub)
+        return claimed, busy
+
+    def release(self, subscriptions):
+        with self._lock:
+            for sub in subscriptions:
+                self._repos.discard(sub.repo_url)
+
+    def __contains__(self, repo_url: str) -> bool:
+        with self._lock:
+            return repo_url in self._repos
+
+
+# Shared by every sweep of this process
+in_flight = InFlightRepos()
+
+
+class SweepEngine:
+    """
+    Bounded-concurrency executor for a sweep.
+    Subscriptions are processed on a thread pool of `max_workers`, and each
+    pipeline stage (fetch / summarize / notify) is additionally capped by its
+    own limit so, e.g., a burst of LLM calls cannot exceed the provider's quota
+    while GitHub fetches keep flowing.
+    """
+
+    def __init__(self, max_workers: int | None = None, stage_limits: dict[str, int] | None = None):
+        concurrency_config = config.get('concurrency', {}) or {}
+        self.max_workers = max(1, int(max_workers or concurrency_config.get('max_workers', DEFAULT_MAX_WORKERS)))
+
+        limits = dict(DEFAULT_STAGE_LIMITS)
+        limits.update(concurrency_config.get('stages', {}) or {})
+        limits.update(stage_limits or {})
+        self.stage_limits = {name: max(1, int(limit)) for name, limit in limits.items()}
+
+    def _run_one(self, process, subscription, semaphores, cancel: threading.Event | None = None) -> RepoResult:
+        result = RepoResult(subscription.repo_url)
+        if cancel is not None and cancel.is_set():
+            result.error = "cancelled"
+            return result
+        start = time.perf_counter()
+        try:
+            process(subscription, stage=StageTimer(semaphores, result))
+        except Exception as e:
+            # Isolate per-repo failures: one broken repo must not abort the sweep.
+            result.error = str(e)
+            print(f"ERROR: Failed to process {subscription.repo_url}. Reason: {e}")
+        result.total = time.perf_counter() - start
+        return result
+
+    def prefetch_batches(self, subscriptions, fetcher) -> dict:
+        """
+        For batching fetch backends: splits subscriptions into the backend's
+        batch size and fetches the batches concurrently (bounded by the fetch
+        stage limit). Returns {repo_url: updates dict or Exception}.
+        """
+        items = [(sub.repo_url, sub.last_checked_at, sub.watermarks) for sub in subscriptions]
+        batch_size = fetcher.effective_batch_size()
+        batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+        start = time.perf_counter()
+        prefetched = {}
+
+        with ThreadPoolExecutor(max_workers=self.stage_limits.get("fetch", 1), thread_name_prefix="sentinel-fetch") as pool:
+            for result in pool.map(fetcher.fetch_updates_batch, batches):
+                prefetched.update(result)
+
+        print(f"Prefetched {len(items)} repositories in {len(batches)} batch queries "
+              f"({time.perf_counter() - start:.2f}s).")
+        return prefetched
+
+    def run(self, subscriptions, process, progress=None, cancel: threading.Event | None = None) -> SweepReport:
+        """
+        Runs `process(subscription, stage=...)` for every subscription concurrently.
+        `progress(result)` is called as each repository finishes; once `cancel`
+        is set, repositories that have not started yet are skipped as "cancelled".
+        """
+        semaphores = {name: threading.Semaphore(limit) for name, limit in self.stage_limits.items()}
+        start = time.perf_counter()
+        results = []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="sentinel") as pool:
+            futures = [pool.submit(self._run_one, process, sub, semaphores, cancel) for sub in subscriptions]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if progress is not None:
+                    progress(result)
+
+        return SweepReport(results, time.perf_counter() - start)
@@ -0,0 +1,173 @@
+"""
+Background jobs for the interactive session.
+
+`check` and `checkall` are submitted to a small shared executor and return
+at once, so the prompt stays responsive during a sweep. Each job tracks its
+progress per repository and can be cancelled: a queued job never starts, a
+running one finishes the repositories it already began and skips the rest.
+"""
+
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from github_sentinel.components.config_loader import config
+from github_sentinel.components.db_manager import canonical_repo_url, get_all_subscriptions, get_subscription_by_url
+from github_sentinel.core.engine import in_flight
+from github_sentinel.core.processor import run_subscriptions
+
+DEFAULT_MAX_JOBS = 2
+ACTIVE_STATES = ("queued", "running", "cancelling")
+
+
+class Job:
+    """One submitted check: what it covers, its state and per-repository progress."""
+
+    def __init__(self, job_id: int, kind: str, target: str, repo_urls: list[str] | None = None):
+        self.id = job_id
+        self.kind = kind  # "check" or "checkall"
+        self.target = target
+        self.repo_urls = repo_urls  # None: every subscription at start time
+        self.status = "queued"
+        self.total = len(repo_urls) if repo_urls is not None else 0
+        self.done = 0
+        self.failed = 0
+        self.skipped = 0  # Already being processed by another sweep
+        self.error: str | None = None
+        self.submitted_at = datetime.now(timezone.utc)
+        self.started_at: datetime | None = None
+        self.finished_at: datetime | None = None
+        self.cancel_event = threading.Event()
+        self.future = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in ACTIVE_STATES
+
+    def covers(self, repo_url: str) -> bool:
+        return self.repo_urls is None or repo_url in self.repo_urls
+
+    def progress(self, result):
+        """Sweep `progress` hook: one repository finished (or was skipped by a cancellation)."""
+        if result.error == "cancelled":
+            return
+        self.done += 1
+        if not result.ok:
+            self.failed += 1
+
+    def describe(self) -> str:
+        line = f"#{self.id} {self.kind} {self.target}: {self.status}"
+        if self.total:
+            line += f", {self.done}/{self.total} repositories"
+        if self.failed:
+            line += f", {self.failed} failed"
+        if self.skipped:
+            line += f", {self.skipped} skipped (already in progress)"
+        end = self.finished_at or datetime.now(timezone.utc)
+        if self.started_at:
+            line += f", {(end - self.started_at).total_seconds():.1f}s"
+        if self.error:
+            line += f" ({self.error})"
+        return line
+
+
+class JobManager:
+    """Runs check jobs on a shared executor of `interactive.max_jobs` threads."""
+
+    def __init__(self, max_jobs: int | None = None, on_finish=None):
+        settings = config.get('interactive', {}) or {}
+        self.max_jobs = max(1, int(max_jobs or settings.get('max_jobs', DEFAULT_MAX_JOBS)))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_jobs, thread_name_prefix="sentinel-job")
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._jobs: dict[int, Job] = {}
+        self._on_finish = on_finish or (lambda job: print(f"\n[job] {job.describe()}"))
+
+    # --- Submission ---
+
+    def _conflict(self, repo_url: str | None) -> Job | None:
+        """An active job that already covers `repo_url` (any active job, for a check of everything)."""
+        for job in self._jobs.values():
+            if job.active and (repo_url is None or job.covers(repo_url)):
+                return job
+        return None
+
+    def _submit(self, kind: str, target: str, repo_urls: list[str] | None) -> Job:
+        with self._lock:
+            conflict = self._conflict(repo_urls[0] if repo_urls else None)
+            if conflict is not None:
+                raise ValueError(f"Already covered by job #{conflict.id} ({conflict.status}); "
+                                 f"see 'status {conflict.id}'.")
+            job = Job(next(self._ids), kind, target, repo_urls)
+            self._jobs[job.id] = job
+            job.future = self._executor.submit(self._run, job)
+        return job
+
+    def submit_check(self, repo_url: str) -> Job:
+        """Queues a check of one subscribed repository."""
+        subscription = get_subscription_by_url(canonical_repo_url(repo_url))
+        if subscription is None:
+            raise ValueError(f"Repository '{repo_url}' is not subscribed. Use 'add' command first.")
+        if subscription.repo_url in in_flight:
+            raise ValueError(f"{subscription.repo_url} is already being processed.")
+        return self._submit("check", subscription.repo_url, [subscription.repo_url])
+
+    def submit_checkall(self) -> Job:
+        """Queues a check of every subscribed repository."""
+        return self._submit("checkall", "all repositories", None)
+
+    # --- Execution ---
+
+    def _run(self, job: Job):
+        if job.cancel_event.is_set():
+            job.status = "cancelled"
+            return
+        job.status = "running"
+        job.started_at = datetime.now(timezone.utc)
+        try:
+            if job.repo_urls is None:
+                subscriptions = get_all_subscriptions()
+            else:
+                # Re-read at start: the repository may have been removed while the job was queued
+                subscriptions = [sub for sub in map(get_subscription_by_url, job.repo_urls) if sub is not None]
+            job.total = len(subscriptions)
+            report = run_subscriptions(subscriptions, progress=job.progress, cancel=job.cancel_event)
+            job.skipped = job.total - len(report.results)
+            job.status = "cancelled" if job.cancel_event.is_set() else "done"
+        except Exception as e:
+            job.status, job.error = "failed", str(e)
+        finally:
+            job.finished_at = datetime.now(timezone.utc)
+            self._on_finish(job)
+
+    # --- Inspection and control ---
+
+    def jobs(self) -> list[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def get(self, job_id: int) -> Job | None:
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: int) -> Job:
+        """Cancels a job: a queued one never starts, a running one skips the repositories it has not begun."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise ValueError(f"No job #{job_id}.")
+        if not job.active:
+            raise ValueError(f"Job #{job_id} already finished ({job.status}).")
+        job.cancel_event.set()
+        if job.future.cancel():
+            job.status = "cancelled"
+            job.finished_at = datetime.now(timezone.utc)
+        elif job.status == "running":
+            job.status = "cancelling"
+        return job
+
+    def shutdown(self, cancel: bool = True):
+        """Stops accepting jobs; with `cancel`, pending work is cancelled first. Waits for running jobs."""
+        if cancel:
+            for job in self.jobs():
+                if job.active:
+                    job.cancel_event.set()
+        self._executor.shutdown(wait=True, cancel_futures=cancel)
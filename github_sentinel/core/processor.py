@@ -1,54 +1,269 @@
-from github_sentinel.components.db_manager import get_all_subscriptions, update_last_checked
-from github_sentinel.components.github_client import GitHubClient
-from github_sentinel.components.summarizer import get_summarizer
+from github_sentinel.components.db_manager import SweepBatch, get_all_subscriptions, record_checks, update_last_checked
+from github_sentinel.components.registry import shared_fetcher, shared_summarizer
 from github_sentinel.components.notifiers import dispatch_notification
+from github_sentinel.components.metrics import metrics, write_sweep_metrics
+from github_sentinel.components.activity_store import prune_activity, record_activity, store_enabled
+from github_sentinel.components.subscribers import apply_filters, audiences_for
+from github_sentinel.core.engine import SweepEngine, SweepReport, in_flight
+import time
 
-def process_subscription(subscription):
+
+def _untimed_stage(name: str):
+    """Default `stage` hook: no concurrency limit; the stage is only timed in the process metrics."""
+    return metrics.timer("sentinel_stage_seconds", stage=name)
+
+
+def _fetch(subscription, client, stage, prefetched=None) -> dict:
+    """Fetches updates since the last check, or unwraps a batched prefetch result."""
+    if isinstance(prefetched, Exception):
+        raise prefetched
+    if prefetched is not None:
+        return prefetched
+    with stage("fetch"):
+        return client.fetch_updates(subscription.repo_url, since=subscription.last_checked_at,
+                                    watermarks=subscription.watermarks)
+
+
+def _record_check(subscription, updates: dict, batch=None):
+    """
+    Counts the fetched items, including those a streaming fetch counted but
+    did not keep; the scheduler adapts each repo's polling interval to them.
+    """
+    items = sum(len(values) + getattr(values, "remaining", 0) for values in updates.values() if values is not None)
+    if batch is not None:
+        batch.record_check(subscription.id, items)
+    else:
+        record_checks({subscription.id: items})
+
+
+def _store(subscription, updates: dict, stage):
+    """Keeps the fetched items in the local activity store; a failure here never blocks the report."""
+    if not store_enabled():
+        return
+    try:
+        with stage("store"):
+            record_activity(subscription.repo_url, updates)
+    except Exception as e:
+        print(f"Warning: Could not store activity of {subscription.repo_url}: {e}")
+
+
+def _finish_without_updates(subscription, client, batch=None):
+    print(f"No new updates for {subscription.repo_url}.")
+    # Still update the timestamp
+    _mark_checked(subscription, batch)
+    client.commit_state(subscription.repo_url, batch)
+
+
+def _mark_checked(subscription, batch=None):
+    """Records the check time, inside the sweep's batch when there is one."""
+    if batch is not None:
+        batch.mark_checked(subscription.id)
+    else:
+        update_last_checked(subscription.id)
+
+
+def _audience_reports(subscription, updates: dict, summarizer, primary_report: str | None = None) -> list:
+    """
+    One report per audience of the repository (see `subscribers.audiences_for`):
+    followers sharing a summarizer and filters share a report, so each
+    variant is summarized once however many subscribers receive it.
+    `primary_report` is the unfiltered default report if it was already made.
+    """
+    reports = []
+    for audience in audiences_for(subscription.id):
+        if audience.primary:
+            if primary_report is None:
+                primary_report = summarizer.summarize(repo_url=subscription.repo_url, updates=updates)
+            reports.append((audience, primary_report))
+            continue
+        visible = apply_filters(updates, audience.filters)
+        if not any(visible.values()):
+            continue
+        variant = shared_summarizer(audience.summarizer) if audience.summarizer else summarizer
+        reports.append((audience, variant.summarize(repo_url=subscription.repo_url, updates=visible)))
+    return reports
+
+
+def _deliver(subscription, client, reports: list, stage, batch=None):
+    """Dispatches the finished reports to their audiences and persists the repo's fetch state."""
+    try:
+        # Dispatch the report to configured notifiers and to the subscribers' channels
+        print(f"Sending notification for {subscription.repo_url}...")
+        print(f"report: {reports[0][1]}")
+        with stage("notify"):
+            for audience, report in reports:
+                dispatch_notification(report, repo_url=subscription.repo_url, channels=audience.channels,
+                                      include_default=audience.include_default)
+    except Exception:
+        # Keep the old validators so the next check fetches these updates again.
+        client.discard_state(subscription.repo_url)
+        raise
+
+    # Persist fetch state (conditional-request validators, high-water marks) and update the
+    # 'last_checked_at' timestamp in the database
+    client.commit_state(subscription.repo_url, batch)
+    _mark_checked(subscription, batch)
+    print(f"Finished processing {subscription.repo_url}.")
+
+
+def process_subscription(subscription, stage=_untimed_stage, prefetched=None, batch=None):
     """
     Processes a single repository subscription.
     Fetches updates, generates a summary, and sends notifications.
+
+    `stage` is a callable returning a context manager for each pipeline stage
+    ("fetch", "summarize", "notify"); the sweep engine uses it to apply
+    per-stage concurrency limits and record timings. `prefetched` carries the
+    result of a batched fetch (updates dict or the exception it raised).
+    With a `batch` (the sweep's unit of work), database writes are collected
+    and written together instead of committed one repository at a time.
     """
     print(f"Processing {subscription.repo_url}...")
     
-    # 1. Initialize components
-    client = GitHubClient()
-    summarizer = get_summarizer() # 使用工厂函数
+    # 1. Get the shared, process-wide components (built on first use)
+    client = shared_fetcher()
+    summarizer = shared_summarizer()
     
     # 2. Fetch updates since the last check
-    updates = client.fetch_updates(subscription.repo_url, since=subscription.last_checked_at)
-    
+    updates = _fetch(subscription, client, stage, prefetched)
+    _record_check(subscription, updates, batch)
+
     # Check if there's anything to report
     if not any(updates.values()):
-        print(f"No new updates for {subscription.repo_url}.")
-        update_last_checked(subscription.id) # Still update the timestamp
+        _finish_without_updates(subscription, client, batch)
         return
+    _store(subscription, updates, stage)
 
     # 3. Use AI to generate a summary report
     print(f"Generating AI summary for {subscription.repo_url}...")
-    report = summarizer.summarize(repo_url=subscription.repo_url, updates=updates)
-    
-    # 4. Dispatch the report to configured notifiers
-    print(f"Sending notification for {subscription.repo_url}...")
-    print(f"report: {report}")
-    dispatch_notification(report)
-    
-    # 5. Update the 'last_checked_at' timestamp in the database
-    # update_last_checked(subscription.id)
-    print(f"Finished processing {subscription.repo_url}.")
+    try:
+        with stage("summarize"):
+            reports = _audience_reports(subscription, updates, summarizer)
+    except Exception:
+        client.discard_state(subscription.repo_url)
+        raise
+
+    # 4. Notify and persist state
+    _deliver(subscription, client, reports, stage, batch)
+
+
+def _run_batched(subscriptions, engine, summarizer, prefetched: dict, batch: SweepBatch, progress=None,
+                 cancel=None):
+    """
+    Three-phase sweep for summarizers that batch LLM requests: fetch every
+    repository concurrently, summarize all of them together with
+    `summarize_many`, then notify concurrently.
+    """
+    client = shared_fetcher()
+    fetched = {}
+
+    def fetch_only(sub, stage):
+        updates = _fetch(sub, client, stage, prefetched.get(sub.repo_url))
+        _record_check(sub, updates, batch)
+        if not any(updates.values()):
+            _finish_without_updates(sub, client, batch)
+            return
+        _store(sub, updates, stage)
+        fetched[sub.repo_url] = (sub, updates)
 
+    def fetch_progress(result):
+        # Repositories with updates are only done once notified
+        if progress is not None and result.repo_url not in fetched:
+            progress(result)
 
-def run_once():
+    fetch_report = engine.run(subscriptions, fetch_only, progress=fetch_progress, cancel=cancel)
+
+    start = time.perf_counter()
+    try:
+        reports = summarizer.summarize_many([(url, updates) for url, (_, updates) in fetched.items()])
+    except Exception:
+        for url in fetched:
+            client.discard_state(url)
+        raise
+    summarize_time = time.perf_counter() - start
+    print(f"Batched summarization of {len(fetched)} repositories took {summarize_time:.2f}s.")
+
+    def notify_only(sub, stage):
+        # Subscribers with their own summarizer or filters get their variants summarized here
+        try:
+            with stage("summarize"):
+                audience_reports = _audience_reports(sub, fetched[sub.repo_url][1], summarizer,
+                                                     primary_report=reports[sub.repo_url])
+        except Exception:
+            client.discard_state(sub.repo_url)
+            raise
+        _deliver(sub, client, audience_reports, stage, batch)
+
+    notify_report = engine.run([sub for sub, _ in fetched.values()], notify_only, progress=progress)
+    return SweepReport.combine([fetch_report, notify_report], extra_time=summarize_time)
+
+
+def run_subscriptions(subscriptions, max_workers: int | None = None, prefetched: dict | None = None,
+                      progress=None, cancel=None):
+    """
+    Runs the check-and-report process for the given subscriptions.
+    Repositories are processed concurrently by the sweep engine; a summary of
+    total wall time and per-repo timings is printed at the end.
+    `prefetched` maps repo URLs to updates obtained elsewhere (e.g. buffered
+    webhook events); only the other repositories are fetched from GitHub.
+    Repositories another sweep of this process is still working on are
+    skipped. `progress` and `cancel` are passed on to `SweepEngine.run`.
+    """
+    subscriptions, busy = in_flight.claim(subscriptions)
+    if busy:
+        print(f"Skipping {len(busy)} repositories another sweep is already processing.")
+    try:
+        return _run_claimed(subscriptions, max_workers, prefetched, progress, cancel)
+    finally:
+        in_flight.release(subscriptions)
+
+
+def _run_claimed(subscriptions, max_workers, prefetched, progress, cancel):
+    engine = SweepEngine(max_workers=max_workers)
+    print(f"Sweeping {len(subscriptions)} repositories with {engine.max_workers} workers...")
+    fetcher = shared_fetcher()
+    summarizer = shared_summarizer()
+    prefetched = dict(prefetched or {})
+    if hasattr(fetcher, "fetch_updates_batch"):
+        to_fetch = [sub for sub in subscriptions if sub.repo_url not in prefetched]
+        prefetched.update(engine.prefetch_batches(to_fetch, fetcher))
+
+    # One unit of work for the whole sweep; whatever finished is written even if the sweep fails
+    batch = SweepBatch()
+    try:
+        if getattr(summarizer, "batching", False):
+            report = _run_batched(subscriptions, engine, summarizer, prefetched, batch, progress, cancel)
+        else:
+            def process(sub, stage):
+                return process_subscription(sub, stage=stage, prefetched=prefetched.get(sub.repo_url), batch=batch)
+            report = engine.run(subscriptions, process, progress=progress, cancel=cancel)
+    finally:
+        batch.flush()
+
+    report.print_summary()
+    cache = getattr(summarizer, "cache", None)
+    if cache is not None:
+        print(cache.describe())
+
+    metrics.observe("sentinel_sweep_seconds", report.wall_time)
+    for result in report.results:
+        outcome = "ok" if result.ok else "cancelled" if result.error == "cancelled" else "failed"
+        metrics.inc("sentinel_repos_processed_total", result=outcome)
+    write_sweep_metrics(report)
+    if store_enabled():
+        pruned = prune_activity()
+        if pruned:
+            print(f"Pruned {pruned} activity events past the retention period.")
+    return report
+
+
+def run_once(max_workers: int | None = None):
     """Runs the complete check-and-report process for all subscriptions."""
     subscriptions = get_all_subscriptions()
     if not subscriptions:
         print("No subscriptions found. Exiting.")
-        return
-
-    for sub in subscriptions:
-        try:
-            process_subscription(sub)
-        except Exception as e:
-            print(f"ERROR: Failed to process {sub.repo_url}. Reason: {e}")
+        return None
+    return run_subscriptions(subscriptions, max_workers=max_workers)
 
 
 from github_sentinel.components.db_manager import get_subscription_by_url # <-- 新增导入
@@ -62,8 +277,16 @@ def check_single_repo(repo_url: str):
         print(f"ERROR: Repository '{repo_url}' is not subscribed. Use 'add' command first.")
         return
 
+    # 正在被其他扫描（例如调度器）处理的仓库不重复检查
+    claimed, _ = in_flight.claim([subscription])
+    if not claimed:
+        print(f"{subscription.repo_url} is already being processed; skipping.")
+        return
+
     try:
         # 复用已有的处理逻辑
         process_subscription(subscription)
     except Exception as e:
-        print(f"ERROR: Failed to process {subscription.repo_url}. Reason: {e}")
\ No newline at end of file
+        print(f"ERROR: Failed to process {subscription.repo_url}. Reason: {e}")
+    finally:
+        in_flight.release(claimed)
\ No newline at end of file
@@ -1,15 +1,102 @@
+from datetime import datetime, timezone
 from apscheduler.schedulers.blocking import BlockingScheduler
-from github_sentinel.core.processor import run_once
+from github_sentinel.core.processor import run_subscriptions
+from github_sentinel.core.schedules import AdaptivePolicy, Schedule, safe_parse_schedule, initial_due_at, next_due_at, jitter
+from github_sentinel.components.config_loader import config
+from github_sentinel.components.db_manager import (
+    get_due_subscriptions, get_subscriptions_by_ids, get_unscheduled_subscriptions, set_next_due,
+)
+from github_sentinel.components.registry import close_shared_components
+from github_sentinel.components.metrics import start_metrics_server
 
-def start_scheduler():
+DEFAULT_TICK_SECONDS = 60
+DEFAULT_JITTER = 0.05
+DEFAULT_MAX_JITTER_SECONDS = 900
+
+
+def _scheduler_config() -> dict:
+    return config.get('scheduler', {}) or {}
+
+
+def place_unscheduled(now: datetime):
+    """Gives newly added subscriptions their first due time, spread across their schedule window."""
+    due_times = {}
+    for sub in get_unscheduled_subscriptions():
+        schedule = safe_parse_schedule(sub.schedule)
+        due_times[sub.id] = initial_due_at(sub.repo_url, schedule, now)
+    if due_times:
+        print(f"Scheduled {len(due_times)} new subscription(s).")
+    set_next_due(due_times)
+
+
+def schedule_tick(runner=None):
+    """
+    One scheduler pass: picks up subscriptions added since the last tick, runs
+    every subscription that is due (or enqueues it when `queue.enabled`), and
+    moves each one to its next (jittered) due time. Removed subscriptions simply stop showing up in the due query.
+    `runner` replaces `run_subscriptions` for the due subscriptions (and is never bypassed by the queue).
+    """
+    now = datetime.now(timezone.utc)
+    place_unscheduled(now)
+
+    due = get_due_subscriptions(now)
+    if not due:
+        return None
+
+    print(f"{len(due)} subscription(s) due.")
+    if runner is not None:
+        report = runner(due)
+    elif (config.get('queue', {}) or {}).get('enabled'):
+        # Hand the work to `sentinel worker` processes via the durable queue.
+        from github_sentinel.components.job_queue import JobQueue
+        queued = JobQueue().enqueue(due)
+        print(f"Enqueued {queued} job(s); {len(due) - queued} already queued.")
+        report = None
+    else:
+        report = run_subscriptions(due)
+
+    scheduler_config = _scheduler_config()
+    fraction = float(scheduler_config.get('jitter', DEFAULT_JITTER))
+    max_jitter = float(scheduler_config.get('max_jitter_seconds', DEFAULT_MAX_JITTER_SECONDS))
+    policy = AdaptivePolicy.from_config(scheduler_config.get('adaptive'))
+    finished = datetime.now(timezone.utc)
+    # Re-read the activity statistics the run just recorded
+    checked = {sub.id: sub for sub in get_subscriptions_by_ids([sub.id for sub in due])}
+    due_times, intervals, slots = {}, {}, {}
+    for sub in due:
+        schedule = safe_parse_schedule(sub.schedule)
+        interval, reason = policy.interval_for(schedule, checked.get(sub.id, sub))
+        if interval is not None:
+            schedule = Schedule(schedule.expression, interval=interval)
+        intervals[sub.id] = (int(interval.total_seconds()) if interval else None, reason)
+        # Advance from the un-jittered slot so jitter does not accumulate run after run
+        slots[sub.id] = next_due_at(schedule, sub.scheduled_at or sub.next_due_at, finished)
+        due_times[sub.id] = slots[sub.id] + jitter(schedule, fraction, max_jitter)
+    set_next_due(due_times, intervals, slots)
+    return report
+
+
+def register_jobs(scheduler, runner=None):
+    """Adds the periodic schedule tick to an APScheduler instance."""
+    tick_seconds = int(_scheduler_config().get('tick_seconds', DEFAULT_TICK_SECONDS))
+    scheduler.add_job(
+        schedule_tick, 'interval', seconds=tick_seconds, id='schedule_tick', kwargs={"runner": runner},
+        max_instances=1, coalesce=True, next_run_time=datetime.now(timezone.utc),
+    )
+
+
+def start_scheduler(runner=None):
     """Initializes and starts the task scheduler."""
     scheduler = BlockingScheduler(timezone="UTC")
-    
-    # This is a simple schedule. Can be enhanced to read schedules from the DB.
-    scheduler.add_job(run_once, 'interval', hours=24, id='daily_check') 
+
+    # Schedules are read per subscription from the DB on every tick.
+    register_jobs(scheduler, runner)
+    start_metrics_server()
     
     print("Scheduler started. Press Ctrl+C to exit.")
     try:
         scheduler.start()
     except (KeyboardInterrupt, SystemExit):
         print("Scheduler stopped.")
+    finally:
+        close_shared_components()
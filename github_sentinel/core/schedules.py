@@ -0,0 +1,183 @@
+import hashlib
+import random
+import re
+from datetime import datetime, timedelta, timezone
+
+NAMED_INTERVALS = {
+    "hourly": timedelta(hours=1),
+    "daily": timedelta(days=1),
+    "weekly": timedelta(weeks=1),
+}
+_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+_INTERVAL_RE = re.compile(r"^(?:every\s+)?(\d+)\s*([smhdw])$")
+
+
+class Schedule:
+    """
+    A parsed `Subscription.schedule` value. Supported forms:
+      - "hourly", "daily", "weekly"
+      - intervals such as "6h", "30m", "every 2d"
+      - cron expressions: "cron: 0 9 * * 1-5" (or a bare five-field expression)
+    """
+
+    def __init__(self, expression: str, interval: timedelta | None = None, cron: str | None = None):
+        self.expression = expression
+        self.interval = interval
+        self.cron = cron
+        self._trigger = None
+        if cron:
+            from apscheduler.triggers.cron import CronTrigger
+            self._trigger = CronTrigger.from_crontab(cron, timezone="UTC")
+
+    def next_after(self, moment: datetime) -> datetime:
+        """The first run time strictly after `moment`."""
+        if self._trigger is not None:
+            return self._trigger.get_next_fire_time(None, moment + timedelta(seconds=1))
+        return moment + self.interval
+
+    def period(self) -> timedelta:
+        """Typical distance between runs, used to size jitter and spreading."""
+        if self.interval is not None:
+            return self.interval
+        first = self.next_after(datetime.now(timezone.utc))
+        return self.next_after(first) - first
+
+
+def parse_schedule(expression: str) -> Schedule:
+    """Parses a schedule string; raises ValueError if it is not understood."""
+    value = (expression or "").strip().lower()
+    if value in NAMED_INTERVALS:
+        return Schedule(value, interval=NAMED_INTERVALS[value])
+
+    match = _INTERVAL_RE.match(value)
+    if match:
+        amount, unit = int(match.group(1)), match.group(2)
+        if amount <= 0:
+            raise ValueError(f"Schedule interval must be positive: '{expression}'")
+        return Schedule(value, interval=timedelta(**{_UNITS[unit]: amount}))
+
+    cron = value[len("cron:"):].strip() if value.startswith("cron:") else value
+    if len(cron.split()) == 5:
+        try:
+            return Schedule(expression.strip(), cron=cron)
+        except ValueError as e:
+            raise ValueError(f"Invalid cron expression '{cron}': {e}")
+
+    raise ValueError(
+        f"Unknown schedule '{expression}'. Use hourly/daily/weekly, an interval like '6h', "
+        "or a cron expression like 'cron: 0 9 * * *'."
+    )
+
+
+def safe_parse_schedule(expression: str) -> Schedule:
+    """Like `parse_schedule`, but falls back to daily for bad values already stored in the DB."""
+    try:
+        return parse_schedule(expression)
+    except ValueError as e:
+        print(f"Warning: {e} Falling back to 'daily'.")
+        return Schedule("daily", interval=NAMED_INTERVALS["daily"])
+
+
+def jitter(schedule: Schedule, fraction: float, max_seconds: float) -> timedelta:
+    """Random delay of up to `fraction` of the schedule's period (capped at `max_seconds`)."""
+    limit = min(schedule.period().total_seconds() * fraction, max_seconds)
+    return timedelta(seconds=random.uniform(0, limit)) if limit > 0 else timedelta(0)
+
+
+def initial_due_at(repo_url: str, schedule: Schedule, now: datetime) -> datetime:
+    """
+    First due time for a subscription that has never been scheduled.
+    Interval schedules get a stable, hash-derived offset inside their first
+    period, so many repos added at once are spread evenly instead of all
+    coming due at the same instant.
+    """
+    if schedule.interval is None:
+        return schedule.next_after(now)
+    digest = int(hashlib.sha1(repo_url.encode("utf-8")).hexdigest()[:8], 16)
+    offset = (digest / 0xFFFFFFFF) * schedule.interval.total_seconds()
+    return now + timedelta(seconds=offset)
+
+
+def next_due_at(schedule: Schedule, previous_due: datetime | None, now: datetime) -> datetime:
+    """
+    Next due time after a run. Interval schedules advance from the previous due
+    time so each repo keeps its slot in the window; if that is already past
+    (e.g. after downtime) they restart from now.
+    """
+    if schedule.interval is not None and previous_due is not None:
+        candidate = previous_due + schedule.interval
+        if candidate > now:
+            return candidate
+    return schedule.next_after(now)
+
+
+def format_interval(seconds: float) -> str:
+    """3600 -> '1h', 129600 -> '1d 12h', 90 -> '1m 30s'."""
+    remaining, parts = int(seconds), []
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60), ("s", 1)):
+        if remaining >= size:
+            parts.append(f"{remaining // size}{unit}")
+            remaining %= size
+    return " ".join(parts[:2]) or "0s"
+
+
+class AdaptivePolicy:
+    """
+    Chooses a repository's polling interval from its observed activity, within
+    `[min_interval, max_interval]`:
+      - dormant repos (`dormant_after` or more empty checks in a row) back off
+        exponentially: the schedule's interval times `backoff_factor` per
+        further empty check,
+      - busy repos (more than `busy_items` items per check on average) are
+        checked proportionally more often, aiming at about `busy_items` per check,
+      - everything else keeps its schedule's interval.
+    Cron schedules name exact run times and are never adapted.
+    """
+
+    def __init__(self, enabled: bool = True, min_interval: str = "1h", max_interval: str = "30d",
+                 dormant_after: int = 2, backoff_factor: float = 2.0, busy_items: int = 100):
+        self.enabled = enabled
+        self.min_interval = parse_schedule(min_interval).interval
+        self.max_interval = parse_schedule(max_interval).interval
+        if self.min_interval is None or self.max_interval is None:
+            raise ValueError("scheduler.adaptive min_interval and max_interval must be intervals such as '1h' or '30d'.")
+        self.dormant_after = max(1, int(dormant_after))
+        self.backoff_factor = max(1.0, float(backoff_factor))
+        self.busy_items = max(1, int(busy_items))
+
+    @classmethod
+    def from_config(cls, settings: dict) -> "AdaptivePolicy":
+        settings = settings or {}
+        return cls(
+            enabled=bool(settings.get('enabled', True)),
+            min_interval=str(settings.get('min_interval', '1h')),
+            max_interval=str(settings.get('max_interval', '30d')),
+            dormant_after=settings.get('dormant_after', 2),
+            backoff_factor=settings.get('backoff_factor', 2.0),
+            busy_items=settings.get('busy_items', 100),
+        )
+
+    def interval_for(self, schedule: Schedule, subscription) -> tuple[timedelta | None, str]:
+        """(interval, reason); the interval is None when the schedule applies unchanged."""
+        if schedule.interval is None:
+            return None, "cron schedule"
+        if not self.enabled or subscription.avg_items_per_check is None:
+            return None, "schedule"
+
+        base = schedule.interval.total_seconds()
+        streak = subscription.empty_check_streak or 0
+        average = subscription.avg_items_per_check
+        if streak >= self.dormant_after:
+            seconds = base * self.backoff_factor ** min(streak - self.dormant_after + 1, 64)
+            reason = f"dormant: {streak} empty checks in a row"
+        elif average > self.busy_items:
+            seconds = base * self.busy_items / average
+            reason = f"busy: ~{average:.0f} items per check"
+        else:
+            return None, "schedule"
+
+        if seconds < self.min_interval.total_seconds():
+            return self.min_interval, f"{reason} (at minimum)"
+        if seconds > self.max_interval.total_seconds():
+            return self.max_interval, f"{reason} (at maximum)"
+        return timedelta(seconds=round(seconds)), reason
@@ -0,0 +1,61 @@
+from datetime import datetime, timezone
+from github_sentinel.components.webhooks import (
+    WebhookReceiver, finish_buffered, load_buffered_updates, prune_webhook_events,
+)
+from github_sentinel.core.processor import run_subscriptions
+
+
+def uses_buffer(subscription, receiver_started_at: datetime) -> bool:
+    """
+    A repository is reported from buffered webhook events only if it has a
+    webhook and the receiver has been running since its activity was last
+    known to be covered; otherwise deliveries may have been missed and it is polled.
+    """
+    return (subscription.webhook_last_event_at is not None
+            and subscription.webhook_synced_at is not None
+            and subscription.webhook_synced_at >= receiver_started_at)
+
+
+def run_webhook_sweep(subscriptions, receiver_started_at: datetime, max_workers: int | None = None):
+    """
+    Runs the pipeline for `subscriptions`: repositories with an up-to-date
+    webhook buffer are reported from their buffered events without calling the
+    GitHub API; the rest are polled as usual.
+    """
+    sweep_started = datetime.now(timezone.utc)
+    prefetched, buffered = {}, {}
+    polled_webhook_repos = {}
+    for sub in subscriptions:
+        if uses_buffer(sub, receiver_started_at):
+            # Deliveries that arrived during an earlier catch-up poll may repeat what it reported
+            updates, event_ids, marks = load_buffered_updates(sub.id, until=sweep_started, watermarks=sub.watermarks)
+            prefetched[sub.repo_url] = updates
+            buffered[sub.repo_url] = (event_ids, marks)
+        elif sub.webhook_last_event_at is not None:
+            # Catch-up poll after a gap; deliveries from now on land in the buffer
+            polled_webhook_repos[sub.repo_url] = sub.id
+    print(f"Webhook sweep: {len(buffered)} repositories from buffered events, "
+          f"{len(subscriptions) - len(buffered)} polled.")
+
+    report = run_subscriptions(subscriptions, max_workers=max_workers, prefetched=prefetched)
+
+    ok = {result.repo_url for result in report.results if result.ok}
+    finish_buffered({url: state for url, state in buffered.items() if url in ok},
+                    {sub_id: sweep_started for url, sub_id in polled_webhook_repos.items() if url in ok})
+    pruned = prune_webhook_events()
+    if pruned:
+        print(f"Pruned {pruned} processed webhook events.")
+    return report
+
+
+def serve_webhooks(host: str | None = None, port: int | None = None):
+    """
+    Receives GitHub webhooks and runs the scheduler, reporting webhook
+    repositories from their buffered events and polling only the others.
+    """
+    from github_sentinel.core.scheduler import start_scheduler
+    receiver = WebhookReceiver(host=host, port=port).start()
+    try:
+        start_scheduler(runner=lambda due: run_webhook_sweep(due, receiver.started_at))
+    finally:
+        receiver.close()
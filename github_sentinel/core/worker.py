@@ -0,0 +1,77 @@
+import multiprocessing
+import os
+import socket
+import time
+from github_sentinel.components.config_loader import config
+
+DEFAULT_POLL_SECONDS = 5
+
+
+def worker_loop(index: int, poll_seconds: float):
+    """Leases and processes jobs until interrupted. Runs inside one worker process."""
+    # Imported here so each spawned process builds its own DB engine and clients.
+    from github_sentinel.components.db_manager import get_subscription_by_id
+    from github_sentinel.components.job_queue import JobQueue
+    from github_sentinel.components.registry import close_shared_components
+    from github_sentinel.core.processor import process_subscription
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{index}"
+    queue = JobQueue()
+    print(f"[{worker_id}] Worker started.")
+    try:
+        while True:
+            job = queue.lease(worker_id)
+            if job is None:
+                time.sleep(poll_seconds)
+                continue
+
+            subscription = get_subscription_by_id(job.subscription_id)
+            if subscription is None:
+                # Unsubscribed after the job was queued
+                queue.complete(job)
+                continue
+
+            print(f"[{worker_id}] Job {job.id}: {job.repo_url} (attempt {job.attempts}/{job.max_attempts})")
+            try:
+                process_subscription(subscription)
+            except Exception as e:
+                print(f"[{worker_id}] ERROR: Job {job.id} for {job.repo_url} failed. Reason: {e}")
+                if not queue.fail(job, str(e)):
+                    print(f"[{worker_id}] Job {job.id}: lease expired meanwhile; another worker owns it now.")
+            else:
+                if not queue.complete(job):
+                    print(f"[{worker_id}] Job {job.id}: lease expired meanwhile; another worker owns it now.")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        close_shared_components()
+        print(f"[{worker_id}] Worker stopped.")
+
+
+def run_workers(processes: int | None = None, poll_seconds: float | None = None):
+    """Starts `processes` worker processes pulling from the job queue and waits for them."""
+    queue_config = config.get('queue', {}) or {}
+    processes = max(1, int(processes or queue_config.get('workers', 1)))
+    poll_seconds = float(poll_seconds or queue_config.get('poll_seconds', DEFAULT_POLL_SECONDS))
+
+    if processes == 1:
+        worker_loop(0, poll_seconds)
+        return
+
+    # 'spawn' gives every worker a fresh interpreter, so no SQLite connection or
+    # HTTP pool is inherited across the fork.
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=worker_loop, args=(i, poll_seconds), name=f"sentinel-worker-{i}")
+               for i in range(processes)]
+    for process in workers:
+        process.start()
+    print(f"Started {processes} worker processes. Press Ctrl+C to stop.")
+    try:
+        for process in workers:
+            process.join()
+    except KeyboardInterrupt:
+        print("Stopping workers...")
+        for process in workers:
+            process.join(timeout=30)
+            if process.is_alive():
+                process.terminate()
@@ -2,19 +2,27 @@
 
 import time
 from apscheduler.schedulers.background import BackgroundScheduler
-from github_sentinel.core.processor import run_once, check_single_repo
-from github_sentinel.components.db_manager import add_subscription, list_subscriptions, remove_subscription
+from github_sentinel.core.jobs import JobManager
+from github_sentinel.core.scheduler import register_jobs
+from github_sentinel.core.schedules import parse_schedule
+from github_sentinel.components.db_manager import (
+    add_subscription, canonical_repo_url, list_subscriptions, remove_subscription,
+)
+from github_sentinel.components.registry import close_shared_components
 
 
 def print_help():
     """打印帮助菜单"""
     print("\n--- GitHub Sentinel Interactive CLI ---")
     print("Available Commands:")
-    print("  add <repo_url>       - Subscribe to a new repository (e.g., add https://github.com/owner/repo)")
+    print("  add <repo_url> [schedule] - Subscribe to a new repository (e.g., add https://github.com/owner/repo 6h)")
     print("  remove <repo_url>    - Unsubscribe from a repository")
     print("  list                 - List all subscribed repositories")
-    print("  check <repo_url>     - Trigger an immediate check for a specific repository")
-    print("  checkall             - Trigger an immediate check for ALL subscribed repositories")
+    print("  check <repo_url>     - Start a background check of a specific repository")
+    print("  checkall             - Start a background check of ALL subscribed repositories")
+    print("  jobs                 - List background checks and their progress")
+    print("  status <job_id>      - Show the progress of one background check")
+    print("  cancel <job_id>      - Cancel a background check (started repositories still finish)")
     print("  help                 - Show this help menu")
     print("  exit                 - Quit the application")
     print("---------------------------------------")
@@ -24,9 +32,11 @@ def interactive_session():
     """启动交互式会话和后台调度器"""
     # 1. 初始化并启动后台调度器
     scheduler = BackgroundScheduler(timezone="UTC")
-    scheduler.add_job(run_once, 'interval', hours=24, id='daily_check')
+    register_jobs(scheduler)
     scheduler.start()
-    print("✅ Background scheduler started. It will check all repos every 24 hours.")
+    print("✅ Background scheduler started. Each repo is checked according to its own schedule.")
+    # 手动触发的检查在后台线程执行，提示符不会被阻塞
+    jobs = JobManager()
 
     print_help()
 
@@ -46,12 +56,22 @@ def interactive_session():
                 break
             elif command == "help":
                 print_help()
-            elif command == "add" and len(args) == 1:
-                repo_url = args[0]
-                add_subscription(repo_url, "daily")
-                print(f"👍 Repository {repo_url} added to subscriptions.")
+            elif command == "add" and len(args) >= 1:
+                schedule = " ".join(args[1:]) or "daily"
+                try:
+                    repo_url = canonical_repo_url(args[0])
+                    parse_schedule(schedule)
+                except ValueError as e:
+                    print(f"❌ {e}")
+                    continue
+                add_subscription(repo_url, schedule)
+                print(f"👍 Repository {repo_url} added to subscriptions with a '{schedule}' schedule.")
             elif command == "remove" and len(args) == 1:
-                repo_url = args[0]
+                try:
+                    repo_url = canonical_repo_url(args[0])
+                except ValueError as e:
+                    print(f"❌ {e}")
+                    continue
                 if remove_subscription(repo_url):
                     print(f"🗑️ Repository {repo_url} removed.")
                 else:
@@ -65,14 +85,32 @@ def interactive_session():
                     for sub in subs:
                         last_checked = sub.last_checked_at.strftime(
                             '%Y-%m-%d %H:%M') if sub.last_checked_at else "Never"
-                        print(f"- {sub.repo_url} (Last checked: {last_checked})")
-            elif command == "check" and len(args) == 1:
-                repo_url = args[0]
-                print(f"⚡ Triggering immediate check for {repo_url}...")
-                check_single_repo(repo_url)
-            elif command == "checkall":
-                print("⚡ Triggering immediate check for ALL repositories...")
-                run_once()
+                        next_due = sub.next_due_at.strftime('%Y-%m-%d %H:%M') if sub.next_due_at else "Pending"
+                        print(f"- {sub.repo_url} (Schedule: {sub.schedule}, Last checked: {last_checked}, Next due: {next_due})")
+            elif command in ("check", "checkall") and len(args) == (1 if command == "check" else 0):
+                try:
+                    job = jobs.submit_check(args[0]) if command == "check" else jobs.submit_checkall()
+                except ValueError as e:
+                    print(f"❌ {e}")
+                    continue
+                print(f"⚡ Started job #{job.id} ({job.kind} {job.target}). Use 'status {job.id}' to follow it.")
+            elif command == "jobs":
+                all_jobs = jobs.jobs()
+                if not all_jobs:
+                    print("No background checks yet.")
+                for job in all_jobs:
+                    print(f"- {job.describe()}")
+            elif command in ("status", "cancel") and len(args) == 1 and args[0].lstrip("#").isdigit():
+                job_id = int(args[0].lstrip("#"))
+                try:
+                    if command == "cancel":
+                        job = jobs.cancel(job_id)
+                        print(f"🛑 Cancelling job #{job.id}: {job.status}.")
+                    else:
+                        job = jobs.get(job_id)
+                        print(job.describe() if job else f"❓ No job #{job_id}.")
+                except ValueError as e:
+                    print(f"❌ {e}")
             else:
                 print(f"❌ Unknown command or incorrect arguments: '{user_input}'")
                 print_help()
@@ -83,6 +121,9 @@ def interactive_session():
         # 4. 优雅地关闭调度器
         print("Shutting down background scheduler...")
         scheduler.shutdown()
+        print("Cancelling background checks (running repositories finish first)...")
+        jobs.shutdown()
+        close_shared_components()
         print("Goodbye!")
 
 
@@ -0,0 +1,41 @@
+# github_sentinel/models/activity_event.py
+
+from sqlalchemy import Boolean, Column, Integer, String, Index, UniqueConstraint
+from datetime import datetime, timezone
+from github_sentinel.models.subscription import Base, AwareDateTime
+
+
+class ActivityEvent(Base):
+    """
+    One fetched commit, issue, pull request or release, normalized into a
+    single table so reports can be rebuilt from local data.
+
+    `github_id` is the commit SHA or the issue/release id; together with the
+    repo and type it identifies an item, so re-fetching it updates the row
+    instead of duplicating it. `occurred_at` is the time the item is reported
+    under: commit date, issue/PR update time or release publication time.
+    """
+    __tablename__ = 'activity_events'
+    __table_args__ = (
+        UniqueConstraint('repo_url', 'type', 'github_id', name='uq_activity_events_repo_type_github_id'),
+        Index('ix_activity_events_repo_type_occurred_at', 'repo_url', 'type', 'occurred_at'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    repo_url = Column(String, nullable=False)
+    type = Column(String, nullable=False)  # commits | issues | pull_requests | releases
+    github_id = Column(String, nullable=False)
+    number = Column(Integer, nullable=True)
+    title = Column(String, nullable=False)  # Commit headline, issue/PR title or release name
+    author = Column(String, nullable=True)
+    state = Column(String, nullable=True)
+    tag_name = Column(String, nullable=True)
+    url = Column(String, nullable=True)
+    draft = Column(Boolean, nullable=False, default=False)
+    created_at = Column(AwareDateTime, nullable=True)
+    occurred_at = Column(AwareDateTime, nullable=True)
+    closed_at = Column(AwareDateTime, nullable=True)
+    first_seen_at = Column(AwareDateTime, default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return f"<ActivityEvent(repo='{self.repo_url}', type='{self.type}', id='{self.github_id}')>"
@@ -0,0 +1,24 @@
+# github_sentinel/models/http_validator.py
+
+from sqlalchemy import Column, Integer, String, UniqueConstraint
+from datetime import datetime, timezone
+from github_sentinel.models.subscription import Base, AwareDateTime
+
+
+class HttpValidator(Base):
+    """
+    Cached HTTP validators (ETag / Last-Modified) for one GitHub endpoint of one repository.
+    Sent back as If-None-Match / If-Modified-Since so unchanged endpoints answer 304.
+    """
+    __tablename__ = 'http_validators'
+    __table_args__ = (UniqueConstraint('repo_url', 'endpoint', name='uq_http_validators_repo_endpoint'),)
+
+    id = Column(Integer, primary_key=True)
+    repo_url = Column(String, nullable=False, index=True)
+    endpoint = Column(String, nullable=False)
+    etag = Column(String, nullable=True)
+    last_modified = Column(String, nullable=True)
+    updated_at = Column(AwareDateTime, default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return f"<HttpValidator(repo='{self.repo_url}', endpoint='{self.endpoint}', etag='{self.etag}')>"
@@ -0,0 +1,33 @@
+# github_sentinel/models/job.py
+
+from sqlalchemy import Column, Integer, String, Index
+from datetime import datetime, timezone
+from github_sentinel.models.subscription import Base, AwareDateTime
+
+
+class Job(Base):
+    """
+    A durable unit of work in the SQLite-backed job queue (one repository check).
+    Workers lease jobs for a limited time; a lease that expires (e.g. because the
+    worker crashed) makes the job visible to other workers again.
+    """
+    __tablename__ = 'jobs'
+    __table_args__ = (Index('ix_jobs_status_available_at', 'status', 'available_at'),)
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False, default="check")
+    subscription_id = Column(Integer, nullable=False, index=True)
+    repo_url = Column(String, nullable=False)
+    # pending -> leased -> done, or back to pending for a retry, or dead after max_attempts
+    status = Column(String, nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    available_at = Column(AwareDateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    lease_until = Column(AwareDateTime, nullable=True)
+    leased_by = Column(String, nullable=True)
+    last_error = Column(String, nullable=True)
+    created_at = Column(AwareDateTime, default=lambda: datetime.now(timezone.utc))
+    finished_at = Column(AwareDateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<Job(id={self.id}, repo='{self.repo_url}', status='{self.status}', attempts={self.attempts})>"
@@ -0,0 +1,33 @@
+# github_sentinel/models/outbound_message.py
+
+from sqlalchemy import Column, Integer, String, Text, Index
+from datetime import datetime, timezone
+from github_sentinel.models.subscription import Base, AwareDateTime
+
+
+class OutboundMessage(Base):
+    """
+    A report waiting to be delivered to one notification channel.
+    Messages are persisted before sending, so reports that could not be
+    delivered (webhook down, process stopped) are retried on the next start.
+    """
+    __tablename__ = 'outbound_messages'
+    __table_args__ = (Index('ix_outbound_messages_channel_status_available_at', 'channel', 'status', 'available_at'),)
+
+    id = Column(Integer, primary_key=True)
+    channel = Column(String, nullable=False)
+    repo_url = Column(String, nullable=True)
+    body = Column(Text, nullable=False)
+    # pending -> sending -> sent, or back to pending for a retry, or dead after max_attempts
+    status = Column(String, nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    # Posts of a multi-post report already delivered; a retry resumes after them
+    posts_sent = Column(Integer, nullable=True)
+    available_at = Column(AwareDateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    lease_until = Column(AwareDateTime, nullable=True)
+    last_error = Column(String, nullable=True)
+    created_at = Column(AwareDateTime, default=lambda: datetime.now(timezone.utc))
+    sent_at = Column(AwareDateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<OutboundMessage(id={self.id}, channel='{self.channel}', status='{self.status}', attempts={self.attempts})>"
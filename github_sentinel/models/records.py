@@ -0,0 +1,117 @@
+# github_sentinel/models/records.py
+
+"""
+Compact record types for fetched GitHub items.
+
+They are built straight from the REST/GraphQL JSON, use `__slots__` to keep
+per-item memory small, and never hold on to API objects that could trigger
+extra requests. Item access (`record['title']`) keeps working so reports and
+summarizers can treat them like the dicts they replaced.
+"""
+
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+
+
+def parse_github_datetime(value: str | None) -> datetime | None:
+    """Parses GitHub's ISO-8601 timestamps ('2024-01-01T00:00:00Z') into aware UTC datetimes."""
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).astimezone(timezone.utc)
+
+
+def _login(user: dict | None) -> str:
+    return (user or {}).get("login") or "ghost"
+
+
+class _Record:
+    """Mapping-style read access for the slotted record dataclasses."""
+    __slots__ = ()
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass(slots=True)
+class CommitRecord(_Record):
+    sha: str
+    author: str
+    message: str
+    url: str
+    committed_at: datetime | None = None
+
+    @classmethod
+    def from_json(cls, data: dict) -> "CommitRecord":
+        commit = data.get("commit") or {}
+        author = commit.get("author") or {}
+        return cls(
+            sha=data["sha"],
+            author=author.get("name") or _login(data.get("author")),
+            message=(commit.get("message") or "").split('\n')[0],
+            url=data.get("html_url", ""),
+            committed_at=parse_github_datetime(author.get("date")),
+        )
+
+
+@dataclass(slots=True)
+class IssueRecord(_Record):
+    """An issue or pull request (GitHub's issues listing returns both)."""
+    id: int
+    number: int
+    title: str
+    user: str
+    state: str
+    url: str
+    created_at: datetime | None
+    updated_at: datetime | None
+    closed_at: datetime | None
+    is_pull_request: bool = False
+
+    @classmethod
+    def from_json(cls, data: dict) -> "IssueRecord":
+        return cls(
+            id=data["id"],
+            number=data["number"],
+            title=data["title"],
+            user=_login(data.get("user")),
+            state=data["state"],
+            url=data.get("html_url", ""),
+            created_at=parse_github_datetime(data.get("created_at")),
+            updated_at=parse_github_datetime(data.get("updated_at")),
+            closed_at=parse_github_datetime(data.get("closed_at")),
+            is_pull_request="pull_request" in data,
+        )
+
+
+@dataclass(slots=True)
+class ReleaseRecord(_Record):
+    id: int
+    tag_name: str
+    name: str
+    author: str
+    url: str
+    created_at: datetime | None = None
+    published_at: datetime | None = None
+    draft: bool = False
+
+    @classmethod
+    def from_json(cls, data: dict) -> "ReleaseRecord":
+        return cls(
+            id=data["id"],
+            tag_name=data["tag_name"],
+            name=data.get("name") or data["tag_name"],
+            author=_login(data.get("author")),
+            url=data.get("html_url", ""),
+            created_at=parse_github_datetime(data.get("created_at")),
+            published_at=parse_github_datetime(data.get("published_at")),
+            draft=bool(data.get("draft")),
+        )
@@ -0,0 +1,52 @@
+# github_sentinel/models/subscriber.py
+
+from sqlalchemy import Column, Integer, String, Text, UniqueConstraint
+from datetime import datetime, timezone
+from github_sentinel.models.subscription import Base, AwareDateTime
+
+
+class Subscriber(Base):
+    """
+    A team (or person) following repositories. Each followed repository is
+    still fetched once through its `Subscription`; the subscriber only decides
+    how the report is summarized (`summarizer`, default: `summarizer.type`)
+    and where it is delivered (its channels).
+    """
+    __tablename__ = 'subscribers'
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, unique=True, nullable=False)
+    summarizer = Column(String, nullable=True)  # simple | ai
+    created_at = Column(AwareDateTime, default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return f"<Subscriber(name='{self.name}')>"
+
+
+class SubscriberChannel(Base):
+    """A notification destination of a subscriber (e.g. its own Slack webhook)."""
+    __tablename__ = 'subscriber_channels'
+
+    id = Column(Integer, primary_key=True)
+    subscriber_id = Column(Integer, nullable=False, index=True)
+    type = Column(String, nullable=False)  # slack | discord
+    webhook_url = Column(String, nullable=False)
+    options = Column(Text, nullable=True)  # JSON, same keys as the channel's section in config.yaml
+
+    @property
+    def key(self) -> str:
+        """The channel name used by the notification outbox."""
+        return f"{self.type}#{self.id}"
+
+
+class SubscriberRepo(Base):
+    """A subscriber following one subscription, with optional report filters (JSON)."""
+    __tablename__ = 'subscriber_repos'
+    __table_args__ = (
+        UniqueConstraint('subscriber_id', 'subscription_id', name='uq_subscriber_repos_subscriber_subscription'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    subscriber_id = Column(Integer, nullable=False)
+    subscription_id = Column(Integer, nullable=False, index=True)
+    filters = Column(Text, nullable=True)
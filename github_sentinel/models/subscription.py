@@ -1,7 +1,7 @@
 # github_sentinel/models/subscription.py
 
 # CHANGE: Import TypeDecorator
-from sqlalchemy import Column, Integer, String, DateTime, TypeDecorator
+from sqlalchemy import Column, Float, Integer, String, DateTime, TypeDecorator
 from sqlalchemy.orm import declarative_base
 from datetime import datetime, timezone
 
@@ -40,6 +40,38 @@ class Subscription(Base):
     # CHANGE: Use our new AwareDateTime type
     created_at = Column(AwareDateTime, default=lambda: datetime.now(timezone.utc))
     last_checked_at = Column(AwareDateTime, nullable=True)
+    # High-water marks of what has already been reported; fetching stops as soon as
+    # these are reached instead of paging through the full history.
+    last_commit_sha = Column(String, nullable=True)
+    last_release_id = Column(Integer, nullable=True)
+    last_issue_updated_at = Column(AwareDateTime, nullable=True)
+    # When the scheduler should check this repo next; indexed so finding due work
+    # does not scan the whole table.
+    next_due_at = Column(AwareDateTime, nullable=True, index=True)
+    # The slot `next_due_at` was derived from, before jitter; the next slot advances from it
+    # so jitter is added once per run instead of accumulating.
+    scheduled_at = Column(AwareDateTime, nullable=True)
+    # Activity observed by recent checks, used to adapt the polling interval
+    last_item_count = Column(Integer, nullable=True)
+    avg_items_per_check = Column(Float, nullable=True)  # Exponentially weighted
+    empty_check_streak = Column(Integer, nullable=True)
+    # Interval chosen by the adaptive scheduler (None: the schedule's own) and why
+    poll_interval_seconds = Column(Integer, nullable=True)
+    poll_reason = Column(String, nullable=True)
+    # Set once a webhook delivery (including GitHub's initial ping) arrives for this repo.
+    webhook_last_event_at = Column(AwareDateTime, nullable=True)
+    # Activity up to this time is known to be covered: buffered webhook events after it are
+    # complete only if the receiver has been running since then; otherwise the repo is polled.
+    webhook_synced_at = Column(AwareDateTime, nullable=True)
 
     def __repr__(self):
-        return f"<Subscription(repo='{self.repo_url}', schedule='{self.schedule}')>"
\ No newline at end of file
+        return f"<Subscription(repo='{self.repo_url}', schedule='{self.schedule}')>"
+
+    @property
+    def watermarks(self) -> dict:
+        """The high-water marks in the form expected by `GitHubClient.fetch_updates`."""
+        return {
+            "commit_sha": self.last_commit_sha,
+            "release_id": self.last_release_id,
+            "issue_updated_at": self.last_issue_updated_at,
+        }
\ No newline at end of file
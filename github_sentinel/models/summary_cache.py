@@ -0,0 +1,20 @@
+# github_sentinel/models/summary_cache.py
+
+from sqlalchemy import Column, Integer, String, Text
+from datetime import datetime, timezone
+from github_sentinel.models.subscription import Base, AwareDateTime
+
+
+class SummaryCacheEntry(Base):
+    """A cached LLM summary, keyed by a hash of model, system prompt and update text."""
+    __tablename__ = 'summary_cache'
+
+    key = Column(String, primary_key=True)
+    model = Column(String, nullable=False)
+    summary = Column(Text, nullable=False)
+    size = Column(Integer, nullable=False, default=0)
+    created_at = Column(AwareDateTime, default=lambda: datetime.now(timezone.utc))
+    last_used_at = Column(AwareDateTime, default=lambda: datetime.now(timezone.utc), index=True)
+
+    def __repr__(self):
+        return f"<SummaryCacheEntry(key='{self.key[:12]}', model='{self.model}', size={self.size})>"
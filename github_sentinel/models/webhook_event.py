@@ -0,0 +1,30 @@
+# github_sentinel/models/webhook_event.py
+
+from sqlalchemy import Column, Integer, String, Text, Index
+from datetime import datetime, timezone
+from github_sentinel.models.subscription import Base, AwareDateTime
+
+
+class WebhookEvent(Base):
+    """
+    A GitHub webhook delivery buffered for a subscribed repository until the
+    next sweep turns it into a report. `delivery_id` (X-GitHub-Delivery) is
+    unique, so redelivered events are stored once.
+    """
+    __tablename__ = 'webhook_events'
+    __table_args__ = (
+        Index('ix_webhook_events_subscription_processed', 'subscription_id', 'processed_at'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    delivery_id = Column(String, unique=True, nullable=False)
+    subscription_id = Column(Integer, nullable=False)
+    repo_url = Column(String, nullable=False)
+    event = Column(String, nullable=False)  # push | issues | pull_request | release
+    action = Column(String, nullable=True)
+    payload = Column(Text, nullable=False)  # The delivery's JSON body
+    received_at = Column(AwareDateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    processed_at = Column(AwareDateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<WebhookEvent(repo='{self.repo_url}', event='{self.event}', delivery='{self.delivery_id}')>"
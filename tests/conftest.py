@@ -0,0 +1,86 @@
+"""
+Shared fixtures: every test runs in its own temporary directory with a
+config.yaml and SQLite database pointed at the fake services from
+`benchmarks/fake_services.py`, so no network access is needed.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+import yaml
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from fake_services import FakeServices, FakeServiceSettings  # noqa: E402
+
+WEBHOOK_SECRET = "test-webhook-secret"
+
+
+def fast_settings(**overrides) -> FakeServiceSettings:
+    """Fake services without artificial latency."""
+    values = {"repos": 3, "commits_per_repo": 10, "issues_per_repo": 6, "releases_per_repo": 2,
+              "github_latency_ms": 0, "llm_latency_ms": 0, "slack_latency_ms": 0}
+    return FakeServiceSettings(**{**values, **overrides})
+
+
+def _merge(base: dict, overrides: dict) -> dict:
+    merged = dict(base)
+    for key, value in overrides.items():
+        merged[key] = _merge(merged[key], value) if isinstance(value, dict) and isinstance(merged.get(key), dict) else value
+    return merged
+
+
+def _reset_process_state():
+    """Forgets the loaded config, the database engine and the collected metrics."""
+    from github_sentinel.components import db_manager
+    from github_sentinel.components.config_loader import config
+    from github_sentinel.components.metrics import metrics
+
+    if db_manager._engine is not None:
+        db_manager._engine.dispose()
+    db_manager._engine = db_manager._session_factory = None
+    config.reload()
+    metrics.reset()
+
+
+@pytest.fixture
+def fake_env(tmp_path, monkeypatch):
+    """
+    Returns `start(settings=None, **config_overrides) -> FakeServices`, which
+    starts the fake services and writes a config.yaml using them into the
+    test's working directory. Conditional requests and the outbox are off, so
+    every sweep reaches the fake GitHub API and sends its reports right away.
+    """
+    monkeypatch.chdir(tmp_path)
+    _reset_process_state()
+    started = []
+
+    def start(settings: FakeServiceSettings | None = None, **config_overrides) -> FakeServices:
+        services = FakeServices(settings or fast_settings()).start()
+        started.append(services)
+        test_config = {
+            "github": {"token": "test-token", "api_url": services.github_api_url, "rate_limit": {"reserve": 0},
+                       "conditional_requests": False, "backend": "rest"},
+            "llm": {"api_key": "test-key", "model": "test-model", "base_url": services.llm_base_url,
+                    "cache": {"enabled": False}},
+            "summarizer": {"type": "simple"},
+            "database": {"path": str(tmp_path / "sentinel.db")},
+            "webhooks": {"host": "127.0.0.1", "port": 0, "secret": WEBHOOK_SECRET},
+            "notifications": {
+                "outbox": {"enabled": False},
+                "slack": {"enabled": True, "webhook_url": services.slack_webhook_url, "min_interval_seconds": 0},
+            },
+        }
+        (tmp_path / "config.yaml").write_text(yaml.safe_dump(_merge(test_config, config_overrides)))
+        return services
+
+    yield start
+
+    from github_sentinel.components.registry import close_shared_components
+    close_shared_components()
+    _reset_process_state()
+    for services in started:
+        services.stop()
@@ -0,0 +1,53 @@
+from conftest import fast_settings
+
+REPO = "repo-00000"
+
+
+def _start(fake_env, page_sizes: dict, max_pages: int = 10, **settings):
+    sizes = {"commits": 100, "issues": 100, "pull_requests": 100, "releases": 100, **page_sizes}
+    services = fake_env(fast_settings(repos=1, **settings),
+                        github={"backend": "graphql", "graphql": {"page_sizes": sizes, "max_pages": max_pages}})
+    from github_sentinel.components.graphql_client import GraphQLBatchClient
+    return services, GraphQLBatchClient()
+
+
+def _queries(services) -> int:
+    return services.stats.snapshot()["github:graphql"]["requests"]
+
+
+def test_pages_until_the_commit_watermark(fake_env):
+    services, client = _start(fake_env, {"commits": 3}, commits_per_repo=12)
+    commits = services.listing(REPO, "commits")
+    [url] = services.repo_urls()
+
+    updates = client.fetch_updates(url, since=None, watermarks={"commit_sha": commits[7]["sha"]})
+
+    assert [c.sha for c in updates["commits"]] == [c["sha"] for c in commits[:7]]
+    assert getattr(updates["commits"], "remaining", 0) == 0
+    # Pages of 3: the third one reaches the watermark, so no fourth is requested
+    assert _queries(services) == 3
+    assert client._pending[url]["watermarks"]["commit_sha"] == commits[0]["sha"]
+
+
+def test_unfinished_connection_is_counted_after_max_pages(fake_env):
+    services, client = _start(fake_env, {"commits": 3}, max_pages=2, commits_per_repo=12)
+    [url] = services.repo_urls()
+
+    updates = client.fetch_updates(url, since=None)
+
+    assert len(updates["commits"]) == 6
+    assert updates["commits"].remaining == 6
+    assert not updates["commits"].exact
+    assert _queries(services) == 2
+
+
+def test_release_scan_stops_at_the_release_watermark(fake_env):
+    services, client = _start(fake_env, {"releases": 1}, releases_per_repo=4)
+    releases = services.listing(REPO, "releases")
+    [url] = services.repo_urls()
+
+    updates = client.fetch_updates(url, since=None, watermarks={"release_id": releases[1]["id"]})
+
+    assert [r.id for r in updates["releases"]] == [releases[0]["id"]]
+    # All four releases are inside the window; only the watermark ends the scan on the second page
+    assert _queries(services) == 2
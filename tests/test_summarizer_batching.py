@@ -0,0 +1,45 @@
+from conftest import fast_settings
+
+
+def _llm_requests(services) -> int:
+    return services.stats.snapshot().get("llm:chat", {}).get("requests", 0)
+
+
+def _fetch_all(services) -> list[tuple[str, dict]]:
+    from github_sentinel.components.github_client import GitHubClient
+    client = GitHubClient()
+    return [(url, client.fetch_updates(url, since=None)) for url in services.repo_urls()]
+
+
+def test_small_repositories_share_packed_requests(fake_env):
+    services = fake_env(fast_settings(repos=5), llm={"batching": {"enabled": True, "max_repos_per_request": 2}})
+    from github_sentinel.components.summarizer import AISummarizer
+
+    items = _fetch_all(services)
+    reports = AISummarizer().summarize_many(items)
+
+    # Groups of 2, 2 and 1 repositories; the last one is summarized on its own
+    assert _llm_requests(services) == 3
+    for url, _ in items:
+        assert reports[url].startswith(f"# 定期报告: {url}")
+        assert "基准测试生成的摘要" in reports[url]
+
+
+def test_large_repository_is_map_reduced_in_chunks(fake_env):
+    services = fake_env(fast_settings(repos=1, commits_per_repo=40),
+                        llm={"batching": {"enabled": True, "max_prompt_tokens": 150}},
+                        fetch={"display_limits": {"commits": 40}})
+    from github_sentinel.components.summarizer import AISummarizer, split_by_tokens
+
+    summarizer = AISummarizer()
+    [(url, updates)] = _fetch_all(services)
+    chunks = split_by_tokens(summarizer._format_updates_for_prompt(updates, url), 150)
+    assert len(chunks) > 1
+    # Every chunk repeats the heading of the section it continues
+    assert all(chunk.startswith("## ") for chunk in chunks)
+
+    reports = summarizer.summarize_many([(url, updates)])
+
+    # One request per chunk, then one to merge the partial summaries
+    assert _llm_requests(services) == len(chunks) + 1
+    assert "生成 AI 摘要时出错" not in reports[url]
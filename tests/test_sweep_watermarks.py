@@ -0,0 +1,21 @@
+from conftest import fast_settings
+
+
+def test_second_sweep_does_not_resend_reported_releases(fake_env):
+    services = fake_env(fast_settings(repos=2))
+    from github_sentinel.components.db_manager import add_subscriptions, get_all_subscriptions
+    from github_sentinel.core.processor import run_once
+
+    add_subscriptions([(url, "daily") for url in services.repo_urls()])
+
+    run_once(max_workers=2)
+    assert len(services.slack_payloads) == 2
+    assert all("v1.2.0" in str(payload) for payload in services.slack_payloads)
+
+    for subscription in get_all_subscriptions():
+        repo = subscription.repo_url.rsplit("/", 1)[1]
+        assert subscription.last_checked_at is not None
+        assert subscription.watermarks["release_id"] == services.listing(repo, "releases")[0]["id"]
+
+    run_once(max_workers=2)
+    assert len(services.slack_payloads) == 2
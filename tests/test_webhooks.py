@@ -0,0 +1,128 @@
+import hashlib
+import hmac
+import http.client
+import json
+import uuid
+
+import pytest
+import requests
+
+from conftest import WEBHOOK_SECRET, fast_settings
+
+REPO = "repo-00000"
+
+
+@pytest.fixture
+def subscribed(fake_env):
+    """Fake services with their first repository subscribed; returns (services, subscription)."""
+    services = fake_env(fast_settings(repos=1))
+    from github_sentinel.components.db_manager import add_subscriptions, get_all_subscriptions
+    add_subscriptions([(services.repo_urls()[0], "daily")])
+    [subscription] = get_all_subscriptions()
+    return services, subscription
+
+
+@pytest.fixture
+def receiver(subscribed):
+    from github_sentinel.components.webhooks import WebhookReceiver
+    receiver = WebhookReceiver().start()
+    yield receiver
+    receiver.close()
+
+
+def _repository(services) -> dict:
+    return {"full_name": services.repo_urls()[0].removeprefix("https://github.com/"), "default_branch": "main"}
+
+
+def _push(services, *commits: dict) -> dict:
+    """A push of listing `commits` (oldest first, as GitHub lists them)."""
+    listed = [{"id": c["sha"], "message": c["commit"]["message"], "timestamp": c["commit"]["author"]["date"],
+               "url": c["html_url"], "author": {"name": c["commit"]["author"]["name"]}} for c in commits]
+    return {"ref": "refs/heads/main", "after": listed[-1]["id"], "commits": listed, "head_commit": listed[-1],
+            "repository": _repository(services)}
+
+
+def _release(services, release: dict, action: str) -> dict:
+    return {"action": action, "release": release, "repository": _repository(services)}
+
+
+def _store(event: str, payload: dict) -> str:
+    from github_sentinel.components.webhooks import store_delivery
+    return store_delivery(str(uuid.uuid4()), event, payload, json.dumps(payload))
+
+
+def _post(receiver, event: str, payload: dict, secret: str = WEBHOOK_SECRET, delivery_id: str | None = None):
+    body = json.dumps(payload).encode()
+    signature = "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return requests.post(f"http://127.0.0.1:{receiver.port}{receiver.path}", data=body, timeout=10, headers={
+        "Content-Type": "application/json", "X-GitHub-Event": event,
+        "X-GitHub-Delivery": delivery_id or str(uuid.uuid4()), "X-Hub-Signature-256": signature,
+    })
+
+
+def test_signature_is_verified_and_redeliveries_are_deduplicated(subscribed, receiver):
+    services, _ = subscribed
+    payload = _push(services, services.listing(REPO, "commits")[0])
+
+    assert _post(receiver, "push", payload, secret="wrong-secret").status_code == 401
+
+    first = _post(receiver, "push", payload, delivery_id="delivery-1")
+    again = _post(receiver, "push", payload, delivery_id="delivery-1")
+    assert (first.status_code, first.json()["result"]) == (202, "stored")
+    assert (again.status_code, again.json()["result"]) == (200, "duplicate")
+
+
+@pytest.mark.parametrize("content_length", ["abc", "-5"])
+def test_invalid_content_length_is_rejected(receiver, content_length):
+    connection = http.client.HTTPConnection("127.0.0.1", receiver.port, timeout=10)
+    try:
+        connection.putrequest("POST", receiver.path)
+        connection.putheader("Content-Length", content_length)
+        connection.endheaders()
+        response = connection.getresponse()
+        assert response.status == 400
+        assert json.loads(response.read())["result"] == "invalid Content-Length"
+    finally:
+        connection.close()
+
+
+def test_buffered_events_leave_out_already_reported_items(subscribed):
+    services, subscription = subscribed
+    from github_sentinel.components.webhooks import load_buffered_updates
+    from github_sentinel.models.records import parse_github_datetime
+
+    newest, reported, older = services.listing(REPO, "commits")[:3]
+    _store("push", _push(services, older, reported))
+    _store("push", _push(services, newest))
+    issues = [issue for issue in services.listing(REPO, "issues") if "pull_request" not in issue]
+    for issue in issues[:2]:
+        _store("issues", {"action": "edited", "issue": issue, "repository": _repository(services)})
+
+    watermarks = {"commit_sha": reported["sha"], "issue_updated_at": parse_github_datetime(issues[1]["updated_at"])}
+    updates, event_ids, marks = load_buffered_updates(subscription.id, watermarks=watermarks)
+
+    assert [c.sha for c in updates["commits"]] == [newest["sha"]]
+    assert [i.id for i in updates["issues"]] == [issues[0]["id"]]
+    assert len(event_ids) == 4
+    assert marks["commit_sha"] == newest["sha"]
+
+
+def test_release_mark_only_advances_to_the_newest_published_release(subscribed):
+    services, subscription = subscribed
+    from github_sentinel.components.webhooks import load_buffered_updates
+
+    newer, older = services.listing(REPO, "releases")
+    _store("release", _release(services, newer, "published"))
+    _store("release", _release(services, older, "edited"))
+    _, _, marks = load_buffered_updates(subscription.id)
+    assert marks["release_id"] == newer["id"]
+
+
+def test_release_edit_alone_does_not_move_the_mark(subscribed):
+    services, subscription = subscribed
+    from github_sentinel.components.webhooks import load_buffered_updates
+
+    newer, older = services.listing(REPO, "releases")
+    _store("release", _release(services, older, "edited"))
+    _, _, marks = load_buffered_updates(subscription.id, watermarks={"release_id": newer["id"]})
+    assert "release_id" not in marks